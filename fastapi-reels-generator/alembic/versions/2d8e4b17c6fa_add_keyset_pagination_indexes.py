@@ -0,0 +1,30 @@
+"""Add users.created_at and keyset pagination indexes
+
+Revision ID: 2d8e4b17c6fa
+Revises: 9c51e07a2d3b
+Create Date: 2026-10-18 11:20:54.903318
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8e4b17c6fa'
+down_revision: Union[str, Sequence[str], None] = '9c51e07a2d3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.now()))
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'])
+    op.create_index('ix_reels_created_at_id', 'reels', ['created_at', 'id'])
+    op.create_index('ix_reels_user_id_created_at_id', 'reels', ['user_id', 'created_at', 'id'])
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reels_user_id_created_at_id', table_name='reels')
+    op.drop_index('ix_reels_created_at_id', table_name='reels')
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_column('users', 'created_at')
@@ -0,0 +1,45 @@
+"""Add render_jobs table
+
+Revision ID: 4ff4bb93672a
+Revises: a4782fbd032a
+Create Date: 2026-10-18 09:12:40.218531
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+# revision identifiers, used by Alembic.
+revision: str = '4ff4bb93672a'
+down_revision: Union[str, Sequence[str], None] = 'a4782fbd032a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'render_jobs',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('title', sa.String, nullable=False),
+        sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('status', sa.String, nullable=False, server_default='queued'),
+        sa.Column('video', sa.String, nullable=False),
+        sa.Column('audio', sa.String, nullable=False),
+        sa.Column('images', ARRAY(sa.String), nullable=False, server_default='{}'),
+        sa.Column('image_scale', sa.Float, nullable=False, server_default='0.5'),
+        sa.Column('output', sa.String, nullable=False),
+        sa.Column('reel_id', UUID(as_uuid=True), sa.ForeignKey('reels.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('error', sa.Text, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime, nullable=True),
+        sa.Column('finished_at', sa.DateTime, nullable=True),
+    )
+    op.create_index('ix_render_jobs_user_id', 'render_jobs', ['user_id'])
+    op.create_index('ix_render_jobs_status', 'render_jobs', ['status'])
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_render_jobs_status', table_name='render_jobs')
+    op.drop_index('ix_render_jobs_user_id', table_name='render_jobs')
+    op.drop_table('render_jobs')
@@ -0,0 +1,26 @@
+"""Add layout and anchors to render_jobs
+
+Revision ID: 5b2f8c6e1a90
+Revises: 7e1c0a9d4b25
+Create Date: 2026-10-18 15:36:12.094417
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2f8c6e1a90'
+down_revision: Union[str, Sequence[str], None] = '7e1c0a9d4b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('render_jobs', sa.Column('layout', sa.String, nullable=False, server_default='auto'))
+    op.add_column('render_jobs', sa.Column('anchors', sa.JSON, nullable=True))
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('render_jobs', 'anchors')
+    op.drop_column('render_jobs', 'layout')
@@ -0,0 +1,26 @@
+"""Add updated_at to reels and users
+
+Revision ID: 7e1c0a9d4b25
+Revises: 2d8e4b17c6fa
+Create Date: 2026-10-18 14:02:37.518204
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7e1c0a9d4b25'
+down_revision: Union[str, Sequence[str], None] = '2d8e4b17c6fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('reels', sa.Column('updated_at', sa.DateTime, nullable=False, server_default=sa.func.now()))
+    op.add_column('users', sa.Column('updated_at', sa.DateTime, nullable=False, server_default=sa.func.now()))
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'updated_at')
+    op.drop_column('reels', 'updated_at')
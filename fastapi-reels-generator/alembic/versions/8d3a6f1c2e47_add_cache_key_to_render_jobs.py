@@ -0,0 +1,26 @@
+"""Add cache_key to render_jobs
+
+Revision ID: 8d3a6f1c2e47
+Revises: 5b2f8c6e1a90
+Create Date: 2026-10-18 16:02:47.318806
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3a6f1c2e47'
+down_revision: Union[str, Sequence[str], None] = '5b2f8c6e1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('render_jobs', sa.Column('cache_key', sa.String(64), nullable=True))
+    op.create_index('ix_render_jobs_cache_key', 'render_jobs', ['cache_key'])
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_render_jobs_cache_key', table_name='render_jobs')
+    op.drop_column('render_jobs', 'cache_key')
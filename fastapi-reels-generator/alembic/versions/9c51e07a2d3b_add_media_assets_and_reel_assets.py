@@ -0,0 +1,43 @@
+"""Add media_assets and reel_assets tables
+
+Revision ID: 9c51e07a2d3b
+Revises: 4ff4bb93672a
+Create Date: 2026-10-18 10:03:12.457120
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+# revision identifiers, used by Alembic.
+revision: str = '9c51e07a2d3b'
+down_revision: Union[str, Sequence[str], None] = '4ff4bb93672a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'media_assets',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('sha256', sa.String(64), nullable=False),
+        sa.Column('path', sa.String, nullable=False),
+        sa.Column('size', sa.BigInteger, nullable=False),
+        sa.Column('ref_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_media_assets_sha256', 'media_assets', ['sha256'], unique=True)
+    op.create_table(
+        'reel_assets',
+        sa.Column('reel_id', UUID(as_uuid=True), sa.ForeignKey('reels.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('asset_id', UUID(as_uuid=True), sa.ForeignKey('media_assets.id'), primary_key=True),
+    )
+    op.create_index('ix_reel_assets_asset_id', 'reel_assets', ['asset_id'])
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reel_assets_asset_id', table_name='reel_assets')
+    op.drop_table('reel_assets')
+    op.drop_index('ix_media_assets_sha256', table_name='media_assets')
+    op.drop_table('media_assets')
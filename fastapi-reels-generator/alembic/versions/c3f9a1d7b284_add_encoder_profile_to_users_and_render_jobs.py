@@ -0,0 +1,26 @@
+"""Add encoder_profile to users and render_jobs
+
+Revision ID: c3f9a1d7b284
+Revises: 8d3a6f1c2e47
+Create Date: 2026-10-18 19:41:05.512733
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a1d7b284'
+down_revision: Union[str, Sequence[str], None] = '8d3a6f1c2e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('encoder_profile', sa.String(), nullable=True))
+    op.add_column('render_jobs', sa.Column('encoder_profile', sa.String(), nullable=True))
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('render_jobs', 'encoder_profile')
+    op.drop_column('users', 'encoder_profile')
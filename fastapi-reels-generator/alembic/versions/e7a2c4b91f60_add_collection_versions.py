@@ -0,0 +1,28 @@
+"""Add collection_versions
+
+Revision ID: e7a2c4b91f60
+Revises: c3f9a1d7b284
+Create Date: 2026-10-19 10:12:36.204518
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c4b91f60'
+down_revision: Union[str, Sequence[str], None] = 'c3f9a1d7b284'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'collection_versions',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('collection_versions')
@@ -0,0 +1,26 @@
+"""Add stored_at to media_assets
+
+Revision ID: f2b7d9e3a518
+Revises: e7a2c4b91f60
+Create Date: 2026-10-19 14:03:51.772930
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7d9e3a518'
+down_revision: Union[str, Sequence[str], None] = 'e7a2c4b91f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('media_assets', sa.Column('stored_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE media_assets SET stored_at = created_at")
+    op.alter_column('media_assets', 'stored_at', nullable=False)
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('media_assets', 'stored_at')
@@ -0,0 +1,328 @@
+"""
+Render benchmarks for create_reel.
+
+Generates synthetic inputs (test-pattern background videos, RGBA and RGB
+overlays, a sine-wave audio track), renders every combination of resolution,
+duration, mode and encoder profile in a fresh process, and writes the
+per-stage timings, frames per second, peak memory and output size as JSON.
+Each case also reports its encode frames per second and video bitrate, to
+compare encoder profiles' speed against the bytes they produce.
+
+Run from the project root:
+
+    python -m benchmarks.render_bench --output results.json
+    python -m benchmarks.render_bench --baseline results.json --output new.json
+    python -m benchmarks.render_bench --input clip.mp4 --modes pipe --profiles all
+
+With --baseline, cases whose frames per second dropped by more than
+--tolerance are reported and the exit code is 1.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from src.render.encoding import ENCODER_PROFILES, get_encoder_profile
+
+DEFAULT_RESOLUTIONS = "540x960,720x1280,1080x1920"
+DEFAULT_DURATIONS = "5,30"
+DEFAULT_MODES = "pipe,remux"
+FPS = 30
+# One keyframe every two seconds, like most phone and editor exports
+GOP_SECONDS = 2
+
+
+def make_video(path: str, width: int, height: int, duration: float):
+    """
+    Write a synthetic background video, unless it already exists.
+
+    Args:
+        path: Where the video is written.
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+        duration: Length in seconds.
+    """
+    if os.path.exists(path):
+        return
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={FPS}",
+            "-t", str(duration), "-c:v", "libx264", "-preset", "veryfast", "-g", str(GOP_SECONDS * FPS),
+            "-pix_fmt", "yuv420p", path,
+        ],
+        check=True,
+    )
+
+
+def make_audio(path: str, duration: float):
+    """
+    Write a sine-wave audio track, unless it already exists.
+
+    Args:
+        path: Where the audio is written.
+        duration: Length in seconds.
+    """
+    if os.path.exists(path):
+        return
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440", "-t", str(duration), path],
+        check=True,
+    )
+
+
+def make_overlays(directory: str, count: int) -> List[str]:
+    """
+    Write overlay images, alternating RGBA (a soft-edged disc) and opaque RGB (a gradient).
+
+    Args:
+        directory: Where the images are written.
+        count: Number of images.
+
+    Returns:
+        The image paths.
+    """
+    size = 512
+    y, x = np.mgrid[0:size, 0:size]
+    gradient = np.dstack([x * 255 // size, y * 255 // size, np.full((size, size), 128)]).astype(np.uint8)
+    distance = np.hypot(x - size / 2, y - size / 2) / (size / 2)
+    alpha = (np.clip(1.2 - distance, 0, 1) * 255).astype(np.uint8)
+
+    paths = []
+    for i in range(count):
+        if i % 2 == 0:
+            path = os.path.join(directory, f"overlay-{i}-rgba.png")
+            image = np.dstack([np.roll(gradient, i * 64, axis=1), alpha])
+        else:
+            path = os.path.join(directory, f"overlay-{i}-rgb.png")
+            image = np.roll(gradient, i * 64, axis=0)
+        if not os.path.exists(path):
+            cv2.imwrite(path, image)
+        paths.append(path)
+    return paths
+
+
+def video_bytes(path: str) -> Optional[int]:
+    """
+    Measure the size of a file's video stream, without its audio and container.
+
+    Args:
+        path: The rendered file.
+
+    Returns:
+        The video stream's size in bytes, or None if ffmpeg did not report it.
+    """
+    result = subprocess.run(
+        ["ffmpeg", "-i", path, "-map", "0:v:0", "-c", "copy", "-f", "null", "-"], capture_output=True, text=True
+    )
+    # e.g. "video:1234KiB audio:0KiB ..." (older ffmpeg prints kB)
+    sizes = re.findall(r"video:\s*([\d.]+)\s*(KiB|kB)", result.stderr)
+    if not sizes:
+        return None
+    value, unit = sizes[-1]
+    return int(float(value) * (1024 if unit == "KiB" else 1000))
+
+
+def run_case(case: Dict, video: str, images: List[str], audio: str, output: str) -> Dict:
+    """
+    Render one case and measure it; runs in its own process so peak memory is per case.
+
+    Args:
+        case: The case's parameters, from the command line.
+        video: Background video path.
+        images: Overlay image paths.
+        audio: Audio track path.
+        output: Where the reel is written.
+
+    Returns:
+        The case's measurements.
+    """
+    # Imported here so the parent process never loads the renderer
+    from src.test import create_reel
+
+    stats: Dict[str, float] = {}
+    started = time.perf_counter()
+    create_reel(
+        video, images, audio, output,
+        image_scale=case["image_scale"], mode=case["mode"], layout=case["layout"],
+        segment_workers=case["segment_workers"], stats=stats, encoder_profile=case["encoder_profile"],
+    )
+    wall = time.perf_counter() - started
+    frames = int(stats.pop("frames", 0))
+    capture = cv2.VideoCapture(output)
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    capture.release()
+    encoded = video_bytes(output)
+    seconds = frames / fps if fps else 0
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        **case,
+        "frames": frames,
+        "wall_seconds": round(wall, 3),
+        "fps": round(frames / wall, 2) if wall else 0.0,
+        "encode_fps": round(frames / stats["encode"], 2) if stats.get("encode") else 0.0,
+        "video_bitrate_kbps": round(encoded * 8 / seconds / 1000, 1) if encoded and seconds else None,
+        "stages": {stage: round(seconds, 3) for stage, seconds in stats.items()},
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2**20, 1),
+        "peak_ffmpeg_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / 2**20, 1),
+        "output_bytes": os.path.getsize(output),
+    }
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Find cases that got slower than in a previous run.
+
+    Args:
+        results: This run's results.
+        baseline: A previous run's JSON document.
+        tolerance: Allowed drop in frames per second, as a fraction.
+
+    Returns:
+        One message per regressed case.
+    """
+    def key(result):
+        return (
+            result["resolution"], result["duration"], result["mode"], result["images"], result["layout"],
+            result.get("encoder_profile", "balanced"),
+        )
+
+    previous = {key(result): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(key(result))
+        if before is None or not before["fps"]:
+            continue
+        change = result["fps"] / before["fps"] - 1
+        if change < -tolerance:
+            regressions.append(
+                f"{result['name']}: {before['fps']} -> {result['fps']} fps ({change:+.1%})"
+            )
+    return regressions
+
+
+def ffmpeg_version() -> Optional[str]:
+    try:
+        output = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout
+    except OSError:
+        return None
+    return output.splitlines()[0] if output else None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark create_reel on synthetic inputs.")
+    parser.add_argument("--resolutions", default=DEFAULT_RESOLUTIONS, help="Comma-separated WIDTHxHEIGHT list.")
+    parser.add_argument("--durations", default=DEFAULT_DURATIONS, help="Comma-separated lengths in seconds.")
+    parser.add_argument("--modes", default=DEFAULT_MODES, help="Comma-separated create_reel modes.")
+    parser.add_argument(
+        "--profiles", default=get_encoder_profile().name, help="Comma-separated encoder profiles, or \"all\"."
+    )
+    parser.add_argument("--input", help="Benchmark this video instead of synthetic ones; --resolutions and --durations are ignored.")
+    parser.add_argument("--images", type=int, default=2, help="Overlays per reel.")
+    parser.add_argument("--layout", default="auto", help="Overlay layout.")
+    parser.add_argument("--image-scale", type=float, default=0.4, help="Overlay width as a fraction of the video width.")
+    parser.add_argument("--segment-workers", type=int, default=os.cpu_count() or 1, help="Processes for the parallel mode.")
+    parser.add_argument("--work-dir", default=os.path.join("benchmarks", ".work"), help="Where inputs and outputs are kept.")
+    parser.add_argument("--output", help="Write the results here as JSON; printed otherwise.")
+    parser.add_argument("--baseline", help="A previous run's JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed drop in fps before a case counts as a regression.")
+    args = parser.parse_args(argv)
+
+    resolutions = [tuple(int(side) for side in value.split("x")) for value in args.resolutions.split(",")]
+    durations = [float(value) for value in args.durations.split(",")]
+    modes = args.modes.split(",")
+    profiles = list(ENCODER_PROFILES) if args.profiles == "all" else args.profiles.split(",")
+    for profile in profiles:
+        get_encoder_profile(profile)
+    if args.input:
+        capture = cv2.VideoCapture(args.input)
+        if not capture.isOpened():
+            parser.error(f"Cannot open {args.input}")
+        resolutions = [(int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))]
+        durations = [round(capture.get(cv2.CAP_PROP_FRAME_COUNT) / (capture.get(cv2.CAP_PROP_FPS) or FPS), 2)]
+        capture.release()
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    images = make_overlays(args.work_dir, args.images)
+    audio = os.path.join(args.work_dir, f"audio-{max(durations):g}s.mp3")
+    make_audio(audio, max(durations))
+
+    # Spawned so every case starts from a clean process
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for (width, height), duration, mode, profile in itertools.product(resolutions, durations, modes, profiles):
+        if args.input:
+            video = args.input
+        else:
+            video = os.path.join(args.work_dir, f"background-{width}x{height}-{duration:g}s.mp4")
+            make_video(video, width, height, duration)
+        case = {
+            "name": f"{width}x{height}-{duration:g}s-{mode}-{profile}",
+            "resolution": f"{width}x{height}",
+            "duration": duration,
+            "mode": mode,
+            "images": args.images,
+            "layout": args.layout,
+            "image_scale": args.image_scale,
+            "segment_workers": args.segment_workers if mode == "parallel" else None,
+            "encoder_profile": profile,
+        }
+        output = os.path.join(args.work_dir, f"{case['name']}.mp4")
+        print(f"Benchmarking {case['name']}...")
+        # Not multiprocessing.Pool: its workers are daemonic and parallel mode spawns segment workers
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_case, case, video, images, audio, output).result()
+        print(
+            f"{case['name']}: {result['fps']} fps, {result['wall_seconds']}s, "
+            f"peak {result['peak_rss_mb']} MB, {result['output_bytes']} bytes, "
+            f"encode {result['encode_fps']} fps at {result['video_bitrate_kbps']} kb/s"
+        )
+        results.append(result)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "ffmpeg": ffmpeg_version(),
+        },
+        "input": args.input,
+        "encoder_profiles": {name: get_encoder_profile(name).video_args() for name in profiles},
+        "results": results,
+    }
+    document = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(document)
+        print(f"Results written to {args.output}")
+    else:
+        print(document)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"Regression: {message}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
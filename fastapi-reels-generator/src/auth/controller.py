@@ -13,9 +13,10 @@ from src.auth.service import AuthService
 from src.models.users.schema import UserCreateModel
 from src.models.users.service import UserService
 from src.db.database import Database
+from src.db.unit_of_work import UnitOfWork
 from src.common.jwt_handler import decode_jwt
 from src.env import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, GOOGLE_REDIRECT_URI
-from src.dependencies import get_user_service, get_auth_service
+from src.dependencies import get_user_service, get_auth_service, get_unit_of_work
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -37,7 +38,11 @@ async def login_google(request: Request):
     return await oauth.google.authorize_redirect(request, redirect_uri)
 
 @router.get("/google", response_model=AuthResponse)
-async def auth_google(request: Request, auth_service: AuthService = Depends(get_auth_service)):
+async def auth_google(
+    request: Request,
+    auth_service: AuthService = Depends(get_auth_service),
+    uow: UnitOfWork = Depends(get_unit_of_work),
+):
     print('hereeee')
     try:
         token = await oauth.google.authorize_access_token(request)
@@ -51,6 +56,8 @@ async def auth_google(request: Request, auth_service: AuthService = Depends(get_
         # Check if user exists, otherwise create a new one
         print('Check if user exists, otherwise create a new one')
         user = await auth_service.login_google(UserCreateModel(email=email, name=user_info.get("name", email.split("@")[0])))
+        # Lookup and sign-up run in one transaction
+        await uow.commit()
         print(user.id)
         # Generate JWT token
         print('Generate JWT token')
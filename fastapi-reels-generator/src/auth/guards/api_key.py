@@ -0,0 +1,17 @@
+import secrets
+from fastapi import Request
+from fastapi.security import APIKeyHeader
+from src.auth.exception import AuthUnauthorisedException
+from src.env import API_KEY
+
+
+class APIKeyGuard(APIKeyHeader):
+    def __init__(self, name: str = "X-API-Key"):
+        super(APIKeyGuard, self).__init__(name=name, auto_error=False)
+
+    async def __call__(self, request: Request):
+        key = await super(APIKeyGuard, self).__call__(request)
+        # Without a configured key the internal endpoints stay closed
+        if not API_KEY or not key or not secrets.compare_digest(key, API_KEY):
+            raise AuthUnauthorisedException("Invalid API key.")
+        return key
@@ -0,0 +1,298 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from src.db.interfaces.cache_backend import CacheBackendError, CacheBackendInterface
+from src.env import CACHE_LOCAL_TTL, CACHE_LOCK_TTL, CACHE_MAX_ENTRIES, CACHE_NEGATIVE_TTL, CACHE_TTL
+
+# Stored for rows that do not exist, so misses are cached too
+MISSING = b"null"
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries expire after a TTL.
+
+    A cached None records a miss, so lookups of missing rows are cached too,
+    for the shorter negative_ttl.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL, negative_ttl: float = CACHE_NEGATIVE_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used ones are evicted.
+            ttl: Seconds a cached value stays valid.
+            negative_ttl: Seconds a cached miss (None) stays valid.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Look up a key.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            (True, value) on a hit, where value may be None for a cached miss;
+            (False, None) if the key is absent or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key: The cache key.
+            value: The value; None records a miss.
+            ttl: Seconds the entry stays valid; defaults to ttl or negative_ttl.
+        """
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """
+        Drop a key, if cached.
+
+        Args:
+            key: The cache key.
+        """
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Report the cache's size and hit rate.
+
+        Returns:
+            Entry count, capacity, hits, misses, evictions and hit ratio.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LookupCache:
+    """
+    Cache of one kind of record by ID, shared by every worker through a cache backend.
+
+    Records are kept as the JSON documents sent to clients, so hits are served
+    without serializing again.
+
+    Each worker keeps recently read values in a short-lived local TTLCache in
+    front of the backend. When a key is missing, only the worker holding its
+    fill lock loads it from the database; the others wait for the value to
+    appear. Invalidations bump the key's generation, delete the shared key and
+    are published so every worker drops its local copy. A fill only stores its
+    value if the generation it read before loading is still current, so a row
+    loaded before an update committed is never cached after it.
+
+    Loaders must read from the primary: a replica may still return the row as it
+    was before the invalidated write.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackendInterface,
+        namespace: str,
+        ttl: float = CACHE_TTL,
+        negative_ttl: float = CACHE_NEGATIVE_TTL,
+        local_ttl: float = CACHE_LOCAL_TTL,
+        lock_ttl: float = CACHE_LOCK_TTL,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            backend: Where values are shared between workers.
+            namespace: Prefix of the keys and name of the invalidation channel, e.g. "reels".
+            ttl: Seconds a value stays cached.
+            negative_ttl: Seconds a miss stays cached.
+            local_ttl: Seconds a worker reuses a value without asking the backend.
+            lock_ttl: Seconds other workers wait for a fill before loading themselves.
+        """
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock_ttl = lock_ttl
+        self.local = TTLCache(ttl=local_ttl, negative_ttl=min(local_ttl, negative_ttl))
+        self.channel = f"{namespace}:invalidate"
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def start(self):
+        """Start listening for invalidations published by other workers."""
+        await self.backend.subscribe(self.channel, self._on_invalidate)
+
+    async def get_or_load(self, key: Any, loader: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        """
+        Return a cached record, loading and caching it on a miss.
+
+        Args:
+            key: The record's ID.
+            loader: Loads the record from the primary database as JSON; returns None if it does not exist.
+
+        Returns:
+            The record's JSON, or None if it does not exist.
+        """
+        key = str(key)
+        hit, value = self.local.get(key)
+        if hit:
+            self.hits += 1
+            return value
+        # Concurrent misses in this worker share one fill
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The request filling the key went away; load it ourselves
+                return await loader()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._fetch(key, loader)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else waited on it
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def invalidate(self, key: Any):
+        """
+        Drop a record from every worker's cache.
+
+        Args:
+            key: The record's ID.
+        """
+        key = str(key)
+        self.local.invalidate(key)
+        try:
+            # Bumped first, so fills that loaded the old row can no longer store it
+            await self.backend.incr(self._generation_key(key), max(self.ttl, self.lock_ttl))
+            await self.backend.delete(self._key(key))
+            await self.backend.publish(self.channel, key)
+        except CacheBackendError as e:
+            self.errors += 1
+            print(f"Cache invalidation of {self._key(key)} failed: {e}")
+
+    def stats(self) -> dict:
+        """
+        Report hits and misses of the shared cache and of this worker's local copy.
+
+        Returns:
+            Hits, misses, coalesced waits and backend errors, plus the local cache's stats.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "local": self.local.stats(),
+        }
+
+    async def _fetch(self, key: str, loader: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        loaded = False
+        try:
+            raw = await self.backend.get(self._key(key))
+            if raw is not None:
+                self.hits += 1
+                return self._remember(key, raw)
+            self.misses += 1
+            lock = self._key(key) + ":lock"
+            token = uuid.uuid4().hex.encode()
+            if await self.backend.set(lock, token, self.lock_ttl, only_if_absent=True):
+                try:
+                    generation = await self.backend.get(self._generation_key(key))
+                    value = await loader()
+                    loaded = True
+                    stored = await self.backend.set_if_equal(
+                        self._key(key),
+                        MISSING if value is None else value,
+                        self.negative_ttl if value is None else self.ttl,
+                        self._generation_key(key),
+                        generation,
+                    )
+                finally:
+                    await self.backend.delete_if_equal(lock, token)
+                if stored:
+                    self.local.set(key, value)
+                return value
+            # Another worker is filling the key; wait for it rather than hitting the database too
+            self.coalesced += 1
+            deadline = time.monotonic() + self.lock_ttl
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                raw = await self.backend.get(self._key(key))
+                if raw is not None:
+                    return self._remember(key, raw)
+        except CacheBackendError as e:
+            self.errors += 1
+            print(f"Cache lookup of {self._key(key)} failed: {e}")
+            if loaded:
+                return value
+        return await loader()
+
+    def _remember(self, key: str, raw: bytes) -> Optional[bytes]:
+        value = None if raw == MISSING else raw
+        self.local.set(key, value)
+        return value
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _generation_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}:generation"
+
+    async def _on_invalidate(self, key: str):
+        self.local.invalidate(key)
@@ -0,0 +1,34 @@
+import hashlib
+from typing import Optional
+
+def make_etag(*parts) -> str:
+    """
+    Build a strong ETag from the values a representation depends on.
+
+    Args:
+        parts: Values such as an id and its updated_at, or a collection's version and query parameters.
+
+    Returns:
+        The quoted ETag.
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Tell whether an If-None-Match header matches an ETag, so a 304 can be sent.
+
+    Args:
+        if_none_match: The header value, e.g. '"abc", W/"def"' or '*'.
+        etag: The current ETag of the resource.
+
+    Returns:
+        True if the client already has this version.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
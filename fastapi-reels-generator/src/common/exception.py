@@ -0,0 +1,5 @@
+from fastapi import HTTPException, status
+
+class UploadTooLargeException(HTTPException):
+    def __init__(self, msg: str = "Uploaded file is too large."):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=msg)
@@ -0,0 +1,60 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Generic, List, Optional, Tuple, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar('T')
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+def to_naive_utc(value: datetime) -> datetime:
+    """
+    Convert a time to naive UTC, as the created_at columns store it.
+
+    Args:
+        value: A naive time, taken to be UTC already, or a timezone-aware one.
+
+    Returns:
+        The time in UTC without tzinfo; asyncpg rejects comparing aware values with naive columns.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    """
+    Build an opaque cursor pointing just after a row.
+
+    Args:
+        created_at: The row's creation time.
+        id: The row's UUID, which breaks ties between equal timestamps.
+
+    Returns:
+        A URL-safe cursor string.
+    """
+    raw = json.dumps([created_at.isoformat(), str(id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Read a cursor produced by encode_cursor.
+
+    Args:
+        cursor: The cursor string.
+
+    Returns:
+        The (created_at, id) position.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return to_naive_utc(datetime.fromisoformat(created_at)), uuid.UUID(id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor {cursor}") from e
@@ -0,0 +1,29 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+def json_dumps(content: Any) -> bytes:
+    """
+    Serialize to JSON with orjson, which encodes UUIDs and datetimes natively.
+
+    Args:
+        content: Dicts, lists and scalars, as loaded from the database.
+
+    Returns:
+        The JSON document.
+    """
+    # asyncpg hands back its own UUID type, which orjson does not know
+    return orjson.dumps(content, default=str)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with json_dumps.
+
+    Bytes are taken to be JSON already and sent unchanged, e.g. documents read
+    from the lookup cache.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return json_dumps(content)
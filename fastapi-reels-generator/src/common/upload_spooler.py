@@ -0,0 +1,138 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, List
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from src.common.exception import UploadTooLargeException
+from src.env import MAX_UPLOAD_FILE_SIZE, MAX_UPLOAD_REQUEST_SIZE, UPLOAD_CHUNK_SIZE, UPLOAD_DIR
+
+
+@dataclass
+class SpooledUpload:
+    """A file that has been streamed to disk."""
+    path: str
+    filename: str
+    size: int
+    sha256: str
+
+
+class UploadSpooler:
+    """
+    Streams UploadFiles to disk in bounded chunks without blocking the event loop.
+
+    One spooler is used per request so the per-request size limit covers every
+    file of that request.
+    """
+
+    def __init__(
+        self,
+        upload_dir: str = UPLOAD_DIR,
+        max_file_size: int = MAX_UPLOAD_FILE_SIZE,
+        max_request_size: int = MAX_UPLOAD_REQUEST_SIZE,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+    ):
+        """
+        Initialize the spooler.
+
+        Args:
+            upload_dir: Directory the files are written to.
+            max_file_size: Largest accepted file, in bytes.
+            max_request_size: Largest accepted total of all files, in bytes.
+            chunk_size: Bytes read and written per step.
+        """
+        self.upload_dir = upload_dir
+        self.max_file_size = max_file_size
+        self.max_request_size = max_request_size
+        self.chunk_size = chunk_size
+        self.total_size = 0
+        self.spooled: List[SpooledUpload] = []
+
+    async def spool(self, upload: UploadFile) -> SpooledUpload:
+        """
+        Stream an upload to the upload directory, hashing it on the way.
+
+        Args:
+            upload: The file to store.
+
+        Returns:
+            The stored file with its size and SHA-256.
+
+        Raises:
+            UploadTooLargeException: If the file or the request exceeds its size limit.
+        """
+        filename = os.path.basename(upload.filename or "upload")
+        total_size = self.total_size
+        # Reject early when the client told us the size up front
+        if upload.size is not None:
+            self._check_size(filename, upload.size, total_size + upload.size)
+
+        path = os.path.join(self.upload_dir, f"{uuid.uuid4()}_{filename}")
+        digest = hashlib.sha256()
+        size = 0
+        f = await run_in_threadpool(open, path, "wb")
+        try:
+            while True:
+                chunk = await upload.read(self.chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                self._check_size(filename, size, total_size + size)
+                await run_in_threadpool(self._write_chunk, f, digest, chunk)
+        except BaseException:
+            await run_in_threadpool(self._discard_file, f, path)
+            raise
+        await run_in_threadpool(f.close)
+
+        self.total_size = total_size + size
+        spooled = SpooledUpload(path=path, filename=filename, size=size, sha256=digest.hexdigest())
+        self.spooled.append(spooled)
+        return spooled
+
+    def keep(self, spooled: SpooledUpload):
+        """
+        Stop tracking a spooled file so discard() leaves it alone.
+
+        Args:
+            spooled: A file returned by spool() that now belongs to someone else.
+        """
+        self.spooled = [s for s in self.spooled if s.path != spooled.path]
+
+    async def discard(self, *spooled: SpooledUpload):
+        """
+        Delete spooled files, e.g. after a failed request.
+
+        Args:
+            spooled: The files to delete; every file spooled by this spooler if none are given.
+        """
+        paths = {s.path for s in spooled} if spooled else {s.path for s in self.spooled}
+        for path in paths:
+            await run_in_threadpool(self._remove, path)
+        self.spooled = [s for s in self.spooled if s.path not in paths]
+
+    def _check_size(self, filename: str, file_size: int, request_size: int):
+        if file_size > self.max_file_size:
+            raise UploadTooLargeException(f"{filename} exceeds the {self.max_file_size} byte file limit.")
+        if request_size > self.max_request_size:
+            raise UploadTooLargeException(f"Upload exceeds the {self.max_request_size} byte request limit.")
+
+    @staticmethod
+    def _write_chunk(f: BinaryIO, digest, chunk: bytes):
+        # hashlib releases the GIL on large buffers, so both steps stay off the loop
+        digest.update(chunk)
+        f.write(chunk)
+
+    @staticmethod
+    def _discard_file(f: BinaryIO, path: str):
+        f.close()
+        UploadSpooler._remove(path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
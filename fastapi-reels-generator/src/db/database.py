@@ -1,34 +1,219 @@
+import itertools
+import time
 import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import List, Optional
+from sqlalchemy import BigInteger, Column, String, Table
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID 
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from src.env import DB_CONNECTION
+from src.db.pool import InstrumentedPool
+from src.env import (
+    DB_CONNECTION,
+    DB_REPLICA_BALANCING,
+    DB_REPLICAS,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+    REPLICA_STICKY_SECONDS,
+)
 
 class Base(DeclarativeBase):
     """Abstract base model with a common id column"""
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )  # UUID as primary key
+
+# One counter per table whose collection responses carry an ETag, bumped right
+# after every committed write that changed rows
+collection_versions = Table(
+    'collection_versions',
+    Base.metadata,
+    Column('name', String, primary_key=True),
+    Column('version', BigInteger, nullable=False, default=0),
+)
     
+@dataclass
+class ClientWrites:
+    """When the client of the current request last wrote, carried between its requests in a cookie."""
+
+    # Unix time of the client's last committed write, if recent enough to matter
+    last_write: Optional[float] = None
+    # Whether this request wrote, so the cookie has to be refreshed
+    wrote: bool = False
+
+    @property
+    def sticky(self) -> bool:
+        """Whether the client's reads must go to the primary to see its own writes."""
+        return self.last_write is not None and time.time() - self.last_write < REPLICA_STICKY_SECONDS
+
+
+_client_writes: ContextVar[Optional[ClientWrites]] = ContextVar("client_writes", default=None)
+
+
+def track_client_writes(cookie: Optional[str]) -> ClientWrites:
+    """
+    Start tracking the writes of the current request's client.
+
+    Args:
+        cookie: The client's REPLICA_STICKY_COOKIE value, if it sent one.
+
+    Returns:
+        The client's writes; after the request, wrote tells whether to send the cookie again.
+    """
+    try:
+        last_write = float(cookie) if cookie else None
+    except ValueError:
+        last_write = None
+    client = ClientWrites(last_write=last_write)
+    _client_writes.set(client)
+    return client
+
+
 class Database:
-    def __init__(self, connection_string=DB_CONNECTION):
+    def __init__(
+        self,
+        connection_string=DB_CONNECTION,
+        replica_strings: Optional[List[str]] = None,
+        balancing: str = DB_REPLICA_BALANCING,
+    ):
+        """
+        Initialize the primary engine and, optionally, read-replica engines.
+
+        Args:
+            connection_string: DSN of the primary, which takes every write.
+            replica_strings: DSNs of read replicas; defaults to DB_REPLICAS.
+            balancing: How reads are spread over replicas, "round_robin" or "least_connections".
+        """
         print(connection_string)
-        self.engine = create_async_engine(connection_string)
+        if balancing not in ("round_robin", "least_connections"):
+            raise ValueError(f"Invalid replica balancing {balancing}")
+        self.engine = self._create_engine(connection_string)
         self.Session = async_sessionmaker(bind=self.engine)
+        self.replicas = [
+            self._create_engine(replica) for replica in (DB_REPLICAS if replica_strings is None else replica_strings)
+        ]
+        self.ReplicaSessions = [async_sessionmaker(bind=replica) for replica in self.replicas]
+        self.balancing = balancing
+        self._round_robin = itertools.cycle(range(len(self.replicas)))
+
+    @staticmethod
+    def _create_engine(connection_string: str):
+        connect_args = {}
+        if make_url(connection_string).get_driver_name() == "asyncpg":
+            # Reuse prepared statements per connection instead of re-parsing every query
+            connect_args["prepared_statement_cache_size"] = DB_STATEMENT_CACHE_SIZE
+        return create_async_engine(
+            connection_string,
+            poolclass=InstrumentedPool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            connect_args=connect_args,
+        )
 
     async def init_db(self):
         async with self.engine.begin() as conn:
                         
             from src.models.users.schema import User
             from src.models.reels.schema import Reel
+            from src.models.jobs.schema import RenderJob
+            from src.models.assets.schema import MediaAsset
             await conn.run_sync(Reel.metadata.create_all)
             await conn.run_sync(User.metadata.create_all)
+            await conn.run_sync(RenderJob.metadata.create_all)
+            await conn.run_sync(MediaAsset.metadata.create_all)
 
     async def get_session(self) -> AsyncSession:
         return self.Session()
-    
+
+    async def get_read_session(self) -> AsyncSession:
+        """
+        Provide a session for read-only queries, on a replica when that is safe.
+
+        A client that wrote within the last REPLICA_STICKY_SECONDS reads from the
+        primary, so it sees its own writes; other clients are not affected.
+
+        Returns:
+            A session bound to a replica, or to the primary when there are no
+            replicas or the current client just wrote.
+        """
+        if not self.replicas or self.is_sticky():
+            return self.Session()
+        if self.balancing == "least_connections":
+            index = min(range(len(self.replicas)), key=lambda i: self.replicas[i].pool.checkedout())
+        else:
+            index = next(self._round_robin)
+        return self.ReplicaSessions[index]()
+
+    def mark_written(self):
+        """
+        Record that the current request's client just committed a write.
+
+        Its reads then stick to the primary for REPLICA_STICKY_SECONDS, in every
+        API worker, since the time travels in the client's cookie. Writes made
+        outside a request, e.g. by the render queue, are not tracked.
+        """
+        client = _client_writes.get()
+        if client is not None:
+            client.last_write = time.time()
+            client.wrote = True
+
+    async def bump_collection_version(self, table: str):
+        """
+        Increment a table's collection version in its own short transaction.
+
+        Called once the write has committed, so concurrent writers only contend on
+        the counter row for one statement; a failure is logged, and the version
+        catches up at the table's next write.
+
+        Args:
+            table: The table name.
+        """
+        try:
+            async with self.Session() as session:
+                await session.execute(
+                    pg_insert(collection_versions)
+                    .values(name=table, version=1)
+                    .on_conflict_do_update(
+                        index_elements=[collection_versions.c.name],
+                        set_={"version": collection_versions.c.version + 1},
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"Collection version of {table} could not be bumped: {e}")
+
+    def is_sticky(self) -> bool:
+        """
+        Tell whether the current request's reads must go to the primary.
+
+        Returns:
+            True if its client wrote within the last REPLICA_STICKY_SECONDS.
+        """
+        client = _client_writes.get()
+        return client is not None and client.sticky
+
+    def pool_stats(self) -> dict:
+        """
+        Report the connection pools' occupancy and checkout wait times.
+
+        Returns:
+            The statistics of the primary's InstrumentedPool, with those of each
+            replica under "replicas".
+        """
+        return {**self.engine.pool.stats(), "replicas": [replica.pool.stats() for replica in self.replicas]}
 
     async def close(self):
         await self.engine.dispose()
-        
\ No newline at end of file
+        for replica in self.replicas:
+            await replica.dispose()
@@ -0,0 +1,126 @@
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+
+class CacheBackendError(Exception):
+    """Raised when a cache backend cannot be reached or rejects a command."""
+
+class CacheBackendInterface(ABC):
+    """
+    Interface for key-value cache backends shared by the app's workers.
+
+    Implementations raise CacheBackendError when the backend is unavailable, so
+    callers can fall back to the database.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Read a key.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The stored bytes, or None if the key is absent or expired.
+        """
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float, only_if_absent: bool = False) -> bool:
+        """
+        Store a key with an expiry.
+
+        Args:
+            key: The cache key.
+            value: The bytes to store.
+            ttl: Seconds until the key expires.
+            only_if_absent: Store only if the key does not exist yet (SET NX), e.g. to take a lock.
+
+        Returns:
+            True if the key was stored, False if only_if_absent and it already existed.
+        """
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str):
+        """
+        Remove keys; missing keys are ignored.
+
+        Args:
+            keys: The cache keys.
+        """
+        pass
+
+    @abstractmethod
+    async def set_if_equal(
+        self, key: str, value: bytes, ttl: float, guard_key: str, guard_value: Optional[bytes]
+    ) -> bool:
+        """
+        Atomically store a key only while another key still holds an expected value.
+
+        Args:
+            key: The cache key.
+            value: The bytes to store.
+            ttl: Seconds until the key expires.
+            guard_key: The key compared, e.g. a generation counter.
+            guard_value: The value guard_key must hold; None if it must be absent.
+
+        Returns:
+            True if the key was stored, False if guard_key had changed.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_if_equal(self, key: str, value: bytes) -> bool:
+        """
+        Atomically remove a key only if it holds a value, e.g. to release a lock this worker took.
+
+        Args:
+            key: The cache key.
+            value: The value the key must hold.
+
+        Returns:
+            True if the key was removed.
+        """
+        pass
+
+    @abstractmethod
+    async def incr(self, key: str, ttl: float) -> int:
+        """
+        Atomically increment a counter, creating it at 1, and reset its expiry.
+
+        Args:
+            key: The counter's key.
+            ttl: Seconds until the counter expires.
+
+        Returns:
+            The new value.
+        """
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        """
+        Send a message to every worker subscribed to a channel, including this one.
+
+        Args:
+            channel: The channel name.
+            message: The message.
+        """
+        pass
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: Callable[[str], Awaitable[None]]):
+        """
+        Call a handler for every message published on a channel.
+
+        Args:
+            channel: The channel name.
+            handler: An async function taking the message.
+        """
+        pass
+
+    @abstractmethod
+    async def close(self):
+        """Release connections and stop listening to channels."""
+        pass
@@ -0,0 +1,67 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+from src.common.cache import TTLCache
+from src.db.interfaces.cache_backend import CacheBackendInterface
+from src.env import CACHE_MAX_ENTRIES
+
+class MemoryCacheBackend(CacheBackendInterface):
+    """
+    Cache backend living in the current process.
+
+    Stands in for Redis in development and single-worker deployments; nothing is
+    shared with other workers.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        """
+        Initialize the backend.
+
+        Args:
+            max_entries: Keys kept before the least recently used ones are evicted.
+        """
+        self.entries = TTLCache(max_entries=max_entries)
+        self.handlers: Dict[str, List[Callable[[str], Awaitable[None]]]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        _, value = self.entries.get(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float, only_if_absent: bool = False) -> bool:
+        if only_if_absent and self.entries.get(key)[0]:
+            return False
+        self.entries.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.entries.invalidate(key)
+
+    # Nothing awaits between reading and writing, so these are atomic within the event loop
+    async def set_if_equal(
+        self, key: str, value: bytes, ttl: float, guard_key: str, guard_value: Optional[bytes]
+    ) -> bool:
+        if self.entries.get(guard_key)[1] != guard_value:
+            return False
+        self.entries.set(key, value, ttl)
+        return True
+
+    async def delete_if_equal(self, key: str, value: bytes) -> bool:
+        if self.entries.get(key)[1] != value:
+            return False
+        self.entries.invalidate(key)
+        return True
+
+    async def incr(self, key: str, ttl: float) -> int:
+        counter = int(self.entries.get(key)[1] or 0) + 1
+        self.entries.set(key, str(counter).encode(), ttl)
+        return counter
+
+    async def publish(self, channel: str, message: str):
+        for handler in self.handlers.get(channel, []):
+            await handler(message)
+
+    async def subscribe(self, channel: str, handler: Callable[[str], Awaitable[None]]):
+        self.handlers.setdefault(channel, []).append(handler)
+
+    async def close(self):
+        self.entries.clear()
+        self.handlers = {}
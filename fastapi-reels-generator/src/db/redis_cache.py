@@ -0,0 +1,252 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from urllib.parse import unquote, urlparse
+from src.db.interfaces.cache_backend import CacheBackendError, CacheBackendInterface
+from src.env import CACHE_TIMEOUT
+
+# Lua scripts run atomically on the server; an absent guard key compares equal to ""
+SET_IF_EQUAL_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') == ARGV[3] then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+DELETE_IF_EQUAL_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+INCR_SCRIPT = """
+local value = redis.call('INCR', KEYS[1])
+redis.call('PEXPIRE', KEYS[1], ARGV[1])
+return value
+"""
+
+class RedisError(Exception):
+    """An error reply sent by the server."""
+
+class RedisCacheBackend(CacheBackendInterface):
+    """
+    Cache backend speaking the Redis protocol (RESP) over asyncio streams.
+
+    Commands are pipelined on one connection: replies arrive in the order the
+    commands were sent, so each is handed to the oldest waiting caller. Pub/sub
+    runs on a second connection, which reconnects on failure; messages published
+    while it is down are lost.
+    """
+
+    def __init__(self, url: str, timeout: float = CACHE_TIMEOUT):
+        """
+        Initialize the backend; connections are opened on first use.
+
+        Args:
+            url: Server address, e.g. redis://:password@localhost:6379/0.
+            timeout: Seconds to wait for a connection or a reply.
+        """
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.database = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.handlers: Dict[str, List[Callable[[str], Awaitable[None]]]] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Deque[asyncio.Future] = deque()
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._subscriber: Optional[asyncio.StreamWriter] = None
+        self._listener_task: Optional[asyncio.Task] = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float, only_if_absent: bool = False) -> bool:
+        args = ["SET", key, value, "PX", self._milliseconds(ttl)]
+        if only_if_absent:
+            args.append("NX")
+        return await self.execute(*args) is not None
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.execute("DEL", *keys)
+
+    async def set_if_equal(
+        self, key: str, value: bytes, ttl: float, guard_key: str, guard_value: Optional[bytes]
+    ) -> bool:
+        reply = await self.execute(
+            "EVAL", SET_IF_EQUAL_SCRIPT, 2, key, guard_key, value, self._milliseconds(ttl), guard_value or b""
+        )
+        return reply == 1
+
+    async def delete_if_equal(self, key: str, value: bytes) -> bool:
+        return await self.execute("EVAL", DELETE_IF_EQUAL_SCRIPT, 1, key, value) == 1
+
+    async def incr(self, key: str, ttl: float) -> int:
+        return await self.execute("EVAL", INCR_SCRIPT, 1, key, self._milliseconds(ttl))
+
+    async def publish(self, channel: str, message: str):
+        await self.execute("PUBLISH", channel, message)
+
+    async def subscribe(self, channel: str, handler: Callable[[str], Awaitable[None]]):
+        new_channel = channel not in self.handlers
+        self.handlers.setdefault(channel, []).append(handler)
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen())
+        elif new_channel and self._subscriber is not None:
+            self._subscriber.write(self._encode(["SUBSCRIBE", channel]))
+
+    async def close(self):
+        for task in (self._listener_task, self._reader_task):
+            if task is not None:
+                task.cancel()
+        for writer in (self._subscriber, self._writer):
+            if writer is not None:
+                writer.close()
+        self._listener_task = self._reader_task = None
+        self._subscriber = self._writer = None
+
+    async def execute(self, *args) -> Any:
+        """
+        Send one command and wait for its reply.
+
+        Args:
+            args: The command and its arguments, e.g. ("GET", "key").
+
+        Returns:
+            The decoded reply: bytes, str, int, list or None.
+
+        Raises:
+            CacheBackendError: If the server is unreachable, times out or replies with an error.
+        """
+        try:
+            await self._connect()
+            reply = await asyncio.wait_for(self._send(args), self.timeout)
+        except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            raise CacheBackendError(f"Redis {args[0]} failed: {e!r}") from e
+        if isinstance(reply, RedisError):
+            raise CacheBackendError(f"Redis {args[0]} failed: {reply}")
+        return reply
+
+    async def _connect(self):
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+            self._reader_task = asyncio.create_task(self._read_replies(reader))
+            handshake = []
+            if self.password:
+                handshake.append(self._send(["AUTH", self.password]))
+            if self.database:
+                handshake.append(self._send(["SELECT", self.database]))
+            for reply in await asyncio.wait_for(asyncio.gather(*handshake), self.timeout):
+                if isinstance(reply, RedisError):
+                    self._writer.close()
+                    self._writer = None
+                    raise CacheBackendError(f"Redis handshake failed: {reply}")
+
+    def _send(self, args) -> asyncio.Future:
+        # Queue the future and write in one step so replies stay in command order
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        self._writer.write(self._encode(args))
+        return future
+
+    async def _read_replies(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                reply = await self._read_reply(reader)
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(reply)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+            print(f"Redis connection lost: {e!r}")
+            if self._writer is not None:
+                self._writer.close()
+            self._writer = None
+            while self._pending:
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_exception(ConnectionError("Redis connection lost"))
+
+    async def _listen(self):
+        while True:
+            writer = None
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout
+                )
+                if self.password:
+                    writer.write(self._encode(["AUTH", self.password]))
+                    reply = await asyncio.wait_for(self._read_reply(reader), self.timeout)
+                    if isinstance(reply, RedisError):
+                        raise CacheBackendError(f"Redis subscriber handshake failed: {reply}")
+                writer.write(self._encode(["SUBSCRIBE", *self.handlers]))
+                self._subscriber = writer
+                while True:
+                    reply = await self._read_reply(reader)
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        await self._dispatch(reply[1].decode(), reply[2].decode())
+                    elif isinstance(reply, RedisError):
+                        print(f"Redis subscriber error: {reply}")
+            except asyncio.CancelledError:
+                raise
+            except CacheBackendError as e:
+                print(e)
+            except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                print(f"Redis subscriber disconnected: {e!r}")
+            finally:
+                self._subscriber = None
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(1)
+
+    async def _dispatch(self, channel: str, message: str):
+        for handler in self.handlers.get(channel, []):
+            try:
+                await handler(message)
+            except Exception as e:
+                print(f"Handler for {channel} failed: {e}")
+
+    @classmethod
+    async def _read_reply(cls, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await cls._read_reply(reader) for _ in range(length)]
+        raise ConnectionError(f"Unexpected Redis reply {line!r}")
+
+    @staticmethod
+    def _milliseconds(ttl: float) -> int:
+        return max(int(ttl * 1000), 1)
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode()
+            elif not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
@@ -1,25 +1,129 @@
 import uuid
-from typing import Type, TypeVar, List, Optional
+from datetime import datetime
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Sequence, Type, TypeVar, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from src.db.database import Database
+from sqlalchemy import delete, insert, select, tuple_, update
+from src.common.cache import LookupCache
+from src.common.pagination import decode_cursor, encode_cursor, to_naive_utc
+from src.db.database import Database, collection_versions
+from src.db.unit_of_work import UnitOfWork
+from src.env import BULK_INSERT_BATCH_SIZE, EXPORT_BATCH_SIZE
 from src.models.users.schema import User
 from src.models.reels.schema import Reel
 
 # Define a generic type for models
 T = TypeVar('T')
 
+# Tables whose list endpoints answer conditional requests from collection_version()
+VERSIONED_TABLES = {User.__tablename__, Reel.__tablename__}
+
 class Repository:
-    def __init__(self, model: Type[T], db: Database):
+    def __init__(
+        self, model: Type[T], db: Database, uow: Optional[UnitOfWork] = None, cache: Optional[LookupCache] = None
+    ):
         """
         Initialize the repository with a specific model and Database instance.
         
         Args:
             model: The SQLAlchemy model class (e.g., User, Reel).
             db: The Database instance for session management.
+            uow: The request's unit of work; without one every call runs in its own session.
+            cache: Cache of the model's records by ID, invalidated on every update and delete.
         """
         self.model = model
         self.db = db
+        self.uow = uow
+        self.cache = cache
+        self._snapshot: Optional[AsyncSession] = None
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Provide the session for one repository call.
+        
+        Yields:
+            The unit of work's session, or a new session closed afterwards.
+        """
+        if self.uow is not None:
+            yield self.uow.session
+        else:
+            async with await self.db.get_session() as session:
+                yield session
+
+    @asynccontextmanager
+    async def read_session(self, primary: bool = False) -> AsyncIterator[AsyncSession]:
+        """
+        Provide the session for one read-only repository call.
+        
+        Reads go to a read replica unless the unit of work has written something,
+        or its client wrote recently, in which case they stay on the primary.
+        
+        Args:
+            primary: Read from the primary regardless, e.g. to fill a cache shared by every client.
+        
+        Yields:
+            The unit of work's session, or a new primary or replica session closed afterwards.
+        """
+        if self._snapshot is not None:
+            yield self._snapshot
+        elif self.uow is not None and self.uow.dirty:
+            yield self.uow.session
+        elif primary or not self.db.replicas:
+            async with self.session() as session:
+                yield session
+        else:
+            async with await self.db.get_read_session() as session:
+                yield session
+
+    @asynccontextmanager
+    async def snapshot(self) -> AsyncIterator[None]:
+        """
+        Make the read-only calls inside the block share one session and snapshot.
+        
+        They all run on the same server, replica or primary, in one REPEATABLE READ
+        transaction (or in the unit of work's transaction, when reads use it), e.g.
+        so a page is never older than the collection version sent with it.
+        """
+        if self._snapshot is not None:
+            yield
+            return
+        async with self.read_session() as session:
+            if self.uow is None or session is not self.uow.session:
+                # A session of our own: start its transaction at the wanted isolation level
+                await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            self._snapshot = session
+            try:
+                yield
+            finally:
+                self._snapshot = None
+
+    async def commit(self, session: AsyncSession, changed: bool = True):
+        """
+        Persist the changes made in a session obtained from session().
+        
+        Inside a unit of work this only flushes; the owner of the unit of work commits.
+        Once the changes are committed, a versioned table's collection version is
+        bumped in a separate short transaction, so writers do not hold its lock.
+        
+        Args:
+            session: The session to commit or flush.
+            changed: Whether any rows were changed; if not, the version stays and
+                the client's reads are not pinned to the primary.
+        """
+        table = self.model.__tablename__
+        if self.uow is not None:
+            await session.flush()
+            if changed:
+                if table in VERSIONED_TABLES and table not in self.uow.written:
+                    self.uow.after_commit(lambda: self.db.bump_collection_version(table))
+                self.uow.mark_written(table)
+        else:
+            await session.commit()
+            if changed:
+                self.db.mark_written()
+                if table in VERSIONED_TABLES:
+                    await self.db.bump_collection_version(table)
 
     async def create(self, **attributes) -> T:
         """
@@ -31,27 +135,62 @@ class Repository:
         Returns:
             The created model instance.
         """
-        async with await self.db.get_session() as session:
+        async with self.session() as session:
             # Generate a UUID if 'id' is not provided in attributes
             if 'id' not in attributes:
                 attributes['id'] = uuid.uuid4()
             instance = self.model(**attributes)
             session.add(instance)
-            await session.commit()
-            await session.refresh(instance)
+            await self.commit(session)
+            if self.uow is None:
+                await session.refresh(instance)
             return instance
 
-    async def find_by_id(self, id: uuid.UUID) -> Optional[T]:
+    async def create_many(self, rows: List[dict], batch_size: int = BULK_INSERT_BATCH_SIZE) -> List[T]:
+        """
+        Create many records in one transaction, batching them into multi-row INSERT ... RETURNING statements.
+        
+        Args:
+            rows: One dictionary of attributes per record; a UUID is generated for rows without an 'id'.
+            batch_size: Number of rows sent per statement.
+        
+        Returns:
+            The created model instances, in the order of rows.
+        """
+        instances = []
+        async with self.session() as session:
+            for start in range(0, len(rows), batch_size):
+                batch = [{"id": uuid.uuid4(), **row} for row in rows[start:start + batch_size]]
+                result = await session.execute(
+                    insert(self.model).returning(self.model, sort_by_parameter_order=True),
+                    batch,
+                )
+                instances.extend(result.scalars().all())
+            if self.uow is None:
+                # Detach first so commit does not expire the values RETURNING just loaded
+                for instance in instances:
+                    session.expunge(instance)
+            await self.commit(session)
+            return instances
+
+    async def find_by_id(
+        self, id: uuid.UUID, columns: Optional[Sequence[Any]] = None, primary: bool = False
+    ) -> Optional[T]:
         """
         Find a record by its UUID.
         
         Args:
             id: The UUID of the record to find.
+            columns: Load only these columns and return a row instead of a model instance.
+            primary: Read from the primary even when replicas are configured.
         
         Returns:
-            The model instance if found, else None.
+            The model instance (or row) if found, else None.
         """
-        async with await self.db.get_session() as session:
+        async with self.read_session(primary) as session:
+            if columns:
+                result = await session.execute(select(*columns).filter(self.model.id == id))
+                return result.first()
             result = await session.execute(select(self.model).filter(self.model.id == id))
             return result.scalars().first()
 
@@ -66,7 +205,7 @@ class Repository:
             The model instance if found, else None.
         """
         print(data)
-        async with await self.db.get_session() as session:
+        async with self.read_session() as session:
             query = select(self.model)
             for key, value in data.items():
                 if hasattr(self.model, key):
@@ -83,13 +222,109 @@ class Repository:
         Returns:
             A list of all model instances.
         """
-        async with await self.db.get_session() as session:
+        async with self.read_session() as session:
             result = await session.execute(select(self.model))
             return result.scalars().all()
 
+    async def find_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[dict] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        columns: Optional[Sequence[Any]] = None,
+    ) -> Tuple[List[T], Optional[str]]:
+        """
+        Retrieve one page of records, newest first, using keyset pagination on (created_at, id).
+        
+        Args:
+            limit: Maximum number of records to return.
+            cursor: The next_cursor of the previous page, if any.
+            filters: Attribute names and values to filter by (e.g., {"user_id": ...}).
+            created_after: Only records created at or after this time.
+            created_before: Only records created before this time.
+            columns: Load only these columns, which must include id and created_at, as rows.
+        
+        Returns:
+            The records (or rows) and the cursor of the next page (None on the last page).
+        
+        Raises:
+            ValueError: If a filter attribute or the cursor is invalid.
+        """
+        query = self._filter(select(*columns) if columns else select(self.model), filters, created_after, created_before)
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            # Row-value comparison so Postgres can walk the (created_at, id) index
+            query = query.filter(tuple_(self.model.created_at, self.model.id) < tuple_(created_at, last_id))
+        # Fetch one extra row to know whether another page exists
+        query = query.order_by(self.model.created_at.desc(), self.model.id.desc()).limit(limit + 1)
+
+        async with self.read_session() as session:
+            result = await session.execute(query)
+            instances = result.all() if columns else result.scalars().all()
+        if len(instances) > limit:
+            last = instances[limit - 1]
+            return instances[:limit], encode_cursor(last.created_at, last.id)
+        return instances, None
+
+    async def collection_version(self) -> int:
+        """
+        Read the table's collection version, a counter bumped by every insert, update and delete.
+        
+        A single primary-key lookup, however large the table; the version covers
+        the whole table, so any write changes the ETag of every filtered view too.
+        
+        Returns:
+            The current version, 0 if the table was never written.
+        
+        Raises:
+            ValueError: If the table is not versioned.
+        """
+        table = self.model.__tablename__
+        if table not in VERSIONED_TABLES:
+            raise ValueError(f"{table} has no collection version")
+        async with self.read_session() as session:
+            version = await session.scalar(
+                select(collection_versions.c.version).filter(collection_versions.c.name == table)
+            )
+            return version or 0
+
+    async def stream(
+        self,
+        after_id: Optional[uuid.UUID] = None,
+        filters: Optional[dict] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+        columns: Optional[Sequence[Any]] = None,
+    ) -> AsyncIterator[T]:
+        """
+        Stream records in id order from a server-side cursor, batch_size rows at a time.
+        
+        Args:
+            after_id: Resume after the record with this id.
+            filters: Attribute names and values to filter by.
+            batch_size: Rows fetched from the cursor per round-trip.
+            columns: Load only these columns and yield rows instead of model instances.
+        
+        Yields:
+            Model instances (or rows), ordered by id.
+        
+        Raises:
+            ValueError: If a filter attribute is invalid.
+        """
+        query = self._filter(select(*columns) if columns else select(self.model), filters)
+        if after_id is not None:
+            query = query.filter(self.model.id > after_id)
+        query = query.order_by(self.model.id).execution_options(yield_per=batch_size)
+
+        async with await self.db.get_read_session() as session:
+            result = await (session.stream(query) if columns else session.stream_scalars(query))
+            async for instance in result:
+                yield instance
+
     async def update(self, id: uuid.UUID, **attributes) -> Optional[T]:
         """
-        Update a record by its UUID.
+        Update a record by its UUID with a single UPDATE ... RETURNING statement.
         
         Args:
             id: The UUID of the record to update.
@@ -98,20 +333,45 @@ class Repository:
         Returns:
             The updated model instance if found, else None.
         """
-        async with await self.db.get_session() as session:
-            result = await session.execute(select(self.model).filter(self.model.id == id))
-            instance = result.scalars().first()
-            if instance:
-                for key, value in attributes.items():
-                    setattr(instance, key, value)
-                await session.commit()
-                await session.refresh(instance)
-                return instance
-            return None
+        if not attributes:
+            return await self.find_by_id(id)
+        updated = await self.update_many([id], **attributes)
+        return updated[0] if updated else None
+
+    async def update_many(self, ids: List[uuid.UUID], **attributes) -> List[T]:
+        """
+        Update several records by UUID in one UPDATE ... RETURNING statement.
+        
+        Args:
+            ids: The UUIDs of the records to update.
+            **attributes: Attributes to set on every record.
+        
+        Returns:
+            The updated model instances; ids that were not found are left out.
+        """
+        if not ids:
+            return []
+        async with self.session() as session:
+            result = await session.execute(
+                update(self.model)
+                .filter(self.model.id.in_(ids))
+                .values(**attributes)
+                .returning(self.model)
+                # Refresh instances the session already holds with the returned row
+                .execution_options(populate_existing=True)
+            )
+            instances = result.scalars().all()
+            if self.uow is None:
+                # Detach first so commit does not expire the values RETURNING just loaded
+                for instance in instances:
+                    session.expunge(instance)
+            await self.commit(session, changed=bool(instances))
+        await self._invalidate([instance.id for instance in instances])
+        return instances
 
     async def delete(self, id: uuid.UUID) -> bool:
         """
-        Delete a record by its UUID.
+        Delete a record by its UUID with a single DELETE ... RETURNING statement.
         
         Args:
             id: The UUID of the record to delete.
@@ -119,11 +379,57 @@ class Repository:
         Returns:
             True if the record was deleted, False if not found.
         """
-        async with await self.db.get_session() as session:
-            result = await session.execute(select(self.model).filter(self.model.id == id))
-            instance = result.scalars().first()
-            if instance:
-                await session.delete(instance)
-                await session.commit()
-                return True
-            return False
\ No newline at end of file
+        return len(await self.delete_many([id])) > 0
+
+    async def delete_many(self, ids: List[uuid.UUID]) -> List[uuid.UUID]:
+        """
+        Delete several records by UUID in one DELETE ... RETURNING statement.
+        
+        Args:
+            ids: The UUIDs of the records to delete.
+        
+        Returns:
+            The UUIDs that were actually deleted.
+        """
+        if not ids:
+            return []
+        async with self.session() as session:
+            result = await session.execute(
+                delete(self.model).filter(self.model.id.in_(ids)).returning(self.model.id)
+            )
+            deleted = result.scalars().all()
+            await self.commit(session, changed=bool(deleted))
+        await self._invalidate(deleted)
+        return deleted
+
+    def _filter(
+        self,
+        query,
+        filters: Optional[dict] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ):
+        for key, value in (filters or {}).items():
+            if hasattr(self.model, key):
+                query = query.filter(getattr(self.model, key) == value)
+            else:
+                raise ValueError(f"Invalid attribute {key} for model {self.model.__name__}")
+        if created_after is not None:
+            query = query.filter(self.model.created_at >= to_naive_utc(created_after))
+        if created_before is not None:
+            query = query.filter(self.model.created_at < to_naive_utc(created_before))
+        return query
+
+    async def _invalidate(self, ids: List[uuid.UUID]):
+        if self.cache is None or not ids:
+            return
+
+        async def invalidate():
+            for id in ids:
+                await self.cache.invalidate(id)
+
+        # Inside a unit of work other workers would cache the old row again until it commits
+        if self.uow is not None:
+            self.uow.after_commit(invalidate)
+        else:
+            await invalidate()
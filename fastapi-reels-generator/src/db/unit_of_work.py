@@ -0,0 +1,79 @@
+from typing import Awaitable, Callable, List, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.database import Database
+
+class UnitOfWork:
+    """
+    One session and one transaction shared by every repository call of a request.
+
+    Repositories that take part only flush; nothing is persisted until commit()
+    is called, and anything left uncommitted is rolled back when the unit of
+    work closes.
+    """
+
+    def __init__(self, db: Database):
+        """
+        Initialize the unit of work.
+
+        Args:
+            db: The Database instance providing the session.
+        """
+        self.db = db
+        self.session: Optional[AsyncSession] = None
+        self._after_commit: List[Callable[[], Awaitable[None]]] = []
+        # Tables written in this unit of work; while any are, reads stay on the primary
+        self.written: Set[str] = set()
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the unit of work has written anything since its last commit or rollback."""
+        return bool(self.written)
+
+    async def __aenter__(self) -> "UnitOfWork":
+        # Objects stay readable after commit, so responses can be built from them
+        self.session = self.db.Session(expire_on_commit=False)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if self.session.in_transaction():
+                await self.session.rollback()
+        finally:
+            await self.session.close()
+            self._after_commit = []
+            self.written = set()
+
+    async def commit(self):
+        """Commit the transaction, then run the callbacks registered with after_commit."""
+        await self.session.commit()
+        if self.written:
+            self.db.mark_written()
+        self.written = set()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            await callback()
+
+    async def rollback(self):
+        """Discard everything done since the last commit."""
+        await self.session.rollback()
+        self._after_commit = []
+        self.written = set()
+
+    def mark_written(self, table: str):
+        """
+        Record that a table was written in this unit of work.
+
+        Args:
+            table: The table name.
+        """
+        self.written.add(table)
+
+    def after_commit(self, callback: Callable[[], Awaitable[None]]):
+        """
+        Run a callback once the transaction commits, e.g. to delete files a
+        deleted row pointed to. Dropped if the transaction is rolled back.
+
+        Args:
+            callback: An async function taking no arguments.
+        """
+        self._after_commit.append(callback)
@@ -1,27 +1,85 @@
+from typing import AsyncIterator
 from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 from src.db.database import Database
+from src.db.unit_of_work import UnitOfWork
 from src.auth.service import AuthService
 from src.models.reels.service import ReelService
 from src.models.users.service import UserService
+from src.models.jobs.service import JobService
+from src.models.assets.service import AssetService
+from src.render.queue import PreviewPool, RenderQueue
+from src.common.upload_spooler import UploadSpooler
+from src.db.interfaces.cache_backend import CacheBackendInterface
+from src.db.memory_cache import MemoryCacheBackend
+from src.db.redis_cache import RedisCacheBackend
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+def create_cache_backend(url: str) -> CacheBackendInterface:
+    """
+    Build the cache backend selected by CACHE_URL.
+
+    Args:
+        url: "memory://" for a per-process cache, or a redis:// URL to share it between workers.
+
+    Returns:
+        The cache backend.
+    """
+    if url.startswith("memory://"):
+        return MemoryCacheBackend()
+    if url.startswith("redis://"):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unsupported cache URL {url}")
+
 async def get_database(request: Request) -> Database:
     """Provide the Database instance from app state."""
     return request.app.state.db
 
-async def get_auth_service(db: Database = Depends(get_database)) -> AuthService:
-    """Dependency to provide ReelService with initialized Database."""
-    return AuthService(UserService(db))
+async def get_unit_of_work(db: Database = Depends(get_database)) -> AsyncIterator[UnitOfWork]:
+    """Provide one session and transaction for the whole request; uncommitted work is rolled back."""
+    async with UnitOfWork(db) as uow:
+        yield uow
+
+async def get_render_queue(request: Request) -> RenderQueue:
+    """Provide the RenderQueue instance from app state."""
+    return request.app.state.render_queue
+
+async def get_preview_pool(request: Request) -> PreviewPool:
+    """Provide the PreviewPool instance from app state."""
+    return request.app.state.preview_pool
+
+async def get_auth_service(
+    request: Request, db: Database = Depends(get_database), uow: UnitOfWork = Depends(get_unit_of_work)
+) -> AuthService:
+    """Dependency to provide AuthService bound to the request's unit of work."""
+    return AuthService(UserService(db, uow, request.app.state.user_cache))
+
+async def get_reel_service(
+    request: Request, db: Database = Depends(get_database), uow: UnitOfWork = Depends(get_unit_of_work)
+) -> ReelService:
+    """Provide ReelService bound to the request's unit of work and the shared reel cache."""
+    return ReelService(db, uow, request.app.state.reel_cache)
 
-async def get_reel_service(db: Database = Depends(get_database)) -> ReelService:
-    """Provide ReelService with initialized Database."""
-    return ReelService(db)
+async def get_user_service(
+    request: Request, db: Database = Depends(get_database), uow: UnitOfWork = Depends(get_unit_of_work)
+) -> UserService:
+    """Provide UserService bound to the request's unit of work and the shared user cache."""
+    return UserService(db, uow, request.app.state.user_cache)
 
-async def get_user_service(db: Database = Depends(get_database)) -> UserService:
-    """Provide UserService with initialized Database."""
-    return UserService(db)
+async def get_job_service(
+    db: Database = Depends(get_database), uow: UnitOfWork = Depends(get_unit_of_work)
+) -> JobService:
+    """Provide JobService bound to the request's unit of work."""
+    return JobService(db, uow)
 
+async def get_upload_spooler() -> UploadSpooler:
+    """Provide a fresh UploadSpooler so size limits apply per request."""
+    return UploadSpooler()
 
+async def get_asset_service(
+    db: Database = Depends(get_database), uow: UnitOfWork = Depends(get_unit_of_work)
+) -> AssetService:
+    """Provide AssetService bound to the request's unit of work."""
+    return AssetService(db, uow)
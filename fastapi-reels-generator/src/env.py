@@ -22,4 +22,59 @@ GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
 
 DB_CONNECTION = os.getenv("DB_CONNECTION")
-UPLOAD_DIR = os.getenv("UPLOAD_DIR")
\ No newline at end of file
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 500))
+DB_REPLICAS = [dsn.strip() for dsn in os.getenv("DB_REPLICAS", "").split(",") if dsn.strip()]
+DB_REPLICA_BALANCING = os.getenv("DB_REPLICA_BALANCING", "round_robin")
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_STICKY_COOKIE = os.getenv("REPLICA_STICKY_COOKIE", "last_write")
+UPLOAD_DIR = os.getenv("UPLOAD_DIR")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+MAX_UPLOAD_FILE_SIZE = int(os.getenv("MAX_UPLOAD_FILE_SIZE", 250 * 1024 * 1024))
+MAX_UPLOAD_REQUEST_SIZE = int(os.getenv("MAX_UPLOAD_REQUEST_SIZE", 300 * 1024 * 1024))
+
+# Render processes per API process; every uvicorn worker starts its own, so keep it small,
+# or set 0 and run the renders in one dedicated process (python -m src.render.serve)
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", 1))
+# Seconds an idle render worker waits before looking for jobs submitted to other processes
+RENDER_POLL_SECONDS = float(os.getenv("RENDER_POLL_SECONDS", 2))
+# A running job whose render has not finished after this long is assumed lost and rendered again
+RENDER_JOB_LEASE_SECONDS = float(os.getenv("RENDER_JOB_LEASE_SECONDS", 3600))
+RENDER_SEGMENT_WORKERS = int(os.getenv("RENDER_SEGMENT_WORKERS", 1))
+RENDER_MIN_SEGMENT_SECONDS = float(os.getenv("RENDER_MIN_SEGMENT_SECONDS", 10))
+RENDER_PIPELINE_DEPTH = int(os.getenv("RENDER_PIPELINE_DEPTH", 4))
+OVERLAY_CACHE_DIR = os.getenv("OVERLAY_CACHE_DIR")
+OVERLAY_CACHE_MAX_BYTES = int(os.getenv("OVERLAY_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+OVERLAY_CACHE_MAX_ENTRIES = int(os.getenv("OVERLAY_CACHE_MAX_ENTRIES", 64))
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR")
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", 10 * 1024 * 1024 * 1024))
+DEFAULT_ENCODER_PROFILE = os.getenv("DEFAULT_ENCODER_PROFILE", "balanced")
+ENCODER_PROFILES_JSON = os.getenv("ENCODER_PROFILES")
+# Niced preview processes per API process, like RENDER_WORKERS
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", 1))
+PREVIEW_NICE = int(os.getenv("PREVIEW_NICE", 10))
+PREVIEW_HEIGHT = int(os.getenv("PREVIEW_HEIGHT", 480))
+PREVIEW_FPS = float(os.getenv("PREVIEW_FPS", 15))
+PREVIEW_MAX_SECONDS = float(os.getenv("PREVIEW_MAX_SECONDS", 5))
+# Unused assets are deleted once they have not been uploaded again for this long
+ASSET_GRACE_SECONDS = float(os.getenv("ASSET_GRACE_SECONDS", 3600))
+ASSET_GC_INTERVAL_SECONDS = float(os.getenv("ASSET_GC_INTERVAL_SECONDS", 600))
+MAX_OVERLAY_IMAGES = int(os.getenv("MAX_OVERLAY_IMAGES", 16))
+
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 200))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+CACHE_TTL = float(os.getenv("CACHE_TTL", 300))
+CACHE_NEGATIVE_TTL = float(os.getenv("CACHE_NEGATIVE_TTL", 30))
+CACHE_URL = os.getenv("CACHE_URL", "memory://")
+CACHE_LOCAL_TTL = float(os.getenv("CACHE_LOCAL_TTL", 5))
+CACHE_LOCK_TTL = float(os.getenv("CACHE_LOCK_TTL", 5))
+CACHE_TIMEOUT = float(os.getenv("CACHE_TIMEOUT", 1))
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", 1000))
+MAX_BULK_CREATE_SIZE = int(os.getenv("MAX_BULK_CREATE_SIZE", 10000))
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+
+from src.db.database import Database
+from src.dependencies import get_database
+from src.auth.guards.api_key import APIKeyGuard
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(APIKeyGuard())])
+
+@router.get("/pool")
+async def pool_stats(db: Database = Depends(get_database)):
+    """Report database connection pool occupancy, checkout wait times and timeouts."""
+    return db.pool_stats()
+
+@router.get("/cache")
+async def cache_stats(request: Request):
+    """Report hits, misses and size of the reel and user lookup caches and of the render output cache."""
+    output_cache = request.app.state.render_queue.output_cache
+    return {
+        "reels": request.app.state.reel_cache.stats(),
+        "users": request.app.state.user_cache.stats(),
+        "renders": await run_in_threadpool(output_cache.stats) if output_cache is not None else None,
+    }
@@ -7,9 +7,17 @@ from dotenv import load_dotenv
 from src.auth import controller as auth_controller
 from src.models.users import controller as users_controller
 from src.models.reels import controller as reels_controller
-from src.db.database import Database
-from src.env import CLIENT, UPLOAD_DIR, SESSION_SECRET_KEY
+from src.internal import controller as internal_controller
+from src.models.assets.service import collect_assets_periodically
+from src.db.database import Database, track_client_writes
+from src.render.output_cache import create_output_cache
+from src.render.queue import PreviewPool, RenderQueue
+from src.common.cache import LookupCache
+from src.dependencies import create_cache_backend
+from src.env import CACHE_URL, CLIENT, REPLICA_STICKY_COOKIE, REPLICA_STICKY_SECONDS, UPLOAD_DIR, SESSION_SECRET_KEY
 
+import asyncio
+import math
 import os
 
 load_dotenv()
@@ -21,8 +29,27 @@ async def lifespan(app: FastAPI):
     app.state.db = Database()
     os.makedirs(UPLOAD_DIR, exist_ok=True)
     await app.state.db.init_db()
+    # Detail lookups are cached in a backend shared by every worker
+    app.state.cache_backend = create_cache_backend(CACHE_URL)
+    app.state.reel_cache = LookupCache(app.state.cache_backend, "reels")
+    app.state.user_cache = LookupCache(app.state.cache_backend, "users")
+    await app.state.reel_cache.start()
+    await app.state.user_cache.start()
+    # Start the render workers once the tables exist
+    # Identical renders are served from the output cache instead of rendered again
+    app.state.render_queue = RenderQueue(app.state.db, output_cache=create_output_cache())
+    await app.state.render_queue.start()
+    # Previews run on their own low-priority processes, outside the job queue
+    app.state.preview_pool = PreviewPool()
+    await app.state.preview_pool.start()
+    # Uploads that never ended up in a reel are deleted after a grace period
+    asset_collector = asyncio.create_task(collect_assets_periodically(app.state.db))
     yield
-    # Shutdown: Close database connections
+    # Shutdown: Stop render workers, then close database connections
+    asset_collector.cancel()
+    await app.state.preview_pool.close()
+    await app.state.render_queue.close()
+    await app.state.cache_backend.close()
     await app.state.db.close()
     CORSMiddleware
 origins = [
@@ -41,11 +68,29 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    # A client that just wrote reads from the primary until replicas have caught up,
+    # whichever worker serves it next
+    client = track_client_writes(request.cookies.get(REPLICA_STICKY_COOKIE))
+    response = await call_next(request)
+    if client.wrote:
+        response.set_cookie(
+            REPLICA_STICKY_COOKIE,
+            f"{client.last_write:.3f}",
+            max_age=math.ceil(REPLICA_STICKY_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
 # app.exception_handler(RequestValidationError)(custom_validation_exception_handler)
 # Include routers
 app.include_router(auth_controller.router)
 app.include_router(users_controller.router)
 app.include_router(reels_controller.router)
+app.include_router(internal_controller.router)
 
 @app.get("/")
 def read_root():
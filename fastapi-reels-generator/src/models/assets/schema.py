@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, String, Table
+from sqlalchemy.dialects.postgresql import UUID
+from src.db.database import Base
+from datetime import datetime
+
+class MediaAsset(Base):
+    """An uploaded file stored once per distinct content."""
+    __tablename__ = 'media_assets'
+    sha256 = Column(String(64), nullable=False, unique=True, index=True)
+    path = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Refreshed by every upload of the content; unused assets are kept for a grace period after it
+    stored_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+# Which reels use which assets; ref_count mirrors the number of rows per asset
+reel_assets = Table(
+    'reel_assets',
+    Base.metadata,
+    Column('reel_id', UUID(as_uuid=True), ForeignKey('reels.id', ondelete='CASCADE'), primary_key=True),
+    Column('asset_id', UUID(as_uuid=True), ForeignKey('media_assets.id'), primary_key=True, index=True),
+)
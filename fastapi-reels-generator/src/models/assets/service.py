@@ -0,0 +1,257 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from fastapi import UploadFile
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+from src.common.upload_spooler import UploadSpooler
+from src.db.database import Database
+from src.db.repository import Repository
+from src.db.unit_of_work import UnitOfWork
+from src.models.assets.schema import MediaAsset, reel_assets
+from src.models.jobs.schema import JobStatus, RenderJob
+from src.env import ASSET_GC_INTERVAL_SECONDS, ASSET_GRACE_SECONDS, UPLOAD_DIR
+
+class AssetService:
+    def __init__(self, db: Database, uow: Optional[UnitOfWork] = None):
+        """
+        Initialize the AssetService with a Database instance.
+
+        Args:
+            db: The Database instance for session management.
+            uow: The request's unit of work, if the service runs inside one.
+        """
+        self.repository = Repository(MediaAsset, db, uow)
+        self.store_dir = os.path.join(UPLOAD_DIR, "assets")
+
+    async def find_by_hash(self, sha256: str) -> Optional[MediaAsset]:
+        """
+        Retrieve an asset by the SHA-256 of its content.
+
+        Args:
+            sha256: Hex digest of the content.
+
+        Returns:
+            The MediaAsset if found, else None.
+        """
+        return await self.repository.find_one({"sha256": sha256})
+
+    async def store(self, upload: UploadFile, spooler: UploadSpooler) -> MediaAsset:
+        """
+        Store an upload under its content hash, dropping the copy if the content is already stored.
+
+        The asset is not referenced by any reel yet; it is kept for ASSET_GRACE_SECONDS
+        so the request can queue a job using it, and deleted by collect_unused after that
+        if nothing does.
+
+        Args:
+            upload: The uploaded file.
+            spooler: The request's spooler, which enforces the size limits.
+
+        Returns:
+            The MediaAsset holding the content.
+        """
+        # Hashed while it is spooled, so the upload is read once whether or not it is new
+        spooled = await spooler.spool(upload)
+        asset = await self.find_by_hash(spooled.sha256)
+        if asset is not None and await run_in_threadpool(os.path.exists, asset.path):
+            # Restart the grace period; None means a sweep deleted it meanwhile, so store it again
+            asset = await self._touch(asset.id)
+            if asset is not None:
+                print(f"Asset {spooled.sha256} already stored at {asset.path}")
+                await spooler.discard(spooled)
+                return asset
+
+        path = self._path_for(spooled.sha256, spooled.filename)
+        await run_in_threadpool(self._move, spooled.path, path)
+        spooler.keep(spooled)
+
+        async with self.repository.session() as session:
+            # Concurrent uploads of the same bytes land on the same row
+            result = await session.execute(
+                insert(MediaAsset)
+                .values(
+                    id=uuid.uuid4(), sha256=spooled.sha256, path=path, size=spooled.size, ref_count=0,
+                    stored_at=datetime.utcnow(),
+                )
+                .on_conflict_do_update(
+                    index_elements=[MediaAsset.sha256], set_={"path": path, "stored_at": datetime.utcnow()}
+                )
+                .returning(MediaAsset)
+            )
+            asset = result.scalars().one()
+            await self.repository.commit(session)
+            if self.repository.uow is None:
+                await session.refresh(asset)
+            return asset
+
+    async def acquire(self, reel_id: uuid.UUID, paths: List[str]):
+        """
+        Record that a reel uses the assets stored at the given paths.
+
+        Args:
+            reel_id: The ID of the reel.
+            paths: Asset paths; paths that are not assets are ignored.
+        """
+        async with self.repository.session() as session:
+            result = await session.execute(select(MediaAsset.id).filter(MediaAsset.path.in_(set(paths))))
+            asset_ids = result.scalars().all()
+            if not asset_ids:
+                return
+            result = await session.execute(
+                insert(reel_assets)
+                .values([{"reel_id": reel_id, "asset_id": asset_id} for asset_id in asset_ids])
+                .on_conflict_do_nothing()
+                .returning(reel_assets.c.asset_id)
+            )
+            linked = result.scalars().all()
+            if linked:
+                await session.execute(
+                    update(MediaAsset)
+                    .filter(MediaAsset.id.in_(linked))
+                    .values(ref_count=MediaAsset.ref_count + 1)
+                )
+            await self.repository.commit(session)
+
+    async def release(self, reel_id: uuid.UUID):
+        """
+        Drop a reel's asset references and delete assets nothing uses anymore.
+
+        Assets uploaded again within ASSET_GRACE_SECONDS are kept, since the request
+        that uploaded them may be about to use them; collect_unused deletes them later.
+
+        Args:
+            reel_id: The ID of the reel being deleted.
+        """
+        async with self.repository.session() as session:
+            result = await session.execute(
+                delete(reel_assets).filter(reel_assets.c.reel_id == reel_id).returning(reel_assets.c.asset_id)
+            )
+            released = result.scalars().all()
+            if not released:
+                return
+            result = await session.execute(
+                update(MediaAsset)
+                .filter(MediaAsset.id.in_(released))
+                .values(ref_count=MediaAsset.ref_count - 1)
+                .returning(MediaAsset.id, MediaAsset.path, MediaAsset.ref_count)
+            )
+            unused = {row.path: row.id for row in result if row.ref_count <= 0}
+            removed = await self._delete_unused(session, unused, ASSET_GRACE_SECONDS)
+            await self.repository.commit(session)
+        await self._remove_files(removed)
+
+    async def collect_unused(self, grace: float = ASSET_GRACE_SECONDS) -> int:
+        """
+        Delete assets no reel or pending job uses and that were last uploaded before the grace period.
+
+        Catches uploads whose job failed or was never queued, and assets release kept
+        because they had just been uploaded again.
+
+        Args:
+            grace: Seconds an unused asset is kept after it was last uploaded.
+
+        Returns:
+            The number of assets deleted.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=grace)
+        async with self.repository.session() as session:
+            result = await session.execute(
+                select(MediaAsset.path, MediaAsset.id).filter(MediaAsset.ref_count <= 0, MediaAsset.stored_at < cutoff)
+            )
+            unused = {row.path: row.id for row in result}
+            removed = await self._delete_unused(session, unused, grace)
+            await self.repository.commit(session)
+        await self._remove_files(removed)
+        return len(removed)
+
+    async def _touch(self, asset_id: uuid.UUID) -> Optional[MediaAsset]:
+        async with self.repository.session() as session:
+            result = await session.execute(
+                update(MediaAsset)
+                .filter(MediaAsset.id == asset_id)
+                .values(stored_at=datetime.utcnow())
+                .returning(MediaAsset)
+            )
+            asset = result.scalars().one_or_none()
+            await self.repository.commit(session)
+            if asset is not None and self.repository.uow is None:
+                await session.refresh(asset)
+            return asset
+
+    async def _delete_unused(self, session, unused: Dict[str, uuid.UUID], grace: float) -> List[str]:
+        if unused:
+            # Jobs that have not rendered yet still need their inputs
+            paths = list(unused)
+            result = await session.execute(
+                select(RenderJob.video, RenderJob.audio, RenderJob.images).filter(
+                    RenderJob.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value]),
+                    or_(RenderJob.video.in_(paths), RenderJob.audio.in_(paths), RenderJob.images.overlap(paths)),
+                )
+            )
+            for video, audio, images in result:
+                for path in [video, audio, *images]:
+                    unused.pop(path, None)
+        if not unused:
+            return []
+        # Checked again in the DELETE, so an asset acquired or uploaded meanwhile is kept
+        cutoff = datetime.utcnow() - timedelta(seconds=grace)
+        result = await session.execute(
+            delete(MediaAsset)
+            .filter(
+                MediaAsset.id.in_(list(unused.values())),
+                MediaAsset.ref_count <= 0,
+                MediaAsset.stored_at < cutoff,
+            )
+            .returning(MediaAsset.path)
+        )
+        return result.scalars().all()
+
+    async def _remove_files(self, paths: List[str]):
+        async def remove_files():
+            for path in paths:
+                await run_in_threadpool(self._remove, path)
+
+        # Files go only once the rows are gone for good
+        if self.repository.uow is not None:
+            self.repository.uow.after_commit(remove_files)
+        else:
+            await remove_files()
+
+    def _path_for(self, sha256: str, filename: str) -> str:
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(self.store_dir, sha256[:2], f"{sha256}{extension}")
+
+    @staticmethod
+    def _move(source: str, destination: str):
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        os.replace(source, destination)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def collect_assets_periodically(db: Database, interval: float = ASSET_GC_INTERVAL_SECONDS):
+    """
+    Run AssetService.collect_unused every interval until cancelled.
+
+    Args:
+        db: The Database instance.
+        interval: Seconds between sweeps.
+    """
+    service = AssetService(db)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await service.collect_unused()
+            if removed:
+                print(f"Deleted {removed} unused assets")
+        except Exception as e:
+            print(f"Collecting unused assets failed: {e}")
@@ -0,0 +1,5 @@
+from fastapi import HTTPException, status
+
+class JobNotFoundException(HTTPException):
+    def __init__(self, msg = "Job not found."):
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=msg)
@@ -0,0 +1,64 @@
+import uuid
+from enum import Enum
+from typing import List, Optional, Tuple
+from pydantic import BaseModel
+from sqlalchemy import JSON, String, ForeignKey, DateTime, Column, Float, Text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID
+from src.db.database import Base
+from datetime import datetime
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class JobResponse(BaseModel):
+    id: uuid.UUID
+    status: JobStatus
+    title: str
+    user_id: uuid.UUID
+    reel_id: Optional[uuid.UUID] = None
+    error: Optional[str] = None
+    created_at: datetime = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class RenderJob(Base):
+    __tablename__ = 'render_jobs'
+    title = Column(String, nullable=False)
+    user_id = Column(
+        UUID(as_uuid=True), ForeignKey('users.id'), nullable=False, index=True
+    )
+    status = Column(String, nullable=False, default=JobStatus.QUEUED.value, index=True)
+    video = Column(String, nullable=False)
+    audio = Column(String, nullable=False)
+    images = Column(ARRAY(String), nullable=False, default=list)
+    image_scale = Column(Float, nullable=False, default=0.5)
+    layout = Column(String, nullable=False, default="auto")
+    anchors = Column(JSON, nullable=True)
+    encoder_profile = Column(String, nullable=True)
+    # Hash of the inputs' content and the render parameters; equal keys render equal files
+    cache_key = Column(String(64), nullable=True, index=True)
+    output = Column(String, nullable=False)
+    reel_id = Column(UUID(as_uuid=True), ForeignKey('reels.id', ondelete='SET NULL'), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+class JobCreateModel(BaseModel):
+    title: str
+    user_id: uuid.UUID
+    video: str
+    audio: str
+    images: List[str]
+    image_scale: float = 0.5
+    layout: str = "auto"
+    anchors: Optional[List[Tuple[float, float]]] = None
+    encoder_profile: Optional[str] = None
+    cache_key: Optional[str] = None
@@ -0,0 +1,195 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import and_, or_, select, update
+from src.db.database import Database
+from src.db.repository import Repository
+from src.db.unit_of_work import UnitOfWork
+from src.models.jobs.schema import JobCreateModel, JobStatus, RenderJob
+from src.env import RENDER_JOB_LEASE_SECONDS, UPLOAD_DIR
+
+class JobService:
+    def __init__(self, db: Database, uow: Optional[UnitOfWork] = None):
+        """
+        Initialize the JobService with a Database instance.
+
+        Args:
+            db: The Database instance for session management.
+            uow: The request's unit of work, if the service runs inside one.
+        """
+        self.repository = Repository(RenderJob, db, uow)
+
+    async def create(self, job_data: JobCreateModel) -> RenderJob:
+        """
+        Create a queued render job.
+
+        Args:
+            job_data: The inputs of the render.
+
+        Returns:
+            The created RenderJob.
+        """
+        job_id = uuid.uuid4()
+        return await self.repository.create(
+            id=job_id,
+            output=os.path.join(UPLOAD_DIR, f"{job_id}.mp4"),
+            status=JobStatus.QUEUED.value,
+            **job_data.dict(),
+        )
+
+    async def find_by_id(self, job_id: uuid.UUID) -> Optional[RenderJob]:
+        """
+        Retrieve a job by its ID.
+
+        Args:
+            job_id: The ID of the job to retrieve.
+
+        Returns:
+            The RenderJob if found, else None.
+        """
+        return await self.repository.find_by_id(job_id)
+
+    async def find_reusable(self, user_id: uuid.UUID, cache_key: str) -> Optional[RenderJob]:
+        """
+        Retrieve a user's latest job with the same inputs that is pending or produced a reel.
+
+        Args:
+            user_id: The ID of the user submitting the render.
+            cache_key: The render's cache key.
+
+        Returns:
+            The newest matching RenderJob if found, else None.
+        """
+        async with self.repository.session() as session:
+            result = await session.execute(
+                select(RenderJob)
+                .filter(
+                    RenderJob.user_id == user_id,
+                    RenderJob.cache_key == cache_key,
+                    or_(
+                        RenderJob.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value]),
+                        and_(RenderJob.status == JobStatus.SUCCEEDED.value, RenderJob.reel_id.is_not(None)),
+                    ),
+                )
+                .order_by(RenderJob.created_at.desc())
+                .limit(1)
+            )
+            return result.scalars().first()
+
+    async def find_unfinished(self) -> List[RenderJob]:
+        """
+        Retrieve jobs waiting for a render worker, oldest first.
+
+        Running jobs only count once their lease has expired, i.e. the worker
+        rendering them is presumed dead.
+
+        Returns:
+            A list of RenderJob objects.
+        """
+        async with self.repository.session() as session:
+            result = await session.execute(
+                select(RenderJob).filter(self._claimable()).order_by(RenderJob.created_at)
+            )
+            return result.scalars().all()
+
+    async def claim(self, job_id: uuid.UUID) -> Optional[RenderJob]:
+        """
+        Atomically mark a job as picked up by a render worker.
+
+        Only one worker, in any process, can claim a job: the update only matches
+        queued jobs and running jobs whose lease has expired.
+
+        Args:
+            job_id: The ID of the job.
+
+        Returns:
+            The claimed RenderJob, or None if it does not exist or another worker has it.
+        """
+        return await self._claim(RenderJob.id == job_id, self._claimable())
+
+    async def claim_next(self) -> Optional[RenderJob]:
+        """
+        Atomically claim the oldest job waiting for a render worker.
+
+        Every render process polls with this, so jobs submitted to any API worker,
+        or left behind by a crashed one, are picked up by whichever is free.
+        Rows another worker is claiming are skipped rather than waited for.
+
+        Returns:
+            The claimed RenderJob, or None if no job is waiting.
+        """
+        oldest = (
+            select(RenderJob.id)
+            .filter(self._claimable())
+            .order_by(RenderJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        return await self._claim(RenderJob.id == oldest)
+
+    async def _claim(self, *conditions) -> Optional[RenderJob]:
+        async with self.repository.session() as session:
+            result = await session.execute(
+                update(RenderJob)
+                .filter(*conditions)
+                .values(status=JobStatus.RUNNING.value, started_at=datetime.utcnow())
+                .returning(RenderJob)
+                .execution_options(populate_existing=True)
+            )
+            job = result.scalars().first()
+            if job is not None and self.repository.uow is None:
+                session.expunge(job)
+            await self.repository.commit(session, changed=job is not None)
+            return job
+
+    async def unclaim(self, job_id: uuid.UUID) -> Optional[RenderJob]:
+        """
+        Put a claimed job back in the queued state.
+
+        Args:
+            job_id: The ID of the job.
+
+        Returns:
+            The updated RenderJob if found, else None.
+        """
+        return await self.repository.update(job_id, status=JobStatus.QUEUED.value, started_at=None)
+
+    @staticmethod
+    def _claimable():
+        lease_expired = datetime.utcnow() - timedelta(seconds=RENDER_JOB_LEASE_SECONDS)
+        return or_(
+            RenderJob.status == JobStatus.QUEUED.value,
+            and_(RenderJob.status == JobStatus.RUNNING.value, RenderJob.started_at < lease_expired),
+        )
+
+    async def mark_succeeded(self, job_id: uuid.UUID, reel_id: uuid.UUID) -> Optional[RenderJob]:
+        """
+        Mark a job as finished and link the reel it produced.
+
+        Args:
+            job_id: The ID of the job.
+            reel_id: The ID of the created reel.
+
+        Returns:
+            The updated RenderJob if found, else None.
+        """
+        return await self.repository.update(
+            job_id, status=JobStatus.SUCCEEDED.value, reel_id=reel_id, finished_at=datetime.utcnow()
+        )
+
+    async def mark_failed(self, job_id: uuid.UUID, error: str) -> Optional[RenderJob]:
+        """
+        Mark a job as failed.
+
+        Args:
+            job_id: The ID of the job.
+            error: What went wrong.
+
+        Returns:
+            The updated RenderJob if found, else None.
+        """
+        return await self.repository.update(
+            job_id, status=JobStatus.FAILED.value, error=error, finished_at=datetime.utcnow()
+        )
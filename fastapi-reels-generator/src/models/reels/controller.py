@@ -1,25 +1,61 @@
-from fastapi import APIRouter, Depends, Request, status, File, UploadFile, Form
-from typing import Annotated, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, File, UploadFile, Form
+from typing import Annotated, List, Optional
+from datetime import datetime
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTasks
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.exc import IntegrityError
 
 from src.db.database import Database
-from src.dependencies import get_reel_service
+from src.db.unit_of_work import UnitOfWork
+from src.dependencies import get_reel_service, get_job_service, get_render_queue, get_preview_pool, get_user_service, get_upload_spooler, get_asset_service, get_unit_of_work
+from src.auth.guards.api_key import APIKeyGuard
 from src.auth.guards.jwt import JWTGuard
 from src.models.reels.service import ReelService
-from src.models.reels.schema import ReelCreateModel, ReelUpdateModel, ReelResponse
+from src.models.users.service import UserService
+from src.models.jobs.service import JobService
+from src.models.jobs.schema import JobCreateModel, JobResponse, JobStatus
+from src.models.jobs.exception import JobNotFoundException
+from src.render.encoding import get_encoder_profile
+from src.render.output_cache import render_cache_key
+from src.render.queue import PreviewPool, RenderQueue
+from src.common.upload_spooler import UploadSpooler
+from src.models.assets.service import AssetService
+from src.models.reels.schema import ReelCreateModel, ReelBulkCreateModel, ReelUpdateModel, ReelPage, ReelResponse
 from src.models.reels.exception import ReelBadRequestException, ReelNotFoundException, ReelUnprocessableEntityException
-from src.env import UPLOAD_DIR
 from src.rate_limiter import limiter
+from src.common.etag import etag_matches, make_etag
+from src.common.responses import FastJSONResponse
+from src.render.layout import validate_layout
+from src.env import MAX_OVERLAY_IMAGES, MAX_PAGE_SIZE, PAGE_SIZE, PREVIEW_MAX_SECONDS, UPLOAD_DIR
 
+import json
 import os
 import uuid
 
 router = APIRouter(prefix="/reels", tags=["reels"])
 
-@router.get("/", response_model=List[ReelResponse])
-async def find_all(reel_service: ReelService = Depends(get_reel_service)):
-    """Retrieve all reels."""
-    return await reel_service.find_all()
+@router.get("/", response_model=ReelPage)
+async def find_all(
+    request: Request,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = PAGE_SIZE,
+    cursor: Optional[str] = None,
+    user_id: Optional[uuid.UUID] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    reel_service: ReelService = Depends(get_reel_service),
+):
+    """Retrieve a page of reels, newest first; pass next_cursor back to get the following page."""
+    try:
+        # The version and the page are read from the same replica and snapshot
+        async with reel_service.snapshot():
+            etag = await reel_service.find_all_etag(limit, cursor, user_id, created_after, created_before)
+            if etag_matches(request.headers.get("If-None-Match"), etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            page = await reel_service.find_all(limit, cursor, user_id, created_after, created_before)
+        return FastJSONResponse(page, headers={"ETag": etag})
+    except ValueError as e:
+        raise ReelBadRequestException(str(e))
 
 @limiter.limit("5/minute")
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=ReelResponse)
@@ -29,6 +65,9 @@ async def create(
     video: UploadFile = File(...),
     payload = Depends(JWTGuard()),
     reel_service: ReelService = Depends(get_reel_service),
+    asset_service: AssetService = Depends(get_asset_service),
+    spooler: UploadSpooler = Depends(get_upload_spooler),
+    uow: UnitOfWork = Depends(get_unit_of_work),
 ):
     """Create a new reel."""
     try:
@@ -37,11 +76,8 @@ async def create(
         print(f"User ID: {payload.id}")
         print(f"Video: {video.filename}")
         
-        # Save file
-        file_filename = f"{uuid.uuid4()}_{video.filename}"
-        file_path = os.path.join(UPLOAD_DIR, file_filename)
-        with open(file_path, "wb") as f:
-            f.write(video.file.read())
+        # Save file (stored once per distinct content)
+        file_path = (await asset_service.store(video, spooler)).path
 
         # Create ReelCreateModel
         reel_data = ReelCreateModel(
@@ -52,26 +88,42 @@ async def create(
         print(f"Received reel_data: {reel_data}")
         print(f"File path: {file_path}")
 
-        return await reel_service.create(reel_data)
+        reel = await reel_service.create(reel_data, asset_paths=[file_path])
+        await uow.commit()
+        return reel
+    except HTTPException:
+        await spooler.discard()
+        raise
     except IntegrityError as e:
+        await spooler.discard()
         print(f"IntegrityError: {e}")
         raise ReelBadRequestException()
     except Exception as e:
+        await spooler.discard()
         print(f"ValidationError: {e}")
         raise ReelUnprocessableEntityException(str(e))
 
 @limiter.limit("5/minute")
-@router.post("/generate", status_code=status.HTTP_201_CREATED, response_model=ReelResponse)
+@router.post("/generate", status_code=status.HTTP_202_ACCEPTED, response_model=JobResponse)
 async def generate(
     request: Request,
+    response: Response,
     title: Annotated[str, Form()],
     user_id: Annotated[str, Form()],  # Accept as string
+    image_scale: Annotated[float, Form()] = 0.5,
+    layout: Annotated[str, Form()] = "auto",
+    anchors: Annotated[Optional[str], Form()] = None,  # JSON list of [x, y] fractions
+    encoder_profile: Annotated[Optional[str], Form()] = None,  # Defaults to the user's, then DEFAULT_ENCODER_PROFILE
     video: UploadFile = File(...),
     audio: UploadFile = File(...),
     images: List[UploadFile] = File(default=[]),
-    reel_service: ReelService = Depends(get_reel_service),
+    render_queue: RenderQueue = Depends(get_render_queue),
+    user_service: UserService = Depends(get_user_service),
+    asset_service: AssetService = Depends(get_asset_service),
+    spooler: UploadSpooler = Depends(get_upload_spooler),
+    uow: UnitOfWork = Depends(get_unit_of_work),
 ):
-    """Create a new reel."""
+    """Queue a reel render and return the job to poll."""
     try:
         # Log raw request headers for debugging
         print(f"Title: {title}")
@@ -79,72 +131,214 @@ async def generate(
         print(f"Video: {video.filename}")
         print(f"Audio: {audio.filename}")
         print(f"Images: {[image.filename for image in images]}")
+
+        if not 1 <= len(images) <= MAX_OVERLAY_IMAGES:
+            raise ReelBadRequestException(f"Expected 1 to {MAX_OVERLAY_IMAGES} images, got {len(images)}")
+        try:
+            anchor_points = json.loads(anchors) if anchors else None
+            validate_layout(layout, len(images), anchor_points)
+        except (ValueError, TypeError) as e:
+            raise ReelBadRequestException(str(e))
+        if encoder_profile is None:
+            user = await user_service.find_by_id(uuid.UUID(user_id))
+            encoder_profile = user.encoder_profile if user else None
+        try:
+            profile = get_encoder_profile(encoder_profile)
+        except ValueError as e:
+            raise ReelBadRequestException(str(e))
         
-        # Save file
-        file_filename = f"{uuid.uuid4()}_{video.filename}"
-        file_path = os.path.join(UPLOAD_DIR, file_filename)
-        with open(file_path, "wb") as f:
-            f.write(video.file.read())
-
-        # Save audio
-        audio_filename = f"{uuid.uuid4()}_{audio.filename}"
-        audio_path = os.path.join(UPLOAD_DIR, audio_filename)
-        with open(audio_path, "wb") as f:
-            f.write(audio.file.read())
-
-        # Save images
-        image_paths = []
+        # Save file, audio and images; content that is already stored is not written again
+        video_asset = await asset_service.store(video, spooler)
+        audio_asset = await asset_service.store(audio, spooler)
+        image_assets = []
         for image in images:
-            image_filename = f"{uuid.uuid4()}_{image.filename}"
-            image_path = os.path.join(UPLOAD_DIR, image_filename)
-            with open(image_path, "wb") as f:
-                f.write(image.file.read())
-            image_paths.append(image_path)
+            image_assets.append(await asset_service.store(image, spooler))
+        # The assets must be visible to the render workers before the job is queued
+        await uow.commit()
 
-        # Create ReelCreateModel
-        reel_data = ReelCreateModel(
+        # Create JobCreateModel
+        job_data = JobCreateModel(
             title=title,
-            file=file_path,
             user_id=user_id,
+            video=video_asset.path,
+            audio=audio_asset.path,
+            images=[asset.path for asset in image_assets],
+            image_scale=image_scale,
+            layout=layout,
+            anchors=anchor_points,
+            encoder_profile=profile.name,
+            cache_key=render_cache_key(
+                video_asset.sha256,
+                audio_asset.sha256,
+                [asset.sha256 for asset in image_assets],
+                image_scale,
+                layout,
+                anchor_points,
+                profile.video_args(),
+            ),
         )
-        print(f"Received reel_data: {reel_data}")
-        print(f"File path: {file_path}")
-        print(f"Audio path: {audio_path}")
-        print(f"Image paths: {image_paths}")
+        print(f"Received job_data: {job_data}")
 
-        return await reel_service.create(reel_data)
+        # Rendering happens on the render workers; the client polls the job
+        job = await render_queue.submit(job_data)
+        if job.status == JobStatus.SUCCEEDED.value:
+            # Served from an identical earlier render; nothing is left to do
+            response.status_code = status.HTTP_200_OK
+        response.headers["Location"] = f"{router.prefix}/jobs/{job.id}"
+        return job
+    except HTTPException:
+        await spooler.discard()
+        raise
     except IntegrityError as e:
+        await spooler.discard()
         print(f"IntegrityError: {e}")
         raise ReelBadRequestException()
     except Exception as e:
+        await spooler.discard()
         print(f"ValidationError: {e}")
         raise ReelUnprocessableEntityException(str(e))
 
 
+@limiter.limit("30/minute")
+@router.post("/preview", response_class=FileResponse)
+async def preview(
+    request: Request,
+    image_scale: Annotated[float, Form()] = 0.5,
+    layout: Annotated[str, Form()] = "auto",
+    anchors: Annotated[Optional[str], Form()] = None,  # JSON list of [x, y] fractions
+    start: Annotated[float, Form()] = 0.0,
+    duration: Annotated[float, Form()] = PREVIEW_MAX_SECONDS,
+    video: UploadFile = File(...),
+    audio: UploadFile = File(...),
+    images: List[UploadFile] = File(default=[]),
+    preview_pool: PreviewPool = Depends(get_preview_pool),
+    spooler: UploadSpooler = Depends(get_upload_spooler),
+):
+    """Render a short, low-resolution cut of a reel and return it, to check a layout before generating."""
+    output_path = os.path.join(UPLOAD_DIR, f"preview-{uuid.uuid4()}.mp4")
+    try:
+        if not 1 <= len(images) <= MAX_OVERLAY_IMAGES:
+            raise ReelBadRequestException(f"Expected 1 to {MAX_OVERLAY_IMAGES} images, got {len(images)}")
+        if start < 0 or not 0 < duration <= PREVIEW_MAX_SECONDS:
+            raise ReelBadRequestException(
+                f"Expected a start of at least 0 and a duration of up to {PREVIEW_MAX_SECONDS:g} seconds"
+            )
+        try:
+            anchor_points = json.loads(anchors) if anchors else None
+            validate_layout(layout, len(images), anchor_points)
+        except (ValueError, TypeError) as e:
+            raise ReelBadRequestException(str(e))
+
+        # Spooled rather than stored as assets: nothing references a preview's inputs afterwards
+        video_path = (await spooler.spool(video)).path
+        audio_path = (await spooler.spool(audio)).path
+        image_paths = []
+        for image in images:
+            image_paths.append((await spooler.spool(image)).path)
+
+        await preview_pool.render(
+            video_path, image_paths, audio_path, output_path,
+            image_scale=image_scale, layout=layout, anchors=anchor_points, start=start, duration=duration,
+        )
+        # The preview and its inputs are only kept until it has been sent
+        cleanup = BackgroundTasks()
+        cleanup.add_task(_remove_file, output_path)
+        cleanup.add_task(spooler.discard)
+        return FileResponse(output_path, media_type="video/mp4", background=cleanup)
+    except HTTPException:
+        await spooler.discard()
+        await run_in_threadpool(_remove_file, output_path)
+        raise
+    except Exception as e:
+        await spooler.discard()
+        await run_in_threadpool(_remove_file, output_path)
+        print(f"Preview failed: {e}")
+        raise ReelUnprocessableEntityException(str(e))
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+# Back-fills set any user_id and file path, so they need the internal API key rather than a user's token
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=List[ReelResponse],
+    dependencies=[Depends(APIKeyGuard())],
+)
+async def create_many(
+    bulk_data: ReelBulkCreateModel,
+    reel_service: ReelService = Depends(get_reel_service),
+    uow: UnitOfWork = Depends(get_unit_of_work),
+):
+    """Create a batch of reels from metadata in one transaction, e.g. when back-filling."""
+    try:
+        reels = await reel_service.create_many(bulk_data)
+        await uow.commit()
+        return reels
+    except IntegrityError as e:
+        print(f"IntegrityError: {e}")
+        raise ReelBadRequestException()
+
+
+@router.get("/jobs/{_id}", response_model=JobResponse)
+async def find_job_by_id(_id: uuid.UUID, job_service: JobService = Depends(get_job_service)):
+    """Retrieve a render job by ID."""
+    job = await job_service.find_by_id(_id)
+    if job is None:
+        raise JobNotFoundException(f"Job {_id} not found.")
+    return job
+
+
+@router.get("/export")
+async def export(
+    after_id: Optional[uuid.UUID] = None,
+    user_id: Optional[uuid.UUID] = None,
+    reel_service: ReelService = Depends(get_reel_service),
+):
+    """Stream every reel as NDJSON, ordered by id; pass the last id received as after_id to resume."""
+    return StreamingResponse(reel_service.export(after_id, user_id), media_type="application/x-ndjson")
+
+
 @router.get("/{_id}", response_model=ReelResponse)
-async def find_by_id(_id: uuid.UUID, reel_service: ReelService = Depends(get_reel_service)):
-    """Retrieve a reel by ID."""
-    reel = await reel_service.find_by_id(_id)
+async def find_by_id(
+    _id: uuid.UUID, request: Request, reel_service: ReelService = Depends(get_reel_service)
+):
+    """Retrieve a reel by ID; answers 304 when If-None-Match holds its current ETag."""
+    reel = await reel_service.find_by_id_json(_id)
     if reel is None:
-        raise ReelNotFoundException(_id)
-    return reel
+        raise ReelNotFoundException(f"Reel {_id} not found.")
+    etag = make_etag(reel)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return FastJSONResponse(reel, headers={"ETag": etag})
 
 @router.patch("/{_id}", response_model=ReelResponse)
 async def update(
-    _id: int,
+    _id: uuid.UUID,
     reel_update_data: ReelUpdateModel,
     reel_service: ReelService = Depends(get_reel_service),
+    uow: UnitOfWork = Depends(get_unit_of_work),
 ):
     """Update a reel by ID."""
     reel = await reel_service.update(_id, reel_update_data)
     if reel is None:
-        raise ReelNotFoundException(_id)
+        raise ReelNotFoundException(f"Reel {_id} not found.")
+    await uow.commit()
     return reel
 
 @router.delete("/{_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete(_id: uuid.UUID, reel_service: ReelService = Depends(get_reel_service)):
+async def delete(
+    _id: uuid.UUID,
+    reel_service: ReelService = Depends(get_reel_service),
+    uow: UnitOfWork = Depends(get_unit_of_work),
+):
     """Delete a reel by ID."""
     success = await reel_service.delete(_id)
     if not success:
         raise ReelNotFoundException()
+    await uow.commit()
     return {}
\ No newline at end of file
@@ -1,12 +1,13 @@
 import uuid
 from typing import Annotated, List, Optional
-from pydantic import BaseModel
-from sqlalchemy import String, ForeignKey, DateTime, Column
+from pydantic import BaseModel, Field
+from sqlalchemy import String, ForeignKey, DateTime, Column, Index
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID  # For PostgreSQL UUID support
 from src.db.database import Base
-from src.env import DB_CONNECTION
+from src.common.pagination import Page
+from src.env import DB_CONNECTION, MAX_BULK_CREATE_SIZE
 from datetime import datetime
 
 class ReelResponse(BaseModel):
@@ -15,6 +16,7 @@ class ReelResponse(BaseModel):
     file: str
     user_id: uuid.UUID  # Changed from int to uuid.UUID
     created_at: datetime = None
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -28,6 +30,13 @@ class Reel(Base):
     )  # Changed to UUID for ForeignKey
     user: Mapped["User"] = relationship(back_populates="reels")
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Back keyset pagination on (created_at, id), optionally per user
+    __table_args__ = (
+        Index('ix_reels_created_at_id', 'created_at', 'id'),
+        Index('ix_reels_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
 
 class ReelCreateModel(BaseModel):
     title: str
@@ -38,6 +47,9 @@ class ReelCreateModel(BaseModel):
     class Config:
         from_attributes = True
 
+class ReelBulkCreateModel(BaseModel):
+    reels: List[ReelCreateModel] = Field(min_length=1, max_length=MAX_BULK_CREATE_SIZE)
+
 class ReelGenerateModel(BaseModel):
     title: str
     audio: str
@@ -48,6 +60,9 @@ class ReelGenerateModel(BaseModel):
     class Config:
         from_attributes = True
 
+class ReelPage(Page[ReelResponse]):
+    pass
+
 class ReelUpdateModel(BaseModel):
     title: Optional[str] = None
     file: Optional[str] = None
@@ -1,32 +1,111 @@
 import uuid
-from typing import List, Optional
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+from src.common.responses import json_dumps
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from src.db.database import Database
 from src.db.repository import Repository
-from src.models.reels.schema import ReelCreateModel, ReelUpdateModel, Reel
+from src.db.unit_of_work import UnitOfWork
+from src.common.cache import LookupCache
+from src.common.etag import make_etag
+from src.models.reels.schema import ReelCreateModel, ReelBulkCreateModel, ReelUpdateModel, ReelPage, ReelResponse, Reel
+from src.models.assets.service import AssetService
+
+# Only the columns a response shows are loaded, as plain rows serialized once
+RESPONSE_COLUMNS = [getattr(Reel, field) for field in ReelResponse.model_fields]
 
 class ReelService:
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, uow: Optional[UnitOfWork] = None, cache: Optional[LookupCache] = None):
         """
         Initialize the ReelService with a Database instance.
         
         Args:
             db: The Database instance for session management.
+            uow: The request's unit of work, if the service runs inside one.
+            cache: Cache of reels by ID, shared between workers; lookups are not cached without one.
+        """
+        self.repository = Repository(Reel, db, uow, cache)
+        self.cache = cache
+        self.assets = AssetService(db, uow)
+
+    async def find_all(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        user_id: Optional[uuid.UUID] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> dict:
+        """
+        Retrieve one page of reels, newest first, ready to be sent as JSON.
+        
+        Args:
+            limit: Maximum number of reels to return.
+            cursor: The next_cursor of the previous page, if any.
+            user_id: Only reels of this user.
+            created_after: Only reels created at or after this time.
+            created_before: Only reels created before this time.
+        
+        Returns:
+            A page of reels and the cursor of the next page, shaped like ReelPage.
         """
-        self.repository = Repository(Reel, db)
+        filters = {"user_id": user_id} if user_id else None
+        rows, next_cursor = await self.repository.find_page(
+            limit, cursor, filters, created_after=created_after, created_before=created_before, columns=RESPONSE_COLUMNS
+        )
+        return {"items": [row._asdict() for row in rows], "next_cursor": next_cursor}
 
-    async def find_all(self) -> List[Reel]:
+    def snapshot(self):
         """
-        Retrieve all reels from the database.
+        Read everything inside the block from one server and snapshot.
         
         Returns:
-            A list of Reel objects.
+            An async context manager; wrap find_all_etag and find_all in it so a page
+            of reels is never sent under the ETag of a newer state.
         """
-        reels = await self.repository.find_all()
-        return [Reel.from_orm(reel) for reel in reels]
+        return self.repository.snapshot()
 
-    async def find_by_user(self, user_id: uuid.UUID) -> List[Reel]:
+    async def find_all_etag(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        user_id: Optional[uuid.UUID] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> str:
+        """
+        Compute the ETag of a page of reels without loading it.
+        
+        Args:
+            limit: Maximum number of reels on the page.
+            cursor: The next_cursor of the previous page, if any.
+            user_id: Only reels of this user.
+            created_after: Only reels created at or after this time.
+            created_before: Only reels created before this time.
+        
+        Returns:
+            An ETag that changes whenever any reel is created, updated or deleted.
+        """
+        version = await self.repository.collection_version()
+        return make_etag(version, limit, cursor, user_id, created_after, created_before)
+
+    async def export(self, after_id: Optional[uuid.UUID] = None, user_id: Optional[uuid.UUID] = None) -> AsyncIterator[bytes]:
+        """
+        Stream reels as NDJSON lines, ordered by id.
+        
+        Args:
+            after_id: Resume after the reel with this id (the last id a client received).
+            user_id: Only reels of this user.
+        
+        Yields:
+            One JSON-encoded reel per line.
+        """
+        filters = {"user_id": user_id} if user_id else None
+        async for row in self.repository.stream(after_id, filters, columns=RESPONSE_COLUMNS):
+            yield json_dumps(row._asdict()) + b"\n"
+
+    async def find_by_user(self, user_id: uuid.UUID) -> List[ReelResponse]:
         """
         Retrieve all reels for a specific user.
         
@@ -36,17 +115,18 @@ class ReelService:
         Returns:
             A list of Reel objects for the user.
         """
-        async with self.repository.db.get_session() as session:
+        async with self.repository.read_session() as session:
             result = await session.execute(select(Reel).filter(Reel.user_id == user_id))
             reels = result.scalars().all()
-            return [Reel.from_orm(reel) for reel in reels]
+            return [ReelResponse.model_validate(reel) for reel in reels]
 
-    async def create(self, reel_data: ReelCreateModel) -> Reel:
+    async def create(self, reel_data: ReelCreateModel, asset_paths: Optional[List[str]] = None) -> ReelResponse:
         """
         Create a new reel in the database.
         
         Args:
             reel_data: The data for the new reel.
+            asset_paths: Stored assets the reel was made from, which it keeps referenced.
         
         Returns:
             The created Reel object.
@@ -55,9 +135,26 @@ class ReelService:
         if not reel_dict.get('created_at'):
             del reel_dict['created_at']  # Let model default handle created_at
         reel = await self.repository.create(**reel_dict)
-        return Reel.from_orm(reel)
+        if asset_paths:
+            await self.assets.acquire(reel.id, asset_paths)
+        return ReelResponse.model_validate(reel)
+
+    async def create_many(self, bulk_data: ReelBulkCreateModel) -> List[ReelResponse]:
+        """
+        Create a batch of reels in a single transaction.
+        
+        Args:
+            bulk_data: The data for the new reels.
+        
+        Returns:
+            The created Reel objects, in the order they were given.
+        """
+        # Reels without created_at get the model default
+        rows = [reel_data.dict(exclude_none=True) for reel_data in bulk_data.reels]
+        reels = await self.repository.create_many(rows)
+        return [ReelResponse.model_validate(reel) for reel in reels]
 
-    async def find_by_id(self, reel_id: uuid.UUID) -> Optional[Reel]:
+    async def find_by_id(self, reel_id: uuid.UUID) -> Optional[ReelResponse]:
         """
         Retrieve a reel by its ID.
         
@@ -67,10 +164,30 @@ class ReelService:
         Returns:
             The Reel object if found, else None.
         """
-        reel = await self.repository.find_by_id(reel_id)
-        return Reel.from_orm(reel) if reel else None
+        raw = await self.find_by_id_json(reel_id)
+        return ReelResponse.model_validate_json(raw) if raw else None
+
+    async def find_by_id_json(self, reel_id: uuid.UUID) -> Optional[bytes]:
+        """
+        Retrieve a reel by its ID as the JSON document sent to clients.
+        
+        Args:
+            reel_id: The ID of the reel to retrieve.
+        
+        Returns:
+            The reel serialized as ReelResponse, or None if not found.
+        """
+        # The cache is shared by every client, so it is filled from the primary, never a lagging replica
+        async def load() -> Optional[bytes]:
+            row = await self.repository.find_by_id(reel_id, RESPONSE_COLUMNS, primary=self.cache is not None)
+            return json_dumps(row._asdict()) if row else None
+
+        # Uncommitted writes of this request must not leak into the cache
+        if self.cache is None or (self.repository.uow and self.repository.uow.dirty):
+            return await load()
+        return await self.cache.get_or_load(reel_id, load)
 
-    async def update(self, reel_id: uuid.UUID, reel_update_data: ReelUpdateModel) -> Optional[Reel]:
+    async def update(self, reel_id: uuid.UUID, reel_update_data: ReelUpdateModel) -> Optional[ReelResponse]:
         """
         Update a reel by its ID.
         
@@ -82,7 +199,7 @@ class ReelService:
             The updated Reel object if found, else None.
         """
         reel = await self.repository.update(reel_id, **reel_update_data.dict(exclude_unset=True))
-        return Reel.from_orm(reel) if reel else None
+        return ReelResponse.model_validate(reel) if reel else None
 
     async def delete(self, reel_id: uuid.UUID) -> bool:
         """
@@ -94,4 +211,5 @@ class ReelService:
         Returns:
             True if the reel was deleted, False if not found.
         """
-        return await self.repository.delete(reel_id)
\ No newline at end of file
+        await self.assets.release(reel_id)
+        return await self.repository.delete(reel_id)
@@ -1,19 +1,40 @@
 import uuid
-from fastapi import APIRouter, Depends, Request, status, FastAPI
-from typing import List
+from fastapi import APIRouter, Depends, Query, Request, Response, status, FastAPI
+from typing import Annotated, List, Optional
+from datetime import datetime
 from sqlalchemy.exc import IntegrityError
 from src.db.database import Database
+from src.db.unit_of_work import UnitOfWork
 from src.models.users.service import UserService
-from src.models.users.schema import UserCreateModel, UserUpdateModel, UserResponse
+from src.models.users.schema import UserCreateModel, UserUpdateModel, UserPage, UserResponse
 from src.models.users.exception import UserBadRequestException, UserNotFoundException
-from src.dependencies import get_user_service
+from src.dependencies import get_user_service, get_unit_of_work
+from src.common.etag import etag_matches, make_etag
+from src.common.responses import FastJSONResponse
+from src.env import MAX_PAGE_SIZE, PAGE_SIZE
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.get("/", response_model=List[UserResponse])
-async def find_all(user_service: UserService = Depends(get_user_service)):
-    """Retrieve all users."""
-    return await user_service.find_all()
+@router.get("/", response_model=UserPage)
+async def find_all(
+    request: Request,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = PAGE_SIZE,
+    cursor: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    user_service: UserService = Depends(get_user_service),
+):
+    """Retrieve a page of users, newest first; pass next_cursor back to get the following page."""
+    try:
+        # The version and the page are read from the same replica and snapshot
+        async with user_service.snapshot():
+            etag = await user_service.find_all_etag(limit, cursor, created_after, created_before)
+            if etag_matches(request.headers.get("If-None-Match"), etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            page = await user_service.find_all(limit, cursor, created_after, created_before)
+        return FastJSONResponse(page, headers={"ETag": etag})
+    except ValueError as e:
+        raise UserBadRequestException(str(e))
 
 '''
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=UserResponse)
@@ -26,29 +47,41 @@ async def create(user_data: UserCreateModel, user_service: UserService = Depends
 '''
 
 @router.get("/{_id}", response_model=UserResponse)
-async def find_by_id(_id: uuid.UUID, user_service: UserService = Depends(get_user_service)):
-    """Retrieve a user by ID."""
-    user = await user_service.find_by_id(_id)
+async def find_by_id(
+    _id: uuid.UUID, request: Request, user_service: UserService = Depends(get_user_service)
+):
+    """Retrieve a user by ID; answers 304 when If-None-Match holds its current ETag."""
+    user = await user_service.find_by_id_json(_id)
     if user is None:
-        raise UserNotFoundException(_id)
-    return user
+        raise UserNotFoundException(f"User {_id} not found.")
+    etag = make_etag(user)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return FastJSONResponse(user, headers={"ETag": etag})
 
 @router.patch("/{_id}", response_model=UserResponse)
 async def update(
     _id: uuid.UUID,
     user_update_data: UserUpdateModel,
     user_service: UserService = Depends(get_user_service),
+    uow: UnitOfWork = Depends(get_unit_of_work),
 ):
     """Update a user by ID."""
     user = await user_service.update(_id, user_update_data)
     if user is None:
-        raise UserNotFoundException(_id)
+        raise UserNotFoundException(f"User {_id} not found.")
+    await uow.commit()
     return user
 
 @router.delete("/{_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete(_id: uuid.UUID, user_service: UserService = Depends(get_user_service)):
+async def delete(
+    _id: uuid.UUID,
+    user_service: UserService = Depends(get_user_service),
+    uow: UnitOfWork = Depends(get_unit_of_work),
+):
     """Delete a user by ID."""
     success = await user_service.delete(_id)
     if not success:
-        raise UserNotFoundException(_id)
+        raise UserNotFoundException(f"User {_id} not found.")
+    await uow.commit()
     return {}
\ No newline at end of file
@@ -1,10 +1,13 @@
 import uuid
+from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, String
+from sqlalchemy import Column, DateTime, Index, String
 from sqlalchemy.dialects.postgresql import UUID  # Use this for PostgreSQL; adjust for other databases
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from src.db.database import Base
+from src.common.pagination import Page
+from src.render.encoding import ENCODER_PROFILES
 
 # Pydantic models for input validation
 class UserCreateModel(BaseModel):
@@ -14,18 +17,41 @@ class UserCreateModel(BaseModel):
 class UserUpdateModel(BaseModel):
     name: Optional[str] = None
     email: Optional[str] = None
+    # Encoder profile of the user's renders; None uses DEFAULT_ENCODER_PROFILE
+    encoder_profile: Optional[str] = None
+
+    @field_validator("encoder_profile")
+    @classmethod
+    def check_encoder_profile(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and value not in ENCODER_PROFILES:
+            raise ValueError(f"Unknown encoder profile {value}, expected one of {', '.join(ENCODER_PROFILES)}")
+        return value
 
 class UserResponse(BaseModel):
     id: uuid.UUID  # Changed from int to uuid.UUID
     name: str
     email: str
+    encoder_profile: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+class UserPage(Page[UserResponse]):
+    pass
+
 # SQLAlchemy model for database table
 class User(Base):
     __tablename__ = 'users'   
     name: Mapped[str] = mapped_column(String)
     email: Mapped[str] = mapped_column(String)
-    reels: Mapped[list["Reel"]] = relationship("Reel", back_populates="user")
\ No newline at end of file
+    encoder_profile: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    reels: Mapped[list["Reel"]] = relationship("Reel", back_populates="user")
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    # Backs keyset pagination on (created_at, id)
+    __table_args__ = (Index('ix_users_created_at_id', 'created_at', 'id'),)
\ No newline at end of file
@@ -1,31 +1,87 @@
 import uuid
+from datetime import datetime
 from typing import List, Optional
+from src.common.responses import json_dumps
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from src.db.database import Database
 from src.db.repository import Repository
-from src.models.users.schema import UserCreateModel, UserResponse, UserUpdateModel, User
+from src.db.unit_of_work import UnitOfWork
+from src.common.cache import LookupCache
+from src.common.etag import make_etag
+from src.models.users.schema import UserCreateModel, UserPage, UserResponse, UserUpdateModel, User
+
+# Only the columns a response shows are loaded, as plain rows serialized once
+RESPONSE_COLUMNS = [getattr(User, field) for field in UserResponse.model_fields]
 
 class UserService:
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, uow: Optional[UnitOfWork] = None, cache: Optional[LookupCache] = None):
         """
         Initialize the UserService with a Database instance.
         
         Args:
             db: The Database instance for session management.
+            uow: The request's unit of work, if the service runs inside one.
+            cache: Cache of users by ID, shared between workers; lookups are not cached without one.
         """
-        self.repository = Repository(User, db)
+        self.repository = Repository(User, db, uow, cache)
+        self.cache = cache
 
-    async def find_all(self) -> List[User]:
+    async def find_all(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> dict:
         """
-        Retrieve all users from the database.
+        Retrieve one page of users, newest first, ready to be sent as JSON.
+        
+        Args:
+            limit: Maximum number of users to return.
+            cursor: The next_cursor of the previous page, if any.
+            created_after: Only users created at or after this time.
+            created_before: Only users created before this time.
         
         Returns:
-            A list of User objects.
+            A page of users and the cursor of the next page, shaped like UserPage.
         """
-        users = await self.repository.find_all()
-        return [User.from_orm(user) for user in users]
+        rows, next_cursor = await self.repository.find_page(
+            limit, cursor, created_after=created_after, created_before=created_before, columns=RESPONSE_COLUMNS
+        )
+        return {"items": [row._asdict() for row in rows], "next_cursor": next_cursor}
 
+    def snapshot(self):
+        """
+        Read everything inside the block from one server and snapshot.
+        
+        Returns:
+            An async context manager; wrap find_all_etag and find_all in it so a page
+            of users is never sent under the ETag of a newer state.
+        """
+        return self.repository.snapshot()
+
+    async def find_all_etag(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> str:
+        """
+        Compute the ETag of a page of users without loading it.
+        
+        Args:
+            limit: Maximum number of users on the page.
+            cursor: The next_cursor of the previous page, if any.
+            created_after: Only users created at or after this time.
+            created_before: Only users created before this time.
+        
+        Returns:
+            An ETag that changes whenever any user is created, updated or deleted.
+        """
+        version = await self.repository.collection_version()
+        return make_etag(version, limit, cursor, created_after, created_before)
 
     async def create(self, data: UserCreateModel) -> User:
         """
@@ -42,7 +98,7 @@ class UserService:
         return await self.repository.create(**user_dict)
        
     
-    async def find_by_id(self, _id: uuid.UUID) -> Optional[User]:
+    async def find_by_id(self, _id: uuid.UUID) -> Optional[UserResponse]:
         """
         Retrieve a user by its ID.
         
@@ -52,7 +108,28 @@ class UserService:
         Returns:
             The User object if found, else None.
         """
-        return await self.repository.find_by_id(_id)
+        raw = await self.find_by_id_json(_id)
+        return UserResponse.model_validate_json(raw) if raw else None
+
+    async def find_by_id_json(self, _id: uuid.UUID) -> Optional[bytes]:
+        """
+        Retrieve a user by its ID as the JSON document sent to clients.
+        
+        Args:
+            _id: The ID of the user to retrieve.
+        
+        Returns:
+            The user serialized as UserResponse, or None if not found.
+        """
+        # The cache is shared by every client, so it is filled from the primary, never a lagging replica
+        async def load() -> Optional[bytes]:
+            row = await self.repository.find_by_id(_id, RESPONSE_COLUMNS, primary=self.cache is not None)
+            return json_dumps(row._asdict()) if row else None
+
+        # Uncommitted writes of this request must not leak into the cache
+        if self.cache is None or (self.repository.uow and self.repository.uow.dirty):
+            return await load()
+        return await self.cache.get_or_load(_id, load)
 
     async def find_by_email(self, email: str) -> Optional[User]:
         """
@@ -89,4 +166,4 @@ class UserService:
         Returns:
             True if the user was deleted, False if not found.
         """
-        return await self.repository.delete(user_id)
\ No newline at end of file
+        return await self.repository.delete(user_id)
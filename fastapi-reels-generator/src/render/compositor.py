@@ -0,0 +1,264 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
+
+from src.render.layout import Placement
+
+
+@dataclass
+class OverlayPlanes:
+    """
+    An overlay converted to the form frames are blended with.
+
+    Transparent overlays keep premultiplied color and inverse alpha; opaque
+    ones keep their BGR pixels for a straight copy. The planes are only ever
+    read, so they may be read-only memory-mapped arrays.
+    """
+
+    # Color * alpha + 127 per channel (uint16), for overlays with an alpha channel
+    premultiplied: Optional[np.ndarray] = None
+    # 255 - alpha (uint16, one channel)
+    inverse_alpha: Optional[np.ndarray] = None
+    # BGR pixels (uint8), for overlays without an alpha channel
+    opaque: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_image(cls, image: np.ndarray) -> "OverlayPlanes":
+        """
+        Compute the planes of an overlay image.
+
+        Args:
+            image: The overlay as a grayscale, BGR or BGRA uint8 array, at its final size.
+
+        Returns:
+            The overlay's planes.
+        """
+        if image.ndim == 2:
+            image = np.repeat(image[:, :, None], 3, axis=2)
+
+        if image.shape[2] == 4:
+            # Premultiplied color with the rounding bias folded in, so a frame
+            # only needs (premultiplied + roi * inverse_alpha) // 255.
+            # The maximum is 255 * 255 + 127, which still fits in uint16.
+            alpha = image[:, :, 3:4].astype(np.uint16)
+            return cls(premultiplied=image[:, :, :3].astype(np.uint16) * alpha + 127, inverse_alpha=255 - alpha)
+        return cls(opaque=np.ascontiguousarray(image[:, :, :3]))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """(height, width) of the overlay."""
+        plane = self.opaque if self.opaque is not None else self.premultiplied
+        return plane.shape[:2]
+
+    def crop(self, region: Tuple[slice, slice]) -> "OverlayPlanes":
+        """
+        Take the part of the overlay inside a region, without copying.
+
+        Args:
+            region: The (rows, columns) slices to keep.
+
+        Returns:
+            Planes viewing the region.
+        """
+        if self.opaque is not None:
+            return OverlayPlanes(opaque=self.opaque[region])
+        return OverlayPlanes(premultiplied=self.premultiplied[region], inverse_alpha=self.inverse_alpha[region])
+
+
+class PreparedOverlay:
+    """An overlay's blend planes bound to a fixed position in the frame."""
+
+    def __init__(self, planes: Union[np.ndarray, OverlayPlanes], target: Tuple[slice, slice]):
+        """
+        Prepare an overlay for blending.
+
+        Args:
+            planes: The overlay's planes, or the overlay as a BGR or BGRA uint8 array,
+                already clipped to the frame.
+            target: The (rows, columns) slices of the frame the overlay covers.
+        """
+        if isinstance(planes, np.ndarray):
+            planes = OverlayPlanes.from_image(planes)
+        self.rows, self.cols = target
+        self.premultiplied = planes.premultiplied
+        self.inverse_alpha = planes.inverse_alpha
+        self.opaque = planes.opaque
+        if self.opaque is None:
+            self.scratch = np.empty((*planes.shape, 3), dtype=np.uint16)
+        else:
+            self.scratch = None
+
+    def apply(self, frame: np.ndarray) -> None:
+        """
+        Blend the overlay into a frame in place.
+
+        Args:
+            frame: The BGR uint8 frame to draw on.
+        """
+        roi = frame[self.rows, self.cols]
+        if self.opaque is not None:
+            roi[...] = self.opaque
+            return
+
+        scratch = self.scratch
+        np.multiply(roi, self.inverse_alpha, out=scratch)
+        np.add(scratch, self.premultiplied, out=scratch)
+        np.floor_divide(scratch, 255, out=scratch)
+        np.copyto(roi, scratch, casting="unsafe")
+
+
+class Compositor:
+    """
+    Blends a fixed set of overlays into every frame of a video.
+
+    The overlays never change, so the work is planned once: overlapping overlays
+    are merged into one tile, fully transparent borders and overlays are dropped,
+    and fully opaque regions become plain copies. Each frame then takes about one
+    pass over the pixels the overlays actually cover.
+    """
+
+    def __init__(self, images: Sequence[Union[np.ndarray, OverlayPlanes]], placements: Sequence[Placement]):
+        """
+        Prepare the overlays for their placements.
+
+        Placements are already clipped to the frame, so every frame only copies
+        and blends precomputed slices.
+
+        Args:
+            images: The overlays (BGR or BGRA images, or their precomputed planes),
+                each at its placement's width and height.
+            placements: Where each visible overlay goes, from plan_layout, bottom to top.
+        """
+        layers = []
+        for placement in placements:
+            overlay = images[placement.index]
+            if isinstance(overlay, np.ndarray):
+                overlay = OverlayPlanes.from_image(overlay)
+            layers.append((overlay.crop(placement.source), placement.target))
+
+        layers = [layer for layer in (_trim(*layer) for layer in layers) if layer is not None]
+        self.overlays: List[PreparedOverlay] = []
+        for group in _overlapping(layers):
+            if len(group) > 1 and _cost(group) > _cost([_bounds(group)]):
+                merged = _trim(*_merge(group))
+                group = [merged] if merged is not None else []
+            for planes, target in group:
+                self.overlays.append(PreparedOverlay(planes, target))
+
+    @property
+    def covered_pixels(self) -> int:
+        """Number of frame pixels touched per frame."""
+        return sum(
+            (overlay.rows.stop - overlay.rows.start) * (overlay.cols.stop - overlay.cols.start)
+            for overlay in self.overlays
+        )
+
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Blend every overlay into a frame in place.
+
+        Args:
+            frame: The BGR uint8 frame to draw on.
+
+        Returns:
+            The same frame, for chaining.
+        """
+        for overlay in self.overlays:
+            overlay.apply(frame)
+        return frame
+
+
+Layer = Tuple[OverlayPlanes, Tuple[slice, slice]]
+
+# Rough cost of copying a pixel relative to blending it
+COPY_COST = 0.25
+
+
+def _overlapping(layers: Sequence[Layer]) -> List[List[Layer]]:
+    # Group layers whose rectangles overlap, directly or through others, keeping
+    # stacking order within each group
+    groups: List[List[int]] = []
+    for i, (_, (rows, cols)) in enumerate(layers):
+        touching = [
+            group for group in groups
+            if any(_intersects(rows, cols, *layers[j][1]) for j in group)
+        ]
+        merged = sorted([i] + [j for group in touching for j in group])
+        groups = [group for group in groups if group not in touching] + [merged]
+    groups.sort(key=lambda group: group[0])
+    return [[layers[j] for j in group] for group in groups]
+
+
+def _intersects(rows: slice, cols: slice, other_rows: slice, other_cols: slice) -> bool:
+    return (
+        rows.start < other_rows.stop and other_rows.start < rows.stop
+        and cols.start < other_cols.stop and other_cols.start < cols.stop
+    )
+
+
+def _cost(group: Sequence[Layer]) -> float:
+    # Per-frame work of drawing the layers one by one; a bare rectangle stands for a merged tile
+    cost = 0.0
+    for planes, (rows, cols) in group:
+        area = (rows.stop - rows.start) * (cols.stop - cols.start)
+        cost += area * COPY_COST if planes is not None and planes.opaque is not None else area
+    return cost
+
+
+def _bounds(group: Sequence[Layer]) -> Tuple[None, Tuple[slice, slice]]:
+    top = min(rows.start for _, (rows, _) in group)
+    bottom = max(rows.stop for _, (rows, _) in group)
+    left = min(cols.start for _, (_, cols) in group)
+    right = max(cols.stop for _, (_, cols) in group)
+    return None, (slice(top, bottom), slice(left, right))
+
+
+def _merge(group: Sequence[Layer]) -> Layer:
+    # Flatten the group into one tile over its bounding box using the "over"
+    # operator on premultiplied color, in float, then back to the integer planes.
+    # Pixels covered by several overlays may differ by about one level per
+    # stacked overlay from blending them one after another, since rounding
+    # happens once instead of per layer.
+    _, (bounds_rows, bounds_cols) = _bounds(group)
+    top, bottom, left, right = bounds_rows.start, bounds_rows.stop, bounds_cols.start, bounds_cols.stop
+    color = np.zeros((bottom - top, right - left, 3), dtype=np.float32)
+    inverse_alpha = np.full((bottom - top, right - left, 1), 255.0, dtype=np.float32)
+
+    for planes, (rows, cols) in group:
+        region = (slice(rows.start - top, rows.stop - top), slice(cols.start - left, cols.stop - left))
+        if planes.opaque is not None:
+            layer_color = planes.opaque.astype(np.float32) * 255
+            layer_inverse = np.zeros(planes.shape + (1,), dtype=np.float32)
+        else:
+            layer_color = planes.premultiplied.astype(np.float32) - 127
+            layer_inverse = planes.inverse_alpha.astype(np.float32)
+        color[region] = color[region] * layer_inverse / 255 + layer_color
+        inverse_alpha[region] *= layer_inverse / 255
+
+    inverse_alpha = np.rint(inverse_alpha).astype(np.uint16)
+    # Keep premultiplied + 255 * inverse_alpha within uint16 after rounding
+    limit = 255 * (255 - inverse_alpha.astype(np.float32))
+    premultiplied = (np.rint(np.minimum(color, limit)) + 127).astype(np.uint16)
+    return OverlayPlanes(premultiplied=premultiplied, inverse_alpha=inverse_alpha), (slice(top, bottom), slice(left, right))
+
+
+def _trim(planes: OverlayPlanes, target: Tuple[slice, slice]) -> Optional[Layer]:
+    # Drop fully transparent borders (or the whole layer), and turn layers that
+    # are opaque everywhere into plain copies
+    if planes.opaque is not None:
+        return planes, target
+    visible = planes.inverse_alpha[:, :, 0] != 255
+    rows = np.flatnonzero(visible.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(visible.any(axis=0))
+    region = (slice(int(rows[0]), int(rows[-1]) + 1), slice(int(cols[0]), int(cols[-1]) + 1))
+    planes = planes.crop(region)
+    target = (
+        slice(target[0].start + region[0].start, target[0].start + region[0].stop),
+        slice(target[1].start + region[1].start, target[1].start + region[1].stop),
+    )
+    if not planes.inverse_alpha.any():
+        # (premultiplied + roi * 0) // 255 is the color itself
+        planes = OverlayPlanes(opaque=(planes.premultiplied // 255).astype(np.uint8))
+    return planes, target
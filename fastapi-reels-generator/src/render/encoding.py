@@ -0,0 +1,110 @@
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from src.env import DEFAULT_ENCODER_PROFILE, ENCODER_PROFILES_JSON
+
+CODECS = ("libx264", "libx265")
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    """
+    A named set of CPU video encoder settings.
+
+    Slower presets and higher CRFs give smaller files for the same quality;
+    profiles let each request or tenant pick its point between encode time
+    and bytes served.
+    """
+
+    name: str
+    codec: str = "libx264"
+    preset: str = "veryfast"
+    crf: int = 23
+    tune: Optional[str] = None
+    # Encoder threads; None lets the encoder use every core
+    threads: Optional[int] = None
+
+    def __post_init__(self):
+        if self.codec not in CODECS:
+            raise ValueError(f"Unsupported codec {self.codec}, expected one of {', '.join(CODECS)}")
+
+    def video_args(self) -> List[str]:
+        """
+        Build the ffmpeg output arguments for this profile.
+
+        Returns:
+            The video encoder arguments, as passed to FFmpegWriter.
+        """
+        args = ["-c:v", self.codec, "-preset", self.preset, "-crf", str(self.crf)]
+        if self.tune:
+            args += ["-tune", self.tune]
+        if self.threads:
+            if self.codec == "libx265":
+                args += ["-x265-params", f"pools={self.threads}"]
+            else:
+                args += ["-threads", str(self.threads)]
+        args += ["-pix_fmt", "yuv420p"]
+        if self.codec == "libx265":
+            # Apple players only accept HEVC in MP4 under the hvc1 tag
+            args += ["-tag:v", "hvc1"]
+        return args
+
+
+# From fastest to smallest; "balanced" matches the renderer's historical output
+BUILTIN_PROFILES = [
+    EncoderProfile("fast", preset="superfast", crf=23),
+    EncoderProfile("balanced", preset="veryfast", crf=23),
+    EncoderProfile("small", preset="medium", crf=26),
+    EncoderProfile("hevc", codec="libx265", preset="fast", crf=28),
+    EncoderProfile("hevc-small", codec="libx265", preset="medium", crf=28),
+]
+
+
+def load_profiles(document: Optional[str] = None) -> Dict[str, EncoderProfile]:
+    """
+    Build the available profiles: the built-in ones plus those configured in JSON.
+
+    Args:
+        document: A JSON object mapping profile names to their settings, e.g.
+            {"archive": {"codec": "libx265", "preset": "slower", "crf": 26}}.
+            Configured profiles replace built-in ones of the same name.
+
+    Returns:
+        The profiles by name.
+
+    Raises:
+        ValueError: If the JSON is malformed or a profile is invalid.
+    """
+    profiles = {profile.name: profile for profile in BUILTIN_PROFILES}
+    if document:
+        try:
+            configured = json.loads(document)
+            for name, settings in configured.items():
+                profiles[name] = EncoderProfile(name=name, **settings)
+        except (TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid encoder profiles: {e}") from e
+    return profiles
+
+
+ENCODER_PROFILES = load_profiles(ENCODER_PROFILES_JSON)
+
+
+def get_encoder_profile(name: Optional[str] = None) -> EncoderProfile:
+    """
+    Look an encoder profile up by name.
+
+    Args:
+        name: The profile's name; None selects DEFAULT_ENCODER_PROFILE.
+
+    Returns:
+        The profile.
+
+    Raises:
+        ValueError: If no profile has that name.
+    """
+    profile = ENCODER_PROFILES.get(name or DEFAULT_ENCODER_PROFILE)
+    if profile is None:
+        raise ValueError(f"Unknown encoder profile {name}, expected one of {', '.join(ENCODER_PROFILES)}")
+    return profile
+
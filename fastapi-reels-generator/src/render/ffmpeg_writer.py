@@ -0,0 +1,120 @@
+import subprocess
+import tempfile
+import numpy as np
+from typing import List, Optional
+
+# H.264 at a quality most players and platforms accept
+DEFAULT_VIDEO_ARGS = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p"]
+
+class FFmpegWriter:
+    """Pipes raw BGR frames into a single ffmpeg process that encodes and muxes audio in one pass."""
+
+    def __init__(
+        self,
+        output_path: str,
+        width: int,
+        height: int,
+        fps: float,
+        audio_path: Optional[str] = None,
+        video_args: Optional[List[str]] = None,
+        audio_start: float = 0.0,
+    ):
+        """
+        Start the ffmpeg process.
+
+        Args:
+            output_path: Where the finished reel is written.
+            width: Frame width in pixels.
+            height: Frame height in pixels.
+            fps: Frame rate of the raw input.
+            audio_path: Optional audio track muxed into the output.
+            video_args: Video encoder arguments (defaults to H.264 / yuv420p).
+            audio_start: Seconds into the audio track the output starts at.
+        """
+        self.output_path = output_path
+        self.frame_size = width * height * 3
+        if video_args is None:
+            video_args = DEFAULT_VIDEO_ARGS
+
+        cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "pipe:0",
+        ]
+        if audio_path:
+            if audio_start > 0:
+                cmd += ["-ss", f"{audio_start:.6f}"]
+            cmd += ["-i", audio_path]
+        cmd += ["-map", "0:v:0"]
+        if audio_path:
+            cmd += ["-map", "1:a:0", "-c:a", "aac", "-shortest"]
+        cmd += video_args + ["-movflags", "+faststart", output_path]
+
+        # ffmpeg's stderr goes to a temp file so a chatty encoder can never
+        # fill a pipe and deadlock against our writes on stdin.
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self._stderr)
+        self._released = False
+        self._error: Optional[RuntimeError] = None
+
+    def write(self, frame: np.ndarray) -> None:
+        """
+        Send one frame to the encoder.
+
+        Args:
+            frame: A contiguous BGR uint8 frame of the configured size.
+
+        Raises:
+            ValueError: If the frame does not match the configured size.
+            RuntimeError: If ffmpeg exited before the frame could be written.
+        """
+        if frame.nbytes != self.frame_size:
+            raise ValueError(f"Expected a frame of {self.frame_size} bytes, got {frame.nbytes}")
+        if self._released:
+            if self._error is not None:
+                raise self._error
+            # ffmpeg finished early and cleanly (e.g. -shortest hit the end of the audio)
+            return
+        try:
+            self.process.stdin.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+        except BrokenPipeError:
+            # Raises with ffmpeg's own message unless it simply finished early
+            self.release()
+
+    def release(self) -> None:
+        """
+        Close stdin and wait for ffmpeg to finish the file.
+
+        Safe to call more than once; later calls raise the same error as the first.
+
+        Raises:
+            RuntimeError: If ffmpeg exited with an error.
+        """
+        if not self._released:
+            self._released = True
+            if self.process.stdin and not self.process.stdin.closed:
+                try:
+                    self.process.stdin.close()
+                except BrokenPipeError:
+                    pass
+            returncode = self.process.wait()
+            if returncode != 0:
+                self._stderr.seek(0)
+                message = self._stderr.read().decode(errors="replace").strip()
+                self._error = RuntimeError(f"ffmpeg failed with exit code {returncode}: {message}")
+            self._stderr.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._released = True
+            self.process.kill()
+            self.process.wait()
+            self._stderr.close()
+            return False
+        self.release()
+        return False
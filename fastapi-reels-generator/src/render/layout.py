@@ -0,0 +1,152 @@
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+LAYOUTS = ("auto", "grid", "stack", "anchors")
+
+
+@dataclass(frozen=True)
+class Placement:
+    """Where one overlay goes, already clipped to the frame."""
+
+    index: int
+    width: int
+    height: int
+    x: int
+    y: int
+    # Part of the (width x height) overlay that lies inside the frame...
+    source: Tuple[slice, slice]
+    # ...and the frame region it covers
+    target: Tuple[slice, slice]
+
+
+def validate_layout(layout: str, count: int, anchors: Optional[Sequence[Tuple[float, float]]] = None):
+    """
+    Check a layout request before any rendering work is done.
+
+    Args:
+        layout: One of LAYOUTS.
+        count: Number of overlays.
+        anchors: Overlay centers for the "anchors" layout.
+
+    Raises:
+        ValueError: If the layout is unknown or the anchors do not match the overlays.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout}, expected one of {', '.join(LAYOUTS)}")
+    if layout == "anchors":
+        if anchors is None or len(anchors) != count:
+            raise ValueError(f"Expected {count} anchors, got {0 if anchors is None else len(anchors)}")
+        for anchor in anchors:
+            if len(anchor) != 2 or not all(0.0 <= value <= 1.0 for value in anchor):
+                raise ValueError(f"Anchor {anchor} must be an (x, y) pair between 0 and 1")
+
+
+def plan_layout(
+    frame_width: int,
+    frame_height: int,
+    sizes: Sequence[Tuple[int, int]],
+    layout: str = "auto",
+    anchors: Optional[Sequence[Tuple[float, float]]] = None,
+    margin: float = 0.1,
+) -> List[Placement]:
+    """
+    Place overlays on a frame once, before any frame is processed.
+
+    Layouts:
+        auto: the classic templates for 1 to 3 overlays (center; top and bottom;
+            top and two bottom), and a grid for more.
+        grid: rows and columns of equal cells, each overlay centered in its cell.
+        stack: one centered column spread evenly from top to bottom.
+        anchors: each overlay centered on an (x, y) point given as fractions of the frame.
+
+    Grid and stack shrink overlays that do not fit their cell; the other layouts
+    keep their size. Overlays hanging over an edge are clipped, and overlays
+    entirely outside the frame are left out.
+
+    Args:
+        frame_width: Frame width in pixels.
+        frame_height: Frame height in pixels.
+        sizes: (width, height) of each overlay.
+        layout: One of LAYOUTS.
+        anchors: Overlay centers for the "anchors" layout.
+        margin: Space kept free at the frame edges, as a fraction of the frame size.
+
+    Returns:
+        The visible placements, in overlay order.
+
+    Raises:
+        ValueError: If the layout is unknown or the anchors do not match the overlays.
+    """
+    validate_layout(layout, len(sizes), anchors)
+    if not sizes:
+        return []
+
+    if layout == "auto" and len(sizes) <= 3:
+        boxes = _classic(frame_width, frame_height, sizes, margin)
+    elif layout in ("auto", "grid"):
+        columns = math.ceil(math.sqrt(len(sizes)))
+        boxes = _cells(frame_width, frame_height, sizes, columns, margin)
+    elif layout == "stack":
+        boxes = _cells(frame_width, frame_height, sizes, 1, margin)
+    else:
+        boxes = [
+            (round(ax * frame_width) - w // 2, round(ay * frame_height) - h // 2, w, h)
+            for (ax, ay), (w, h) in zip(anchors, sizes)
+        ]
+
+    placements = []
+    for index, (x, y, w, h) in enumerate(boxes):
+        placement = _clip(index, x, y, w, h, frame_width, frame_height)
+        if placement is not None:
+            placements.append(placement)
+    return placements
+
+
+def _classic(frame_width: int, frame_height: int, sizes: Sequence[Tuple[int, int]], margin: float):
+    # The original templates; every overlay takes the first one's size for spacing
+    w, h = sizes[0]
+    center_x = (frame_width - w) // 2
+    top = int(frame_height * margin)
+    bottom = frame_height - h - int(frame_height * margin)
+    if len(sizes) == 1:
+        return [(center_x, (frame_height - h) // 2, w, h)]
+    if len(sizes) == 2:
+        return [(center_x, top, *sizes[0]), (center_x, bottom, *sizes[1])]
+    spacing = w // 2
+    left = (frame_width - 2 * w - spacing) // 2
+    return [(center_x, top, *sizes[0]), (left, bottom, *sizes[1]), (left + w + spacing, bottom, *sizes[2])]
+
+
+def _cells(frame_width: int, frame_height: int, sizes: Sequence[Tuple[int, int]], columns: int, margin: float):
+    rows = math.ceil(len(sizes) / columns)
+    left, top = int(frame_width * margin), int(frame_height * margin)
+    cell_width = (frame_width - 2 * left) / columns
+    cell_height = (frame_height - 2 * top) / rows
+    boxes = []
+    for i, (w, h) in enumerate(sizes):
+        # Shrink to the cell, keeping the aspect ratio
+        scale = min(1.0, cell_width / w, cell_height / h)
+        w, h = max(int(w * scale), 1), max(int(h * scale), 1)
+        row, column = divmod(i, columns)
+        x = left + int(column * cell_width + (cell_width - w) / 2)
+        y = top + int(row * cell_height + (cell_height - h) / 2)
+        boxes.append((x, y, w, h))
+    return boxes
+
+
+def _clip(index: int, x: int, y: int, w: int, h: int, frame_width: int, frame_height: int) -> Optional[Placement]:
+    left, top = max(x, 0), max(y, 0)
+    right, bottom = min(x + w, frame_width), min(y + h, frame_height)
+    if left >= right or top >= bottom:
+        print(f"Warning: Image {index + 1} at ({x}, {y}) is outside the frame and is skipped")
+        return None
+    return Placement(
+        index=index,
+        width=w,
+        height=h,
+        x=x,
+        y=y,
+        source=(slice(top - y, bottom - y), slice(left - x, right - x)),
+        target=(slice(top, bottom), slice(left, right)),
+    )
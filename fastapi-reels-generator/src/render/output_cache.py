@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from typing import List, Optional, Sequence, Tuple
+
+from src.env import RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES, UPLOAD_DIR
+from src.render.ffmpeg_writer import DEFAULT_VIDEO_ARGS
+
+# Bumped whenever the renderer's output changes for the same inputs, so old renders are not reused
+RENDER_VERSION = 1
+
+
+def render_cache_key(
+    video: str,
+    audio: str,
+    images: Sequence[str],
+    image_scale: float,
+    layout: str = "auto",
+    anchors: Optional[Sequence[Tuple[float, float]]] = None,
+    video_args: Optional[List[str]] = None,
+) -> str:
+    """
+    Identify a render by everything that affects its output.
+
+    Args:
+        video: SHA-256 of the background video.
+        audio: SHA-256 of the audio track.
+        images: SHA-256 of each overlay image, in order.
+        image_scale: Overlay width as a fraction of the video width.
+        layout: How overlays are arranged.
+        anchors: Overlay centers for the "anchors" layout.
+        video_args: Encoder arguments; defaults to the renderer's.
+
+    Returns:
+        A hex SHA-256 of the inputs and parameters.
+    """
+    document = {
+        "version": RENDER_VERSION,
+        "video": video,
+        "audio": audio,
+        "images": list(images),
+        "image_scale": float(image_scale),
+        "layout": layout,
+        "anchors": [[float(x), float(y)] for x, y in anchors] if anchors else None,
+        "video_args": list(video_args if video_args is not None else DEFAULT_VIDEO_ARGS),
+    }
+    return hashlib.sha256(json.dumps(document, sort_keys=True).encode()).hexdigest()
+
+
+class OutputCache:
+    """
+    Finished renders kept on disk by cache key, so identical requests skip rendering.
+
+    Entries are hard links to the rendered files: caching a render and handing
+    it to a new job cost no copy, and a reel keeps its file when the entry is
+    evicted. The directory is bounded by size, evicting the least recently used
+    entries. Methods touch the filesystem and block; call them off the event loop.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = RENDER_CACHE_MAX_BYTES):
+        """
+        Initialize the cache; the directory is created if needed.
+
+        Args:
+            directory: Where entries are stored; should be on the same filesystem as the renders.
+            max_bytes: Size of the directory before old entries are evicted.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str, output_path: str) -> bool:
+        """
+        Place a cached render at output_path, if there is one.
+
+        Args:
+            key: The render's cache key.
+            output_path: Where the render is wanted.
+
+        Returns:
+            True on a hit, False if the render has to be done.
+        """
+        path = self._path(key)
+        try:
+            self._link(path, output_path)
+            # Keep entries in use from being evicted
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        except OSError as e:
+            print(f"Cached render {key} could not be reused: {e}")
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key: str, output_path: str):
+        """
+        Cache a finished render.
+
+        Args:
+            key: The render's cache key.
+            output_path: The rendered file.
+        """
+        try:
+            self._link(output_path, self._path(key))
+            self._evict()
+        except OSError as e:
+            # Caching is best effort; the render itself succeeded
+            print(f"Render {key} could not be cached: {e}")
+
+    def stats(self) -> dict:
+        """
+        Report hits, misses and the size of the cache directory.
+
+        Returns:
+            Entry count, bytes used, capacity, hits, misses and hit ratio.
+        """
+        files = self._files()
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(files),
+            "bytes": sum(size for _, size, _ in files),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp4")
+
+    def _link(self, source: str, destination: str):
+        # Link under a temporary name and rename over the destination, so readers
+        # never see a partial file
+        temp_path = f"{destination}.{uuid.uuid4().hex}.tmp"
+        try:
+            try:
+                os.link(source, temp_path)
+            except OSError as e:
+                if isinstance(e, FileNotFoundError):
+                    raise
+                # Another filesystem, or no hard links: fall back to a copy
+                shutil.copyfile(source, temp_path)
+            os.replace(temp_path, destination)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _files(self):
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".mp4"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _evict(self):
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def create_output_cache() -> Optional[OutputCache]:
+    """
+    Create the render output cache configured by the environment.
+
+    Returns:
+        The cache in RENDER_CACHE_DIR (default: UPLOAD_DIR/render-cache), or None if
+        RENDER_CACHE_MAX_BYTES is 0.
+    """
+    if RENDER_CACHE_MAX_BYTES <= 0:
+        return None
+    return OutputCache(RENDER_CACHE_DIR or os.path.join(UPLOAD_DIR or tempfile.gettempdir(), "render-cache"))
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.env import OVERLAY_CACHE_DIR, OVERLAY_CACHE_MAX_BYTES, OVERLAY_CACHE_MAX_ENTRIES, UPLOAD_DIR
+from src.render.compositor import OverlayPlanes
+
+# Bumped whenever the stored planes change meaning, so stale files are never read
+CACHE_VERSION = "v1"
+PLANES = ("premultiplied", "inverse_alpha", "opaque")
+
+
+@dataclass
+class OverlaySource:
+    """An overlay image identified by its content."""
+
+    path: str
+    sha256: str
+    width: int
+    height: int
+    # The decoded image, kept only when it had to be decoded anyway
+    image: Optional[np.ndarray] = None
+
+
+@dataclass(frozen=True)
+class MappedPlanes:
+    """
+    Overlay planes referred to by the .npy files holding them.
+
+    Pickles as a few paths, so a process it is sent to maps the same page-cache
+    pages with load() instead of receiving its own copy of the arrays.
+    """
+
+    # (plane name, .npy path) for each plane present
+    files: Tuple[Tuple[str, str], ...]
+
+    @classmethod
+    def pin(cls, planes: OverlayPlanes, directory: str, name: str) -> Optional["MappedPlanes"]:
+        """
+        Hard-link memory-mapped planes into a directory, out of reach of cache eviction.
+
+        Args:
+            planes: Planes from OverlayCache.planes().
+            directory: Where the links are made; removing it releases them.
+            name: Prefix of the links, unique within the directory.
+
+        Returns:
+            The linked planes, or None if they are not all mapped from files or
+            cannot be linked (e.g. the directory is on another file system).
+        """
+        files = []
+        for plane in PLANES:
+            array = getattr(planes, plane)
+            if array is None:
+                continue
+            if not isinstance(array, np.memmap) or not array.filename:
+                return None
+            path = os.path.join(directory, f"{name}.{plane}.npy")
+            try:
+                os.link(array.filename, path)
+            except OSError:
+                return None
+            files.append((plane, path))
+        return cls(tuple(files)) if files else None
+
+    def load(self) -> OverlayPlanes:
+        """
+        Map the planes read-only.
+
+        Returns:
+            The planes, memory-mapped.
+        """
+        return OverlayPlanes(**{plane: np.load(path, mmap_mode="r") for plane, path in self.files})
+
+
+class OverlayCache:
+    """
+    Cache of overlay images decoded, resized and converted to blend planes.
+
+    Entries are keyed by the image's content hash and the size it is drawn at,
+    so a logo used by many reels is decoded and premultiplied once. They are
+    stored as .npy files and loaded memory-mapped read-only: every render
+    process using an entry shares the same page-cache pages instead of holding
+    its own copy.
+
+    The directory is bounded by size, evicting the least recently used files,
+    and each process keeps its most recently used entries mapped.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str],
+        max_bytes: int = OVERLAY_CACHE_MAX_BYTES,
+        max_entries: int = OVERLAY_CACHE_MAX_ENTRIES,
+    ):
+        """
+        Initialize the cache; the directory is created if needed.
+
+        Args:
+            directory: Where entries are stored; may be shared by several processes.
+                None keeps entries in memory only.
+            max_bytes: Size of the directory before old entries are evicted.
+            max_entries: Entries each process keeps mapped in memory.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._planes: "OrderedDict[str, OverlayPlanes]" = OrderedDict()
+        self._sizes: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def source(self, path: str) -> OverlaySource:
+        """
+        Identify an overlay image by its content and read its size.
+
+        The image is only decoded if its size has never been seen before.
+
+        Args:
+            path: The image file.
+
+        Returns:
+            The image's hash and size.
+
+        Raises:
+            ValueError: If the image cannot be read or decoded.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            raise ValueError(f"Error loading image {path}: {e}") from e
+        digest = hashlib.sha256(data).hexdigest()
+
+        size = self._sizes.get(digest) or self._read_size(digest)
+        if size is not None:
+            self._remember(self._sizes, digest, size)
+            return OverlaySource(path=path, sha256=digest, width=size[0], height=size[1])
+
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise ValueError(f"Error loading image {path}")
+        height, width = image.shape[:2]
+        self._write_size(digest, (width, height))
+        self._remember(self._sizes, digest, (width, height))
+        return OverlaySource(path=path, sha256=digest, width=width, height=height, image=image)
+
+    def planes(self, source: OverlaySource, width: int, height: int) -> OverlayPlanes:
+        """
+        Return an overlay's blend planes at a given size, building them on a miss.
+
+        Args:
+            source: The overlay, from source().
+            width: Width the overlay is drawn at.
+            height: Height the overlay is drawn at.
+
+        Returns:
+            The planes; read-only, and memory-mapped when stored on disk.
+
+        Raises:
+            ValueError: If the image has to be decoded and cannot be.
+        """
+        key = f"{CACHE_VERSION}-{source.sha256}-{width}x{height}"
+        planes = self._planes.get(key)
+        if planes is None:
+            planes = self._load(key)
+        if planes is not None:
+            self.hits += 1
+            self._remember(self._planes, key, planes)
+            return planes
+
+        self.misses += 1
+        image = source.image
+        if image is None:
+            image = cv2.imread(source.path, cv2.IMREAD_UNCHANGED)
+            if image is None:
+                raise ValueError(f"Error loading image {source.path}")
+        planes = OverlayPlanes.from_image(cv2.resize(image, (width, height)))
+        self._store(key, planes)
+        # Map the stored copy so this process shares it too, rather than keeping its own
+        planes = self._load(key) or planes
+        self._remember(self._planes, key, planes)
+        return planes
+
+    def stats(self) -> dict:
+        """
+        Report this process's hits and misses.
+
+        Returns:
+            Hits, misses, mapped entries and hit ratio.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._planes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remember(self, entries: OrderedDict, key: str, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def _path(self, key: str, plane: str) -> str:
+        return os.path.join(self.directory, f"{key}.{plane}.npy")
+
+    def _load(self, key: str) -> Optional[OverlayPlanes]:
+        if self.directory is None:
+            return None
+        planes = {}
+        for plane in PLANES:
+            path = self._path(key, plane)
+            try:
+                planes[plane] = np.load(path, mmap_mode="r")
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                # A damaged file is rebuilt on the miss
+                print(f"Overlay cache entry {path} is unreadable: {e}")
+                return None
+            # Keep entries in use from being evicted
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        if "opaque" in planes:
+            return OverlayPlanes(opaque=planes["opaque"])
+        if "premultiplied" in planes and "inverse_alpha" in planes:
+            return OverlayPlanes(premultiplied=planes["premultiplied"], inverse_alpha=planes["inverse_alpha"])
+        return None
+
+    def _store(self, key: str, planes: OverlayPlanes):
+        if self.directory is None:
+            return
+        try:
+            for plane in PLANES:
+                array = getattr(planes, plane)
+                if array is not None:
+                    self._write_atomic(self._path(key, plane), lambda f, array=array: np.save(f, array))
+            self._evict()
+        except OSError as e:
+            # Caching is best effort; the render goes on with the planes in memory
+            print(f"Overlay cache entry {key} could not be stored: {e}")
+
+    def _read_size(self, digest: str) -> Optional[Tuple[int, int]]:
+        if self.directory is None:
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{digest}.json")) as f:
+                meta = json.load(f)
+            return meta["width"], meta["height"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_size(self, digest: str, size: Tuple[int, int]):
+        if self.directory is None:
+            return
+        try:
+            self._write_atomic(
+                os.path.join(self.directory, f"{digest}.json"),
+                lambda f: f.write(json.dumps({"width": size[0], "height": size[1]}).encode()),
+            )
+        except OSError as e:
+            print(f"Overlay size of {digest} could not be stored: {e}")
+
+    def _write_atomic(self, path: str, write):
+        # Readers in other processes only ever see complete files
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def _evict(self):
+        files = []
+        total = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".npy"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        # Mapped files stay readable after unlinking, so renders in progress are unaffected
+        for _, size, path in sorted(files):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+_cache: Optional[OverlayCache] = None
+
+
+def get_overlay_cache() -> OverlayCache:
+    """
+    Return this process's overlay cache, creating it on first use.
+
+    Returns:
+        The cache in OVERLAY_CACHE_DIR (default: UPLOAD_DIR/overlay-cache, or a temp
+        directory); kept in memory only if OVERLAY_CACHE_MAX_BYTES is 0.
+    """
+    global _cache
+    if _cache is None:
+        directory = None
+        if OVERLAY_CACHE_MAX_BYTES > 0:
+            directory = OVERLAY_CACHE_DIR or os.path.join(UPLOAD_DIR or tempfile.gettempdir(), "overlay-cache")
+        _cache = OverlayCache(directory)
+    return _cache
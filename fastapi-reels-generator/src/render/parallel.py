@@ -0,0 +1,312 @@
+import bisect
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.env import RENDER_MIN_SEGMENT_SECONDS, RENDER_SEGMENT_WORKERS
+from src.render.compositor import Compositor, OverlayPlanes
+from src.render.ffmpeg_writer import FFmpegWriter
+from src.render.layout import Placement
+from src.render.overlay_cache import MappedPlanes
+from src.render.pipeline import FramePipeline
+
+# framecrc packet flags: keyframe, and "decode but do not show" (edit list trims)
+PACKET_KEY = 0x1
+PACKET_DISCARD = 0x4
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A run of frames starting at a keyframe, rendered by one worker."""
+
+    index: int
+    start_frame: int
+    frame_count: int
+    # Seek position of the first frame, in seconds from the start of the file
+    start_time: float
+
+
+def probe_keyframes(video_path: str) -> Tuple[List[Fraction], List[int]]:
+    """
+    List a video's frame timestamps and which frames are keyframes.
+
+    Uses a single stream-copy pass of ffmpeg over the packets, so nothing is decoded.
+
+    Args:
+        video_path: The video to probe.
+
+    Returns:
+        (times, keyframes): presentation times in seconds of every frame in display
+        order, relative to the start of the file, and the indices of the keyframes.
+
+    Raises:
+        RuntimeError: If ffmpeg cannot read the video.
+    """
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", video_path, "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not probe {video_path}: {result.stderr.decode(errors='replace').strip()}")
+
+    # Seek positions are relative to the file's start time, not to timestamp zero
+    start = re.search(r"start: (-?[\d.]+)", result.stderr.decode(errors="replace"))
+    start = Fraction(start.group(1)) if start else Fraction(0)
+
+    time_base = None
+    pts = []
+    key_pts = []
+    for line in result.stdout.decode().splitlines():
+        if line.startswith("#tb 0:"):
+            time_base = Fraction(line.split(":", 1)[1].strip())
+            continue
+        if line.startswith("#") or not line.strip():
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        flags = int(fields[6].split("=")[1], 16) if len(fields) > 6 else PACKET_KEY
+        if flags & PACKET_DISCARD:
+            continue
+        pts.append(int(fields[2]))
+        if flags & PACKET_KEY:
+            key_pts.append(int(fields[2]))
+    if time_base is None or not pts:
+        raise RuntimeError(f"No video frames found in {video_path}")
+
+    # Packets come in decode order; sorting by pts gives display order
+    pts.sort()
+    times = [p * time_base - start for p in pts]
+    keyframes = sorted({bisect.bisect_left(pts, p) for p in key_pts})
+    return times, keyframes
+
+
+def plan_segments(times: Sequence[Fraction], keyframes: Sequence[int], workers: int, min_frames: int) -> List[Segment]:
+    """
+    Split a video into keyframe-aligned segments of roughly equal length.
+
+    Every segment starts on a keyframe, so each worker seeks straight to its first
+    frame without decoding the frames before it.
+
+    Args:
+        times: Frame times from probe_keyframes.
+        keyframes: Keyframe indices from probe_keyframes.
+        workers: Number of segments wanted.
+        min_frames: Shortest segment worth a worker of its own.
+
+    Returns:
+        The segments in order, covering every frame; a single segment for short videos.
+    """
+    frame_count = len(times)
+    wanted = max(1, min(workers, frame_count // max(min_frames, 1)))
+    starts = [0]
+    for i in range(1, wanted):
+        target = round(i * frame_count / wanted)
+        # Nearest keyframe to the ideal split point
+        position = bisect.bisect_left(keyframes, target)
+        candidates = keyframes[max(position - 1, 0):position + 1]
+        if not candidates:
+            continue
+        start = min(candidates, key=lambda k: abs(k - target))
+        if start > starts[-1]:
+            starts.append(start)
+
+    ends = starts[1:] + [frame_count]
+    return [
+        Segment(index=i, start_frame=start, frame_count=end - start, start_time=float(times[start]))
+        for i, (start, end) in enumerate(zip(starts, ends))
+    ]
+
+
+def render_segment(
+    video_path: str,
+    segment: Segment,
+    width: int,
+    height: int,
+    fps: float,
+    images: Sequence[Union[np.ndarray, OverlayPlanes, MappedPlanes]],
+    placements: Sequence[Placement],
+    output_path: str,
+    video_args: Optional[List[str]] = None,
+) -> Dict[str, float]:
+    """
+    Decode, composite and encode one segment, without audio.
+
+    Runs in a worker process: frames are decoded by an ffmpeg process seeking to
+    the segment's keyframe, streamed back as raw BGR and pushed through a FramePipeline.
+
+    Args:
+        video_path: Background video.
+        segment: The frames to render.
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+        fps: Frame rate of the output.
+        images: Overlay images or their planes, already resized to their placements;
+            MappedPlanes are mapped from their files in this process.
+        placements: Where each overlay goes, from plan_layout.
+        output_path: Where the segment is written.
+        video_args: Video encoder arguments; defaults to FFmpegWriter's.
+
+    Returns:
+        The number of frames rendered, as "frames", and the seconds spent in each
+        stage, as "decode", "composite" and "encode".
+
+    Raises:
+        RuntimeError: If decoding or encoding fails.
+    """
+    images = [image.load() if isinstance(image, MappedPlanes) else image for image in images]
+    compositor = Compositor(images, placements)
+    cmd = ["ffmpeg", "-loglevel", "error"]
+    if segment.start_time > 0:
+        cmd += ["-ss", f"{segment.start_time:.6f}"]
+    cmd += [
+        "-i", video_path, "-map", "0:v:0", "-frames:v", str(segment.frame_count),
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1",
+    ]
+
+    with tempfile.TemporaryFile() as stderr:
+        decoder = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            with FFmpegWriter(output_path, width, height, fps, video_args=video_args) as out:
+                pipeline = FramePipeline(
+                    read=lambda frame: decoder.stdout.readinto(frame.data) == frame.nbytes,
+                    composite=compositor.apply,
+                    write=out.write,
+                    shape=(height, width, 3),
+                )
+                frames = pipeline.run()
+                flush_started = time.perf_counter()
+            # Leaving the writer waits for the encoder to finish the file
+            pipeline.timings["encode"] += time.perf_counter() - flush_started
+        finally:
+            decoder.stdout.close()
+            returncode = decoder.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"Decoding segment {segment.index} failed: {stderr.read().decode(errors='replace').strip()}")
+    return dict(pipeline.timings, frames=frames)
+
+
+def render_parallel(
+    video_path: str,
+    images: Sequence[Union[np.ndarray, OverlayPlanes]],
+    placements: Sequence[Placement],
+    width: int,
+    height: int,
+    fps: float,
+    audio_path: Optional[str],
+    output_path: str,
+    workers: int = RENDER_SEGMENT_WORKERS,
+    min_segment_seconds: float = RENDER_MIN_SEGMENT_SECONDS,
+    stats: Optional[Dict[str, float]] = None,
+    video_args: Optional[List[str]] = None,
+) -> int:
+    """
+    Render a reel as keyframe-aligned segments in a pool of processes.
+
+    Each segment is decoded, composited and encoded on its own. The encoded
+    segments are then joined with ffmpeg's concat demuxer, copying the video
+    rather than encoding it again, while the audio track is muxed in.
+
+    Args:
+        video_path: Background video.
+        images: Overlay images or their planes, already resized to their placements.
+            Planes memory-mapped from the overlay cache reach the workers as file paths.
+        placements: Where each overlay goes, from plan_layout.
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+        fps: Frame rate of the video.
+        audio_path: Audio track muxed into the output.
+        output_path: Where the finished reel is written.
+        workers: Number of segments rendered at once.
+        min_segment_seconds: Shortest segment worth a process of its own; shorter videos use fewer workers.
+        stats: If given, filled with the seconds spent in each stage: "decode", "composite"
+            and "encode" summed over all segments, "segments" for rendering them and
+            "mux" for joining them.
+        video_args: Video encoder arguments for the segments; defaults to FFmpegWriter's.
+
+    Returns:
+        The number of frames rendered.
+
+    Raises:
+        RuntimeError: If probing, rendering or joining the segments fails.
+    """
+    times, keyframes = probe_keyframes(video_path)
+    segments = plan_segments(times, keyframes, max(1, workers), int(min_segment_seconds * fps))
+    print(f"Rendering {len(times)} frames as {len(segments)} segments on up to {workers} workers...")
+
+    # Segments live next to the output so concurrent renders never collide
+    temp_dir = tempfile.mkdtemp(prefix="segments-", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        paths = [os.path.join(temp_dir, f"segment-{segment.index:04d}.mp4") for segment in segments]
+        started = time.perf_counter()
+        if len(segments) == 1:
+            results = [render_segment(video_path, segments[0], width, height, fps, images, placements, paths[0], video_args)]
+        else:
+            # Workers map the cached planes themselves rather than each unpickling a copy
+            shared = [_share(image, temp_dir, f"overlay-{i}") for i, image in enumerate(images)]
+            args = [(video_path, segment, width, height, fps, shared, placements, path, video_args) for segment, path in zip(segments, paths)]
+            # Spawned workers only import the renderer, like the render queue's
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(segments)), mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                futures = [pool.submit(render_segment, *arguments) for arguments in args]
+                try:
+                    results = [future.result() for future in futures]
+                except Exception:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
+        rendered = time.perf_counter()
+
+        counts = [result["frames"] for result in results]
+        for segment, count in zip(segments, counts):
+            if count != segment.frame_count:
+                print(f"Warning: Segment {segment.index} rendered {count} of {segment.frame_count} frames")
+        print("Segments rendered, joining...")
+
+        list_path = os.path.join(temp_dir, "segments.txt")
+        with open(list_path, "w") as f:
+            for path in paths:
+                escaped = path.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        cmd = ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_path:
+            cmd += ["-i", audio_path]
+        cmd += ["-map", "0:v:0", "-c:v", "copy"] + _codec_tag(video_args)
+        if audio_path:
+            cmd += ["-map", "1:a:0", "-c:a", "aac", "-shortest"]
+        cmd += ["-movflags", "+faststart", output_path]
+        joined = subprocess.run(cmd, capture_output=True)
+        if joined.returncode != 0:
+            raise RuntimeError(f"Joining segments failed: {joined.stderr.decode(errors='replace').strip()}")
+
+        if stats is not None:
+            for stage in ("decode", "composite", "encode"):
+                stats[stage] = sum(result[stage] for result in results)
+            stats["segments"] = rendered - started
+            stats["mux"] = time.perf_counter() - rendered
+        return sum(counts)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _share(image, directory: str, name: str):
+    # Linking keeps the files around even if the overlay cache evicts them mid-render
+    if isinstance(image, OverlayPlanes):
+        return MappedPlanes.pin(image, directory, name) or image
+    return image
+
+
+def _codec_tag(video_args: Optional[List[str]]) -> List[str]:
+    # Copying the video keeps the codec but not the tag the encoder was asked for (e.g. hvc1)
+    if video_args and "-tag:v" in video_args:
+        return ["-tag:v", video_args[video_args.index("-tag:v") + 1]]
+    return []
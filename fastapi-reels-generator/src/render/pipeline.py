@@ -0,0 +1,213 @@
+import queue
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from src.env import RENDER_PIPELINE_DEPTH
+
+# Marks the end of the stream in the stage queues
+_END = None
+
+
+class _Stopped(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+class FramePool:
+    """Fixed set of frame buffers reused for the whole render, so memory stays flat."""
+
+    def __init__(self, count: int, shape: Tuple[int, ...], dtype=np.uint8):
+        """
+        Allocate the buffers.
+
+        Args:
+            count: Number of buffers; frames in flight never exceed it.
+            shape: Shape of each buffer, e.g. (height, width, 3).
+            dtype: Element type of the buffers.
+        """
+        self.free: "queue.Queue[np.ndarray]" = queue.Queue()
+        for _ in range(count):
+            self.free.put(np.empty(shape, dtype=dtype))
+
+    def acquire(self, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Take a free buffer, waiting until one is released.
+
+        Args:
+            timeout: Seconds to wait; None waits forever.
+
+        Returns:
+            The buffer.
+
+        Raises:
+            queue.Empty: If no buffer was released in time.
+        """
+        return self.free.get(timeout=timeout)
+
+    def release(self, frame: np.ndarray):
+        """
+        Give a buffer back to the pool.
+
+        Args:
+            frame: A buffer taken with acquire.
+        """
+        self.free.put(frame)
+
+
+class FramePipeline:
+    """
+    Runs decoding, compositing and encoding as three overlapping stages.
+
+    Decoding and compositing each run on their own thread, and encoding runs on
+    the caller's. Frames move between them through bounded queues, so frame N+1
+    is decoded while N is composited and N-1 is encoded. OpenCV, NumPy and pipe
+    writes release the GIL, so the stages really run at the same time.
+
+    Frames live in a FramePool: a buffer is decoded into, blended in place,
+    encoded and then handed back to the decoder.
+
+    The time spent inside each stage's callable is added up in timings; the
+    stages overlap, so the totals can exceed the wall time of the render.
+    """
+
+    def __init__(
+        self,
+        read: Callable[[np.ndarray], bool],
+        composite: Callable[[np.ndarray], object],
+        write: Callable[[np.ndarray], None],
+        shape: Tuple[int, ...],
+        depth: int = RENDER_PIPELINE_DEPTH,
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            read: Decodes the next frame into the given buffer; returns False at the end of the video.
+            composite: Draws the overlays on a frame in place.
+            write: Encodes a frame; the buffer is reused once it returns.
+            shape: Shape of a frame, e.g. (height, width, 3).
+            depth: Frames each queue holds before the stage feeding it waits.
+        """
+        self.read = read
+        self.composite = composite
+        self.write = write
+        depth = max(1, depth)
+        self.decoded: queue.Queue = queue.Queue(maxsize=depth)
+        self.composited: queue.Queue = queue.Queue(maxsize=depth)
+        # Enough buffers for both queues to be full while each stage holds one
+        self.pool = FramePool(2 * depth + 3, shape)
+        self.timings = {"decode": 0.0, "composite": 0.0, "encode": 0.0}
+        self._failed = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def run(self, on_frame: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Render every frame.
+
+        Args:
+            on_frame: Called with the number of frames encoded so far, after each frame.
+
+        Returns:
+            The number of frames encoded.
+
+        Raises:
+            Exception: The first error raised by any stage; the other stages are stopped.
+        """
+        threads = [
+            threading.Thread(target=self._stage, args=(self._decode,), name="render-decode", daemon=True),
+            threading.Thread(target=self._stage, args=(self._composite,), name="render-composite", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        frames = 0
+        try:
+            while True:
+                frame = self._get(self.composited)
+                if frame is _END:
+                    break
+                started = time.perf_counter()
+                self.write(frame)
+                self.timings["encode"] += time.perf_counter() - started
+                self.pool.release(frame)
+                frames += 1
+                if on_frame is not None:
+                    on_frame(frames)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+        return frames
+
+    def _decode(self):
+        while True:
+            frame = self._acquire()
+            started = time.perf_counter()
+            ok = self.read(frame)
+            self.timings["decode"] += time.perf_counter() - started
+            if not ok:
+                self.pool.release(frame)
+                self._put(self.decoded, _END)
+                return
+            self._put(self.decoded, frame)
+
+    def _composite(self):
+        while True:
+            frame = self._get(self.decoded)
+            if frame is _END:
+                self._put(self.composited, _END)
+                return
+            started = time.perf_counter()
+            self.composite(frame)
+            self.timings["composite"] += time.perf_counter() - started
+            self._put(self.composited, frame)
+
+    def _stage(self, body: Callable[[], None]):
+        try:
+            body()
+        except _Stopped:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+    def _fail(self, error: BaseException):
+        # Keep the first error; the rest are usually consequences of it
+        if not self._failed.is_set():
+            self._error = error
+            self._failed.set()
+
+    # Blocking queue operations that give up once another stage has failed,
+    # so an error never leaves a thread waiting forever
+
+    def _acquire(self) -> np.ndarray:
+        while True:
+            self._check()
+            try:
+                return self.pool.acquire(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def _get(self, source: queue.Queue):
+        while True:
+            self._check()
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def _put(self, target: queue.Queue, item):
+        while True:
+            self._check()
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _check(self):
+        if self._failed.is_set():
+            raise _Stopped()
@@ -0,0 +1,149 @@
+import os
+import subprocess
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+
+from src.env import PREVIEW_FPS, PREVIEW_HEIGHT, PREVIEW_MAX_SECONDS
+from src.render.compositor import Compositor
+from src.render.ffmpeg_writer import FFmpegWriter
+from src.render.overlay_cache import OverlayCache, get_overlay_cache
+from src.render.pipeline import FramePipeline
+from src.test import prepare_overlays
+
+# Fastest x264 settings; previews are watched once and thrown away
+PREVIEW_VIDEO_ARGS = ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "28", "-pix_fmt", "yuv420p"]
+
+
+def preview_size(width: int, height: int, max_height: int = PREVIEW_HEIGHT) -> Tuple[int, int]:
+    """
+    Scale a frame size down to a preview height, keeping the aspect ratio.
+
+    Args:
+        width: Source width in pixels.
+        height: Source height in pixels.
+        max_height: Tallest preview wanted; smaller sources keep their size.
+
+    Returns:
+        The preview (width, height), both even as yuv420p requires.
+    """
+    scale = min(1.0, max_height / height)
+    return max(2, round(width * scale / 2) * 2), max(2, round(height * scale / 2) * 2)
+
+
+def render_preview(
+    video_path: str,
+    image_paths: List[str],
+    audio_path: Optional[str],
+    output_path: str,
+    image_scale: float = 0.5,
+    layout: str = "auto",
+    anchors: Optional[Sequence[Tuple[float, float]]] = None,
+    start: float = 0.0,
+    duration: float = PREVIEW_MAX_SECONDS,
+    max_height: int = PREVIEW_HEIGHT,
+    fps: float = PREVIEW_FPS,
+    stats: Optional[Dict[str, float]] = None,
+    overlay_cache: Optional[OverlayCache] = None,
+) -> str:
+    """
+    Render a quick, low-quality cut of a reel to check its layout.
+
+    Only the requested window is decoded. ffmpeg drops frames down to the preview
+    frame rate before scaling, so skipped frames are never scaled, composited or
+    encoded. Overlays are placed on the smaller frame with the same layout, and
+    the encoder uses x264's fastest preset.
+
+    Args:
+        video_path: Background video.
+        image_paths: Overlay images, any number.
+        audio_path: Audio track muxed into the preview, from the same point in time.
+        output_path: Where the preview is written.
+        image_scale: Overlay width as a fraction of the video width.
+        layout: How overlays are arranged (see plan_layout).
+        anchors: Overlay centers for the "anchors" layout.
+        start: Seconds into the video the preview starts at.
+        duration: Length of the preview in seconds.
+        max_height: Tallest preview frame; the width follows the video's aspect ratio.
+        fps: Highest preview frame rate; slower videos keep theirs.
+        stats: If given, filled with timings in seconds: "setup", "decode", "composite"
+            and "encode", plus "frames".
+        overlay_cache: Where prepared overlays are cached; defaults to the process's get_overlay_cache().
+
+    Returns:
+        The output path.
+
+    Raises:
+        ValueError: If the video cannot be opened, the layout is invalid or the window is past the end of the video.
+        RuntimeError: If decoding or encoding fails.
+    """
+    started = time.perf_counter()
+    if stats is None:
+        stats = {}
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError("Error opening video file")
+    source_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    source_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    source_fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+
+    width, height = preview_size(source_width, source_height, max_height)
+    if source_fps > 0:
+        fps = min(fps, source_fps)
+    images, placements = prepare_overlays(
+        image_paths, width, height, image_scale, layout, anchors, overlay_cache or get_overlay_cache()
+    )
+    compositor = Compositor(images, placements)
+    stats["setup"] = time.perf_counter() - started
+    print(f"Rendering a {duration:g}s preview from {start:g}s at {width}x{height}, {fps:g} fps...")
+
+    cmd = ["ffmpeg", "-loglevel", "error"]
+    if start > 0:
+        cmd += ["-ss", f"{start:.6f}"]
+    cmd += [
+        "-t", f"{duration:.6f}", "-i", video_path, "-map", "0:v:0",
+        "-vf", f"fps={fps},scale={width}:{height}:flags=fast_bilinear,format=bgr24",
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1",
+    ]
+    with tempfile.TemporaryFile() as stderr:
+        decoder = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            with FFmpegWriter(
+                output_path, width, height, fps, audio_path=audio_path, video_args=PREVIEW_VIDEO_ARGS, audio_start=start
+            ) as out:
+                pipeline = FramePipeline(
+                    read=lambda frame: decoder.stdout.readinto(frame.data) == frame.nbytes,
+                    composite=compositor.apply,
+                    write=out.write,
+                    shape=(height, width, 3),
+                )
+                frames = pipeline.run()
+                if frames == 0:
+                    raise ValueError(f"The video ends before {start:g}s")
+                flush_started = time.perf_counter()
+            # Leaving the writer waits for the encoder to finish the file
+            pipeline.timings["encode"] += time.perf_counter() - flush_started
+        finally:
+            decoder.stdout.close()
+            returncode = decoder.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"Decoding the preview failed: {stderr.read().decode(errors='replace').strip()}")
+
+    stats.update(pipeline.timings, frames=frames)
+    print(f"Preview of {frames} frames created at {output_path}")
+    return output_path
+
+
+def lower_priority(niceness: int):
+    """
+    Make the current process yield the CPU to full renders; used as a pool initializer.
+
+    Args:
+        niceness: How much to raise the process's nice value.
+    """
+    if niceness > 0 and hasattr(os, "nice"):
+        os.nice(niceness)
@@ -0,0 +1,292 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from src.db.database import Database
+from src.env import PREVIEW_NICE, PREVIEW_WORKERS, RENDER_POLL_SECONDS, RENDER_WORKERS
+from src.models.jobs.schema import JobCreateModel, JobStatus, RenderJob
+from src.models.jobs.service import JobService
+from src.models.reels.schema import ReelCreateModel
+from src.models.reels.service import ReelService
+from src.render.output_cache import OutputCache
+from src.render.preview import lower_priority, render_preview
+from src.render.worker import render_job
+
+
+class RenderQueue:
+    """
+    Runs render jobs on a pool of worker processes, off the API event loop.
+
+    The queue lives in the render_jobs table: each render process claims the
+    oldest waiting job when it is free, polling every poll_interval, so a job is
+    rendered by whichever process is idle, in any API worker or in a dedicated
+    process (python -m src.render.serve). A queue with no workers only accepts
+    jobs and leaves rendering to the others.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        workers: int = RENDER_WORKERS,
+        output_cache: Optional[OutputCache] = None,
+        poll_interval: float = RENDER_POLL_SECONDS,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            db: The Database instance used to track jobs and create reels.
+            workers: Number of render processes (and concurrent jobs); 0 to render none in this process.
+            output_cache: Finished renders reused by jobs with the same cache key, if any.
+            poll_interval: Seconds an idle worker waits before looking for jobs submitted elsewhere.
+        """
+        self.db = db
+        self.output_cache = output_cache
+        self.workers = max(0, workers)
+        self.poll_interval = poll_interval
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    async def start(self):
+        """Start the worker processes; they also pick up jobs left over from a previous run."""
+        if self.workers == 0:
+            print("Render queue started without workers; jobs are rendered by other processes.")
+            return
+        # Spawned workers only import the renderer, not a fork of the API process
+        self.executor = self._create_executor()
+        # One dispatcher per process, so a job is only marked running once a process is free
+        self.tasks = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        pending = len(await JobService(self.db).find_unfinished())
+        print(f"Render queue started with {self.workers} workers, {pending} jobs pending.")
+
+    async def submit(self, job_data: JobCreateModel) -> RenderJob:
+        """
+        Persist a job and queue it for rendering, unless its render already exists.
+
+        A job with a cache key first looks for the same user's pending or finished
+        job with that key, e.g. when a client retries, and returns it as is. Failing
+        that, a render cached for another job is reused and the job finishes at once.
+
+        Args:
+            job_data: The inputs of the render.
+
+        Returns:
+            The queued RenderJob, or an existing or already finished one.
+        """
+        jobs = JobService(self.db)
+        if job_data.cache_key:
+            existing = await jobs.find_reusable(job_data.user_id, job_data.cache_key)
+            loop = asyncio.get_running_loop()
+            if existing is not None and (
+                existing.status != JobStatus.SUCCEEDED.value
+                or await loop.run_in_executor(None, os.path.exists, existing.output)
+            ):
+                print(f"Render job {existing.id} reused for an identical request.")
+                return existing
+
+        job = await jobs.create(job_data)
+        if job.cache_key and self.output_cache is not None:
+            # Claimed first, so no other worker starts rendering it meanwhile
+            claimed = await jobs.claim(job.id)
+            if claimed is not None:
+                if await self._reuse_output(claimed):
+                    return await jobs.find_by_id(job.id)
+                job = await jobs.unclaim(job.id)
+        # Idle workers of this process start at once; other processes find it when they poll
+        self._wakeup.set()
+        return job
+
+    async def close(self):
+        """Stop dispatching and shut the worker processes down."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def _dispatch(self):
+        jobs = JobService(self.db)
+        while True:
+            # Cleared before looking, so a job submitted meanwhile still wakes this worker
+            self._wakeup.clear()
+            try:
+                job = await jobs.claim_next()
+            except Exception as e:
+                print(f"Render jobs could not be claimed: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Render job {job.id} could not be processed: {e}")
+
+    async def _run(self, job: RenderJob):
+        job_id = job.id
+        jobs = JobService(self.db)
+        # An identical job may have finished while this one waited
+        if await self._reuse_output(job):
+            return
+
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        # Render beside the output and rename it into place: the output may be a hard
+        # link to a cached render, which writing to it directly would truncate
+        root, extension = os.path.splitext(job.output)
+        render_path = f"{root}.{uuid.uuid4().hex}.rendering{extension}"
+        try:
+            await loop.run_in_executor(
+                executor,
+                render_job,
+                job.video,
+                list(job.images),
+                job.audio,
+                render_path,
+                job.image_scale,
+                job.layout,
+                job.anchors,
+                job.encoder_profile,
+            )
+            await loop.run_in_executor(None, os.replace, render_path, job.output)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. OOM killed); replace the pool so later jobs can still run
+            print(f"Render job {job_id} failed, restarting render workers: {e}")
+            if self.executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = self._create_executor()
+            await jobs.mark_failed(job_id, "Render worker crashed.")
+            return
+        except Exception as e:
+            print(f"Render job {job_id} failed: {e}")
+            await jobs.mark_failed(job_id, str(e))
+            return
+        finally:
+            await loop.run_in_executor(None, self._remove, render_path)
+
+        # Only a render that became a reel is worth reusing
+        if await self._finish(job) and job.cache_key and self.output_cache is not None:
+            await loop.run_in_executor(None, self.output_cache.put, job.cache_key, job.output)
+
+    async def _reuse_output(self, job: RenderJob) -> bool:
+        # Finish a job straight away from a cached render with the same key
+        if not job.cache_key or self.output_cache is None:
+            return False
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self.output_cache.get, job.cache_key, job.output):
+            return False
+        print(f"Render job {job.id} served from the render cache.")
+        # Finished either way: a failure to create the reel has marked the job failed
+        await self._finish(job)
+        return True
+
+    async def _finish(self, job: RenderJob) -> bool:
+        # Create the reel for a rendered job; a job must never stay running because this failed
+        jobs = JobService(self.db)
+        try:
+            reel = await ReelService(self.db).create(
+                ReelCreateModel(title=job.title, file=job.output, user_id=job.user_id),
+                asset_paths=[job.video, job.audio, *job.images],
+            )
+            await jobs.mark_succeeded(job.id, reel.id)
+        except Exception as e:
+            print(f"Render job {job.id} rendered, but its reel could not be created: {e}")
+            await jobs.mark_failed(job.id, f"Reel could not be created: {e}")
+            return False
+        print(f"Render job {job.id} finished, reel {reel.id} created.")
+        return True
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class PreviewPool:
+    """
+    Renders previews on their own worker processes, answering the request directly.
+
+    Previews never wait behind queued render jobs. Their processes run at a
+    lower CPU priority, so a burst of previews slows full renders down as
+    little as possible.
+    """
+
+    def __init__(self, workers: int = PREVIEW_WORKERS, niceness: int = PREVIEW_NICE):
+        """
+        Initialize the pool.
+
+        Args:
+            workers: Number of preview processes (and concurrent previews).
+            niceness: How much lower than the API's the processes' CPU priority is.
+        """
+        self.workers = max(1, workers)
+        self.niceness = niceness
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    async def start(self):
+        """Start the worker processes and have them import the renderer ahead of the first preview."""
+        self.executor = self._create_executor()
+        self._warm_up()
+        print(f"Preview pool started with {self.workers} workers.")
+
+    async def close(self):
+        """Shut the worker processes down."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def render(self, *args, **kwargs) -> str:
+        """
+        Render a preview on a worker process.
+
+        Args:
+            *args: Positional arguments of render_preview.
+            **kwargs: Keyword arguments of render_preview.
+
+        Returns:
+            The output path.
+
+        Raises:
+            RuntimeError: If the worker process died.
+            Exception: Any error raised by render_preview.
+        """
+        executor = self.executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, functools.partial(render_preview, *args, **kwargs)
+            )
+        except BrokenProcessPool as e:
+            print(f"Preview failed, restarting preview workers: {e}")
+            if self.executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = self._create_executor()
+                self._warm_up()
+            raise RuntimeError("Preview worker crashed.") from e
+
+    def _warm_up(self):
+        # Unpickling the call imports the renderer; nothing waits for the result
+        for _ in range(self.workers):
+            self.executor.submit(lower_priority, 0)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=lower_priority,
+            initargs=(self.niceness,),
+        )
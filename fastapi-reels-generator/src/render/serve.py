@@ -0,0 +1,38 @@
+import argparse
+import asyncio
+
+from src.db.database import Database
+from src.env import RENDER_WORKERS
+from src.render.output_cache import create_output_cache
+from src.render.queue import RenderQueue
+
+
+async def serve(workers: int):
+    """
+    Render queued jobs until interrupted, outside any API process.
+
+    Run one of these with RENDER_WORKERS=0 in the API processes, so the number of
+    render processes does not grow with the number of API workers.
+
+    Args:
+        workers: Number of render processes.
+    """
+    db = Database()
+    await db.init_db()
+    queue = RenderQueue(db, workers=max(1, workers), output_cache=create_output_cache())
+    await queue.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await queue.close()
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render queued reel jobs in a dedicated process.")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS, help="Number of render processes.")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,41 @@
+from typing import List, Optional, Sequence, Tuple
+
+from src.env import RENDER_SEGMENT_WORKERS
+from src.test import create_reel
+
+
+def render_job(
+    video: str,
+    images: List[str],
+    audio: str,
+    output: str,
+    image_scale: float,
+    layout: str = "auto",
+    anchors: Optional[Sequence[Tuple[float, float]]] = None,
+    encoder_profile: Optional[str] = None,
+) -> str:
+    """
+    Render one job inside a worker process.
+
+    This module only imports the renderer, so spawning a worker does not pull in
+    the web app or the database layer. With RENDER_SEGMENT_WORKERS above 1 the
+    job is split into segments rendered by that many further processes.
+
+    Args:
+        video: Background video path.
+        images: Overlay image paths.
+        audio: Audio track path.
+        output: Where the reel is written.
+        image_scale: Overlay width as a fraction of the video width.
+        layout: How overlays are arranged (see plan_layout).
+        anchors: Overlay centers for the "anchors" layout.
+        encoder_profile: Name of the encoder profile; defaults to DEFAULT_ENCODER_PROFILE.
+
+    Returns:
+        The output path.
+    """
+    mode = "parallel" if RENDER_SEGMENT_WORKERS > 1 else "pipe"
+    return create_reel(
+        video, images, audio, output, image_scale=image_scale, mode=mode, layout=layout, anchors=anchors,
+        encoder_profile=encoder_profile,
+    )
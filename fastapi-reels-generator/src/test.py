@@ -2,9 +2,105 @@ import cv2
 import numpy as np
 import subprocess
 import os
-
-def create_reel(video_path, image_paths, audio_path, output_path, image_scale=0.5):
+import tempfile
+import time
+
+from src.env import RENDER_SEGMENT_WORKERS
+from src.render.compositor import Compositor
+from src.render.encoding import EncoderProfile, get_encoder_profile
+from src.render.layout import plan_layout, validate_layout
+from src.render.overlay_cache import get_overlay_cache
+from src.render.ffmpeg_writer import FFmpegWriter
+from src.render.parallel import render_parallel
+from src.render.pipeline import FramePipeline
+
+def prepare_overlays(image_paths, width, height, image_scale, layout, anchors, cache):
+    """
+    Load, size and place the overlays of a reel.
+
+    Args:
+        image_paths: Overlay images, any number.
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+        image_scale: Overlay width as a fraction of the frame width.
+        layout: How overlays are arranged (see plan_layout).
+        anchors: Overlay centers for the "anchors" layout.
+        cache: The overlay cache the prepared overlays come from.
+
+    Returns:
+        The overlays' planes, indexed like image_paths (None for hidden ones), and their placements.
+
+    Raises:
+        ValueError: If the layout is invalid or an image cannot be loaded.
+    """
+    # Check the layout before decoding anything
+    validate_layout(layout, len(image_paths), anchors)
+
+    # Identify images by content and work out their size (scale relative to video width)
+    sources = []
+    sizes = []
+    for i, image_path in enumerate(image_paths):
+        print(f"Loading image {i+1} from {image_path}...")
+        source = cache.source(image_path)
+        print(f"Image {i+1} loaded successfully.")
+
+        new_width = int(width * image_scale)
+        new_height = int(source.height * (new_width / source.width))
+        sources.append(source)
+        sizes.append((new_width, new_height))
+
+    # Place every overlay once; the frame loop only blits precomputed slices
+    placements = plan_layout(width, height, sizes, layout, anchors)
+    images = [None] * len(sources)
+    for placement in placements:
+        # Grid and stack layouts may have shrunk the overlay to fit its cell.
+        # Resized, premultiplied overlays come from the cache when already seen
+        images[placement.index] = cache.planes(sources[placement.index], placement.width, placement.height)
+        print(
+            f"Image {placement.index+1} resized to width={placement.width}, height={placement.height}"
+            f" and placed at x={placement.x}, y={placement.y}"
+        )
+    return images, placements
+
+def create_reel(
+    video_path, image_paths, audio_path, output_path, image_scale=0.5, mode="pipe", layout="auto", anchors=None,
+    segment_workers=None, stats=None, overlay_cache=None, encoder_profile=None,
+):
+    """
+    Render a reel: overlay images on a background video and add an audio track.
+
+    Args:
+        video_path: Background video.
+        image_paths: Overlay images, any number.
+        audio_path: Audio track muxed into the output.
+        output_path: Where the finished reel is written.
+        image_scale: Overlay width as a fraction of the video width.
+        mode: "pipe" streams raw frames into a single ffmpeg encode+mux pass;
+            "remux" writes an mp4v temp file and muxes the audio afterwards;
+            "parallel" renders keyframe-aligned segments in a process pool and joins them (see render_parallel).
+        layout: How overlays are arranged: "auto", "grid", "stack" or "anchors" (see plan_layout).
+        anchors: Overlay centers as (x, y) fractions of the frame, for the "anchors" layout.
+        segment_workers: Processes used by the "parallel" mode; defaults to RENDER_SEGMENT_WORKERS.
+        stats: If given, filled with timings in seconds: "setup" (probing, loading and placing
+            overlays), "decode", "composite", "encode" and "mux", plus "frames". Pipelined
+            stages overlap, so their sum can exceed the wall time; the pipe mode muxes
+            while encoding, so its "mux" is 0.
+        overlay_cache: Where prepared overlays are cached; defaults to the process's get_overlay_cache().
+        encoder_profile: An EncoderProfile or a profile's name; defaults to DEFAULT_ENCODER_PROFILE.
+            The "remux" mode always encodes mp4v.
+
+    Returns:
+        The output path.
+
+    Raises:
+        Exception: Any error raised while rendering, after it has been logged.
+    """
     try:
+        started = time.perf_counter()
+        if stats is None:
+            stats = {}
+        if not isinstance(encoder_profile, EncoderProfile):
+            encoder_profile = get_encoder_profile(encoder_profile)
         print(f"Loading video from {video_path}...")
         # Load the video
         cap = cv2.VideoCapture(video_path)
@@ -19,124 +115,96 @@ def create_reel(video_path, image_paths, audio_path, output_path, image_scale=0.
         frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         print(f"Video properties: width={width}, height={height}, fps={fps}, frame_count={frame_count}")
 
-        # Validate number of images
-        num_images = len(image_paths)
-        if num_images not in [1, 2, 3]:
-            raise ValueError(f"Expected 1, 2, or 3 images, got {num_images}")
-
-        # Load and resize images
-        images = []
-        positions = []
-        for i, image_path in enumerate(image_paths):
-            print(f"Loading image {i+1} from {image_path}...")
-            image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
-            if image is None:
-                raise ValueError(f"Error loading image {image_path}")
-            print(f"Image {i+1} loaded successfully.")
-
-            # Resize image (scale relative to video width)
-            img_height, img_width = image.shape[:2]
-            new_width = int(width * image_scale)
-            new_height = int(img_height * (new_width / img_width))
-            image = cv2.resize(image, (new_width, new_height))
-            images.append(image)
-            print(f"Image {i+1} resized to width={new_width}, height={new_height}")
-
-        # Calculate positions based on number of images
-        if num_images == 1:
-            # Single image: Center
-            x_offset = (width - images[0].shape[1]) // 2
-            y_offset = (height - images[0].shape[0]) // 2
-            positions.append((x_offset, y_offset))
-
-        elif num_images == 2:
-            # Two images: Center-top and center-bottom
-            img_width, img_height = images[0].shape[1], images[0].shape[0]
-            # Center-top (10% from top)
-            x_offset_top = (width - img_width) // 2
-            y_offset_top = int(height * 0.1)
-            # Center-bottom (10% from bottom)
-            x_offset_bottom = (width - img_width) // 2
-            y_offset_bottom = height - img_height - int(height * 0.1)
-            positions = [(x_offset_top, y_offset_top), (x_offset_bottom, y_offset_bottom)]
-
-        elif num_images == 3:
-            # Three images: Center-top, two at center-bottom (evenly spaced)
-            img_width, img_height = images[0].shape[1], images[0].shape[0]
-            # Center-top (10% from top)
-            x_offset_top = (width - img_width) // 2
-            y_offset_top = int(height * 0.1)
-            # Two images at center-bottom (10% from bottom, evenly spaced)
-            spacing = img_width // 2  # Space between bottom images
-            x_offset_bottom1 = (width - 2 * img_width - spacing) // 2
-            x_offset_bottom2 = x_offset_bottom1 + img_width + spacing
-            y_offset_bottom = height - img_height - int(height * 0.1)
-            positions = [(x_offset_top, y_offset_top), (x_offset_bottom1, y_offset_bottom), (x_offset_bottom2, y_offset_bottom)]
-
-        # Print positions for debugging
-        for i, (x, y) in enumerate(positions):
-            print(f"Image {i+1} will be placed at x={x}, y={y}")
+        images, placements = prepare_overlays(
+            image_paths, width, height, image_scale, layout, anchors, overlay_cache or get_overlay_cache()
+        )
+        stats["setup"] = time.perf_counter() - started
+
+        if mode == "parallel":
+            # Segments are decoded by ffmpeg in the workers; only the probed properties are needed here
+            cap.release()
+            rendered = render_parallel(
+                video_path, images, placements, width, height, fps, audio_path, output_path,
+                workers=segment_workers or RENDER_SEGMENT_WORKERS, stats=stats,
+                video_args=encoder_profile.video_args(),
+            )
+            stats["frames"] = rendered
+            print(f"Video processing complete, {rendered} frames rendered.")
+            print(f"Reel created successfully at {output_path}")
+            return output_path
+
+        # Precompute the blend planes once for the whole clip, merging overlapping overlays
+        compositor = Compositor(images, placements)
+        print(f"Overlays drawn as {len(compositor.overlays)} regions covering {compositor.covered_pixels} pixels per frame.")
 
         # Prepare output video
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        temp_video = "temp_video.mp4"
-        out = cv2.VideoWriter(temp_video, fourcc, fps, (width, height))
+        if mode == "pipe":
+            # Frames go straight into one ffmpeg process that encodes and muxes audio
+            out = FFmpegWriter(output_path, width, height, fps, audio_path=audio_path, video_args=encoder_profile.video_args())
+            temp_video = None
+        elif mode == "remux":
+            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+            # Unique temp file next to the output so concurrent renders never collide
+            fd, temp_video = tempfile.mkstemp(suffix=".mp4", dir=os.path.dirname(os.path.abspath(output_path)))
+            os.close(fd)
+            out = cv2.VideoWriter(temp_video, fourcc, fps, (width, height))
+        else:
+            raise ValueError(f"Unknown render mode {mode}")
         print("Output video initialized.")
 
-        # Process each frame
-        frame_count = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frame_count += 1
-            print(f"Processing frame {frame_count}...")
-
-            # Overlay each image
-            for img, (x_offset, y_offset) in zip(images, positions):
-                img_height, img_width = img.shape[:2]
-                # Ensure the image fits within the frame
-                if x_offset < 0 or y_offset < 0 or x_offset + img_width > width or y_offset + img_height > height:
-                    print(f"Warning: Image at ({x_offset}, {y_offset}) exceeds frame boundaries")
-                    continue
-
-                # If image has alpha channel (RGBA), handle transparency
-                if img.shape[2] == 4:
-                    img_rgb = img[:, :, :3]
-                    alpha = img[:, :, 3] / 255.0
-                    roi = frame[y_offset:y_offset+img_height, x_offset:x_offset+img_width]
-                    for c in range(3):
-                        roi[:, :, c] = (alpha * img_rgb[:, :, c] + (1 - alpha) * roi[:, :, c]).astype(np.uint8)
-                    frame[y_offset:y_offset+img_height, x_offset:x_offset+img_width] = roi
-                else:
-                    frame[y_offset:y_offset+img_height, x_offset:x_offset+img_width] = img
-
-            # Write frame to output video
-            out.write(frame)
-
-        # Release video objects
-        cap.release()
-        out.release()
+        def read(frame):
+            ret, decoded = cap.read(frame)
+            if ret and decoded is not frame:
+                # OpenCV allocated a new array instead of filling ours
+                frame[...] = decoded
+            return ret
+
+        def report(processed):
+            if processed % 100 == 0:
+                print(f"Processed {processed} frames...")
+
+        # Decode, overlay and encode on overlapping threads, reusing a fixed set of frame buffers
+        pipeline = FramePipeline(
+            read=read,
+            composite=compositor.apply,
+            write=out.write,
+            shape=(height, width, 3),
+        )
+        try:
+            frame_count = pipeline.run(on_frame=report)
+        finally:
+            # Release video objects; the writer finishes encoding here
+            cap.release()
+            flush_started = time.perf_counter()
+            out.release()
+            pipeline.timings["encode"] += time.perf_counter() - flush_started
         cv2.destroyAllWindows()
+        stats.update(pipeline.timings, frames=frame_count, mux=0.0)
         print("Video processing complete.")
 
-        # Add audio using FFmpeg
-        print("Adding audio to output video...")
-        ffmpeg_cmd = [
-            "ffmpeg", "-i", temp_video, "-i", audio_path, "-c:v", "copy",
-            "-c:a", "aac", "-map", "0:v:0", "-map", "1:a:0", "-shortest", output_path
-        ]
-        subprocess.run(ffmpeg_cmd, check=True)
-        print("Audio added successfully.")
-
-        # Clean up temporary video
-        os.remove(temp_video)
-        print("Temporary video removed.")
+        if temp_video is not None:
+            mux_started = time.perf_counter()
+            try:
+                # Add audio using FFmpeg
+                print("Adding audio to output video...")
+                ffmpeg_cmd = [
+                    "ffmpeg", "-y", "-i", temp_video, "-i", audio_path, "-c:v", "copy",
+                    "-c:a", "aac", "-map", "0:v:0", "-map", "1:a:0", "-shortest", output_path
+                ]
+                subprocess.run(ffmpeg_cmd, check=True)
+                print("Audio added successfully.")
+            finally:
+                # Clean up temporary video
+                os.remove(temp_video)
+                print("Temporary video removed.")
+            stats["mux"] = time.perf_counter() - mux_started
 
         print(f"Reel created successfully at {output_path}")
+        return output_path
 
     except Exception as e:
         print(f"An error occurred: {e}")
+        raise
 
 # Example usage for each setup
 if __name__ == "__main__":
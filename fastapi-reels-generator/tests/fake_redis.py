@@ -0,0 +1,151 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.db.redis_cache import DELETE_IF_EQUAL_SCRIPT, INCR_SCRIPT, SET_IF_EQUAL_SCRIPT
+
+
+class FakeRedisServer:
+    """
+    In-process asyncio server speaking just enough RESP to exercise RedisCacheBackend.
+
+    Supports GET, SET (with NX and PX), DEL, PUBLISH, SUBSCRIBE, AUTH, SELECT and
+    PING, and EVAL of RedisCacheBackend's own scripts, which run as their Python
+    equivalents. Every database shares one keyspace.
+    """
+
+    def __init__(self, password: Optional[str] = None):
+        """
+        Initialize the server; call start() to listen.
+
+        Args:
+            password: If set, clients must AUTH with it before any other command.
+        """
+        self.password = password
+        self.port: Optional[int] = None
+        self.store: Dict[bytes, Tuple[float, bytes]] = {}
+        self.subscribers: Dict[bytes, List[asyncio.StreamWriter]] = {}
+        self.auth_failures = 0
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{self.port}/0"
+
+    async def start(self):
+        """Listen on a free local port."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stop listening and drop every client."""
+        for writer in list(self.clients):
+            writer.close()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.clients.add(writer)
+        authenticated = self.password is None
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                command = args[0].upper()
+                if command == b"AUTH":
+                    authenticated = args[-1].decode() == self.password
+                    if authenticated:
+                        writer.write(b"+OK\r\n")
+                    else:
+                        self.auth_failures += 1
+                        writer.write(b"-WRONGPASS invalid username-password pair\r\n")
+                elif not authenticated:
+                    writer.write(b"-NOAUTH Authentication required.\r\n")
+                else:
+                    writer.write(self._execute(command, args[1:], writer))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            for writers in self.subscribers.values():
+                if writer in writers:
+                    writers.remove(writer)
+            writer.close()
+
+    def _execute(self, command: bytes, args: List[bytes], writer: asyncio.StreamWriter) -> bytes:
+        if command == b"GET":
+            return self._bulk(self._live(args[0]))
+        if command == b"SET":
+            key, value, options = args[0], args[1], [arg.upper() for arg in args[2:]]
+            ttl = int(args[2 + options.index(b"PX") + 1]) / 1000 if b"PX" in options else float("inf")
+            if b"NX" in options and self._live(key) is not None:
+                return b"$-1\r\n"
+            self.store[key] = (time.monotonic() + ttl, value)
+            return b"+OK\r\n"
+        if command == b"DEL":
+            removed = sum(1 for key in args if self._live(key) is not None and self.store.pop(key))
+            return b":%d\r\n" % removed
+        if command == b"PUBLISH":
+            channel, message = args
+            writers = self.subscribers.get(channel, [])
+            for subscriber in writers:
+                subscriber.write(b"*3\r\n" + self._bulk(b"message") + self._bulk(channel) + self._bulk(message))
+            return b":%d\r\n" % len(writers)
+        if command == b"SUBSCRIBE":
+            replies = []
+            for count, channel in enumerate(args, start=1):
+                self.subscribers.setdefault(channel, []).append(writer)
+                replies.append(b"*3\r\n" + self._bulk(b"subscribe") + self._bulk(channel) + b":%d\r\n" % count)
+            return b"".join(replies)
+        if command == b"EVAL":
+            return self._eval(args[0].decode(), args[2:2 + int(args[1])], args[2 + int(args[1]):])
+        if command in (b"SELECT", b"PING"):
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % command
+
+    def _eval(self, script: str, keys: List[bytes], argv: List[bytes]) -> bytes:
+        if script == SET_IF_EQUAL_SCRIPT:
+            if (self._live(keys[1]) or b"") != argv[2]:
+                return b":0\r\n"
+            self.store[keys[0]] = (time.monotonic() + int(argv[1]) / 1000, argv[0])
+            return b":1\r\n"
+        if script == DELETE_IF_EQUAL_SCRIPT:
+            if self._live(keys[0]) != argv[0]:
+                return b":0\r\n"
+            del self.store[keys[0]]
+            return b":1\r\n"
+        if script == INCR_SCRIPT:
+            value = int(self._live(keys[0]) or 0) + 1
+            self.store[keys[0]] = (time.monotonic() + int(argv[0]) / 1000, str(value).encode())
+            return b":%d\r\n" % value
+        return b"-NOSCRIPT unknown script\r\n"
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self.store[key]
+            return None
+        return entry[1]
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    @staticmethod
+    def _bulk(value: Optional[bytes]) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
@@ -0,0 +1,81 @@
+import numpy as np
+
+from src.render.compositor import Compositor, OverlayPlanes
+from src.render.layout import plan_layout
+
+
+def reference_blend(frame, overlays, placements):
+    """Blend overlays one after another with straight alpha, in float."""
+    result = frame.astype(np.float64)
+    for placement in placements:
+        overlay = overlays[placement.index][placement.source].astype(np.float64)
+        if overlay.shape[2] == 4:
+            alpha = overlay[:, :, 3:4] / 255
+        else:
+            alpha = np.ones(overlay.shape[:2] + (1,))
+        roi = result[placement.target]
+        result[placement.target] = roi * (1 - alpha) + overlay[:, :, :3] * alpha
+    return result
+
+
+def random_frame(rng, height=90, width=160):
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def test_single_overlay_matches_an_alpha_blend_exactly():
+    rng = np.random.default_rng(1)
+    frame = random_frame(rng)
+    overlay = rng.integers(0, 256, (40, 60, 4), dtype=np.uint8)
+    placements = plan_layout(160, 90, [(60, 40)], layout="anchors", anchors=[(0.9, 0.1)])
+
+    result = Compositor([overlay], placements).apply(frame.copy())
+    expected = reference_blend(frame, [overlay], placements)
+    assert np.array_equal(result, np.floor(expected + 0.5).astype(np.uint8))
+
+
+def test_merged_overlays_match_an_alpha_blend():
+    rng = np.random.default_rng(2)
+    frame = random_frame(rng)
+    overlays = [rng.integers(0, 256, (50, 70, 4), dtype=np.uint8) for _ in range(3)]
+    overlays.append(rng.integers(0, 256, (30, 30, 3), dtype=np.uint8))
+    anchors = [(0.5, 0.5), (0.55, 0.5), (0.5, 0.55), (0.52, 0.52)]
+    placements = plan_layout(160, 90, [(70, 50)] * 3 + [(30, 30)], layout="anchors", anchors=anchors)
+
+    compositor = Compositor(overlays, placements)
+    # The stacked overlays are flattened into one tile
+    assert len(compositor.overlays) == 1
+    result = compositor.apply(frame.copy()).astype(np.int16)
+    expected = reference_blend(frame, overlays, placements)
+    # Rounding once instead of per layer moves pixels by about a level per stacked overlay
+    assert np.abs(result - expected).max() <= len(overlays)
+    untouched = np.ones(frame.shape[:2], dtype=bool)
+    for placement in placements:
+        untouched[placement.target] = False
+    assert np.array_equal(result[untouched], frame[untouched])
+
+
+def test_precomputed_planes_blend_like_images():
+    rng = np.random.default_rng(3)
+    frame = random_frame(rng)
+    overlays = [rng.integers(0, 256, (20, 20, 4), dtype=np.uint8), rng.integers(0, 256, (20, 20, 3), dtype=np.uint8)]
+    placements = plan_layout(160, 90, [(20, 20)] * 2, layout="anchors", anchors=[(0.2, 0.2), (0.8, 0.8)])
+
+    from_images = Compositor(overlays, placements).apply(frame.copy())
+    from_planes = Compositor([OverlayPlanes.from_image(o) for o in overlays], placements).apply(frame.copy())
+    assert np.array_equal(from_images, from_planes)
+
+
+def test_transparent_borders_and_overlays_are_dropped():
+    overlay = np.zeros((40, 40, 4), dtype=np.uint8)
+    overlay[10:20, 5:15] = 255
+    hidden = np.zeros((40, 40, 4), dtype=np.uint8)
+    placements = plan_layout(160, 90, [(40, 40)] * 2, layout="anchors", anchors=[(0.25, 0.5), (0.75, 0.5)])
+
+    compositor = Compositor([overlay, hidden], placements)
+    assert compositor.covered_pixels == 10 * 10
+    (tile,) = compositor.overlays
+    # Fully opaque after trimming: a plain copy
+    assert tile.opaque is not None
+    frame = np.zeros((90, 160, 3), dtype=np.uint8)
+    compositor.apply(frame)
+    assert frame.sum() == 10 * 10 * 3 * 255
@@ -0,0 +1,78 @@
+import pytest
+
+from src.render.layout import _clip, plan_layout, validate_layout
+
+
+def test_single_overlay_is_centered():
+    (placement,) = plan_layout(1080, 1920, [(400, 300)])
+    assert (placement.x, placement.y, placement.width, placement.height) == (340, 810, 400, 300)
+    assert placement.source == (slice(0, 300), slice(0, 400))
+    assert placement.target == (slice(810, 1110), slice(340, 740))
+
+
+def test_classic_templates_place_top_then_bottom():
+    top, bottom = plan_layout(1000, 2000, [(200, 100), (200, 100)])
+    assert (top.x, top.y) == (400, 200)
+    assert (bottom.x, bottom.y) == (400, 1700)
+
+    top, left, right = plan_layout(1000, 2000, [(200, 100)] * 3)
+    assert left.y == right.y == 1700
+    assert (left.x, right.x) == (250, 550)
+
+
+def test_grid_shrinks_overlays_into_their_cells():
+    placements = plan_layout(1000, 1000, [(1000, 500)] * 4, layout="grid")
+    # 2 x 2 cells of 400 x 400 inside a 100 pixel margin
+    assert [(p.width, p.height) for p in placements] == [(400, 200)] * 4
+    assert [(p.x, p.y) for p in placements] == [(100, 200), (500, 200), (100, 600), (500, 600)]
+
+
+def test_auto_uses_a_grid_beyond_three_overlays():
+    assert plan_layout(1000, 1000, [(50, 50)] * 4) == plan_layout(1000, 1000, [(50, 50)] * 4, layout="grid")
+
+
+def test_stack_is_one_column():
+    placements = plan_layout(1000, 1000, [(100, 100)] * 4, layout="stack")
+    assert {p.x for p in placements} == {450}
+    assert [p.y for p in placements] == [150, 350, 550, 750]
+
+
+def test_anchors_center_overlays_and_leave_out_those_outside():
+    placements = plan_layout(1000, 1000, [(100, 100), (100, 100)], layout="anchors", anchors=[(0.25, 0.5), (1.0, 1.0)])
+    assert (placements[0].x, placements[0].y) == (200, 450)
+    # Centered on the corner: only its top-left quarter is visible
+    assert placements[1].source == (slice(0, 50), slice(0, 50))
+    assert placements[1].target == (slice(950, 1000), slice(950, 1000))
+
+
+def test_no_overlays():
+    assert plan_layout(1000, 1000, []) == []
+
+
+def test_clip_crops_overlays_hanging_over_the_edges():
+    placement = _clip(0, -30, 80, 100, 50, 200, 100)
+    assert (placement.x, placement.y, placement.width, placement.height) == (-30, 80, 100, 50)
+    assert placement.source == (slice(0, 20), slice(30, 100))
+    assert placement.target == (slice(80, 100), slice(0, 70))
+
+
+@pytest.mark.parametrize("x, y", [(200, 0), (0, 100), (-100, 0), (0, -50)])
+def test_clip_skips_overlays_outside_the_frame(x, y):
+    assert _clip(0, x, y, 100, 50, 200, 100) is None
+
+
+@pytest.mark.parametrize(
+    "layout, count, anchors, message",
+    [
+        ("spiral", 1, None, "Unknown layout spiral"),
+        ("anchors", 2, None, "Expected 2 anchors, got 0"),
+        ("anchors", 2, [(0.5, 0.5)], "Expected 2 anchors, got 1"),
+        ("anchors", 1, [(0.5, 1.5)], "between 0 and 1"),
+        ("anchors", 1, [(0.5,)], "between 0 and 1"),
+    ],
+)
+def test_invalid_layouts_are_rejected(layout, count, anchors, message):
+    with pytest.raises(ValueError, match=message):
+        validate_layout(layout, count, anchors)
+    with pytest.raises(ValueError, match=message):
+        plan_layout(1000, 1000, [(10, 10)] * count, layout=layout, anchors=anchors)
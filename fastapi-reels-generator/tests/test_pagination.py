@@ -0,0 +1,64 @@
+import asyncio
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from src.common.pagination import decode_cursor, encode_cursor, to_naive_utc
+from src.db.repository import Repository
+from src.models.reels import controller
+from src.models.reels.schema import Reel
+
+
+class CursorOnlyReelService:
+    """Answers the version query itself, so a page request only gets as far as reading the cursor."""
+
+    def __init__(self):
+        self.repository = Repository(Reel, db=None)
+
+    def snapshot(self):
+        return nullcontext()
+
+    async def find_all_etag(self, limit, cursor=None, *filters):
+        return '"1"'
+
+    async def find_all(self, limit, cursor=None, *filters):
+        return await self.repository.find_page(limit, cursor)
+
+
+def test_cursor_round_trips():
+    id = uuid.uuid4()
+    created_at = datetime(2024, 3, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(created_at, id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, id)
+
+
+def test_cursor_with_timezone_decodes_to_naive_utc():
+    id = uuid.uuid4()
+    created_at = datetime(2024, 3, 1, 14, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert decode_cursor(encode_cursor(created_at, id)) == (datetime(2024, 3, 1, 12, 30), id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "W10", encode_cursor(datetime(2024, 1, 1), uuid.uuid4())[:-4]])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_malformed_cursor_is_a_bad_request():
+    request = SimpleNamespace(headers={})
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(controller.find_all(request, limit=10, cursor="bm90IGEgY3Vyc29y", reel_service=CursorOnlyReelService()))
+    assert error.value.status_code == 400
+    assert "Invalid cursor" in error.value.detail
+
+
+def test_to_naive_utc():
+    naive = datetime(2024, 3, 1, 12, 0)
+    assert to_naive_utc(naive) is naive
+    assert to_naive_utc(datetime(2024, 3, 1, 7, 0, tzinfo=timezone(timedelta(hours=-5)))) == naive
+    assert to_naive_utc(datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)).tzinfo is None
@@ -0,0 +1,41 @@
+from fractions import Fraction
+
+from src.render.parallel import plan_segments
+
+
+def frame_times(count, fps=30):
+    return [Fraction(i, fps) for i in range(count)]
+
+
+def test_segments_start_on_the_nearest_keyframes():
+    # A keyframe every second at 30 fps
+    segments = plan_segments(frame_times(300), list(range(0, 300, 30)), workers=4, min_frames=30)
+    # Ideal splits at 75, 150 and 225 frames
+    assert [s.start_frame for s in segments] == [0, 60, 150, 210]
+    assert [s.frame_count for s in segments] == [60, 90, 60, 90]
+    assert [s.index for s in segments] == [0, 1, 2, 3]
+    assert [s.start_time for s in segments] == [0.0, 2.0, 5.0, 7.0]
+
+
+def test_segments_cover_every_frame_once():
+    segments = plan_segments(frame_times(1000), [0, 13, 250, 251, 600, 999], workers=6, min_frames=10)
+    assert segments[0].start_frame == 0
+    for previous, segment in zip(segments, segments[1:]):
+        assert segment.start_frame == previous.start_frame + previous.frame_count
+    assert sum(s.frame_count for s in segments) == 1000
+
+
+def test_short_videos_use_fewer_segments():
+    keyframes = list(range(0, 100, 10))
+    assert len(plan_segments(frame_times(100), keyframes, workers=8, min_frames=30)) == 3
+    assert len(plan_segments(frame_times(100), keyframes, workers=8, min_frames=300)) == 1
+
+
+def test_splits_sharing_a_keyframe_are_merged():
+    segments = plan_segments(frame_times(300), [0, 150], workers=4, min_frames=1)
+    assert [(s.start_frame, s.frame_count) for s in segments] == [(0, 150), (150, 150)]
+
+
+def test_single_keyframe_gives_one_segment():
+    (segment,) = plan_segments(frame_times(300), [0], workers=4, min_frames=1)
+    assert (segment.start_frame, segment.frame_count, segment.start_time) == (0, 300, 0.0)
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from fake_redis import FakeRedisServer
+from src.common.cache import LookupCache
+from src.db.interfaces.cache_backend import CacheBackendError
+from src.db.redis_cache import RedisCacheBackend
+
+
+class CountingLoader:
+    """Stands in for a database query, counting how often it runs."""
+
+    def __init__(self, value: bytes, delay: float = 0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> bytes:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+async def ignore(message: str):
+    pass
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Timed out waiting for the condition")
+        await asyncio.sleep(0.01)
+
+
+def run_with_server(test, password=None):
+    async def main():
+        server = FakeRedisServer(password)
+        await server.start()
+        try:
+            await test(server)
+        finally:
+            await server.close()
+
+    asyncio.run(main())
+
+
+def test_get_or_load_coalesces_across_backends():
+    async def test(server):
+        backends = [RedisCacheBackend(server.url), RedisCacheBackend(server.url)]
+        caches = [LookupCache(backend, "reels") for backend in backends]
+        loader = CountingLoader(b'{"id": 1}', delay=0.2)
+        try:
+            values = await asyncio.gather(*(cache.get_or_load(1, loader) for cache in caches))
+            assert values == [b'{"id": 1}', b'{"id": 1}']
+            assert loader.calls == 1
+            assert sum(cache.coalesced for cache in caches) == 1
+            assert await backends[0].get("reels:1") == b'{"id": 1}'
+        finally:
+            for backend in backends:
+                await backend.close()
+
+    run_with_server(test)
+
+
+def test_invalidation_reaches_other_workers():
+    async def test(server):
+        backends = [RedisCacheBackend(server.url), RedisCacheBackend(server.url)]
+        caches = [LookupCache(backend, "reels", local_ttl=60) for backend in backends]
+        loader = CountingLoader(b'{"id": 1}')
+        try:
+            for cache in caches:
+                await cache.start()
+            await wait_for(lambda: len(server.subscribers.get(b"reels:invalidate", [])) == 2)
+            for cache in caches:
+                await cache.get_or_load(1, loader)
+            assert loader.calls == 1
+            assert caches[1].local.get("1") == (True, b'{"id": 1}')
+
+            await caches[0].invalidate(1)
+            await wait_for(lambda: caches[1].local.get("1") == (False, None))
+            assert await backends[1].get("reels:1") is None
+            assert await caches[1].get_or_load(1, loader) == b'{"id": 1}'
+            assert loader.calls == 2
+        finally:
+            for backend in backends:
+                await backend.close()
+
+    run_with_server(test)
+
+
+def test_wrong_password_is_rejected():
+    async def test(server):
+        backend = RedisCacheBackend(server.url.replace(":secret@", ":wrong@"))
+        try:
+            with pytest.raises(CacheBackendError, match="WRONGPASS"):
+                await backend.get("reels:1")
+            # The subscriber connection checks AUTH too instead of listening unauthenticated
+            await backend.subscribe("reels:invalidate", ignore)
+            await wait_for(lambda: server.auth_failures >= 2)
+            await wait_for(lambda: not server.clients)
+            assert not server.subscribers.get(b"reels:invalidate")
+        finally:
+            await backend.close()
+
+    run_with_server(test, password="secret")
+
+
+def test_fill_racing_an_invalidation_is_not_cached():
+    async def test(server):
+        backends = [RedisCacheBackend(server.url), RedisCacheBackend(server.url)]
+        caches = [LookupCache(backend, "reels") for backend in backends]
+        try:
+            async def load_then_update():
+                # The row is updated and invalidated after this fill read it
+                await caches[1].invalidate(1)
+                return b'{"title": "old"}'
+
+            assert await caches[0].get_or_load(1, load_then_update) == b'{"title": "old"}'
+            assert await backends[0].get("reels:1") is None
+            assert caches[0].local.get("1") == (False, None)
+            assert await caches[0].get_or_load(1, CountingLoader(b'{"title": "new"}')) == b'{"title": "new"}'
+            assert await backends[1].get("reels:1") == b'{"title": "new"}'
+        finally:
+            for backend in backends:
+                await backend.close()
+
+    run_with_server(test)
+
+
+def test_lock_is_only_released_by_its_owner():
+    async def test(server):
+        backend = RedisCacheBackend(server.url)
+        try:
+            await backend.set("reels:1:lock", b"mine", 10, only_if_absent=True)
+            assert not await backend.delete_if_equal("reels:1:lock", b"theirs")
+            assert await backend.get("reels:1:lock") == b"mine"
+            assert await backend.delete_if_equal("reels:1:lock", b"mine")
+            assert await backend.get("reels:1:lock") is None
+        finally:
+            await backend.close()
+
+    run_with_server(test)